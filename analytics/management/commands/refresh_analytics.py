@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from analytics.refresh import refresh_issue_metrics
+
+
+class Command(BaseCommand):
+    help = "Updates the issue metrics with the History rows added since the last run"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild the metrics of every issue instead of only new rows",
+        )
+        parser.add_argument(
+            "--worker",
+            action="store_true",
+            help="Keep refreshing every --interval seconds instead of exiting",
+        )
+        parser.add_argument("--interval", type=float, default=60 * 60)
+
+    def handle(self, *args, **options):
+        updated = refresh_issue_metrics(full=options["full"])
+        self.stdout.write(f"{updated} issue(s) updated")
+
+        while options["worker"]:
+            time.sleep(options["interval"])
+            try:
+                updated = refresh_issue_metrics()
+            except Exception as e:
+                self.stderr.write(f"Refresh failed: {e!r}")
+                continue
+
+            self.stdout.write(f"{updated} issue(s) updated")
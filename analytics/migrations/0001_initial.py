@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('issues', '0009_alter_history_type'),
+        ('projects', '0005_alter_project_name_alter_team_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Checkpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.TextField(unique=True)),
+                ('last_history_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='IssueMetrics',
+            fields=[
+                ('issue', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='issues.issue')),
+                ('status', models.IntegerField(choices=[(1, 'Open'), (2, 'Done'), (3, 'Closed')])),
+                ('status_since', models.DateTimeField()),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('lead_time', models.DurationField(blank=True, null=True)),
+                ('cycle_time', models.DurationField(blank=True, null=True)),
+                ('time_open', models.DurationField()),
+                ('time_done', models.DurationField()),
+                ('time_closed', models.DurationField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='projects.project')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="checkpoint",
+            name="last_issue_id",
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import models
+
+from issues.models import Issue
+from projects.models import Project
+
+
+class Checkpoint(models.Model):
+    name = models.TextField(unique=True)
+    last_history_id = models.BigIntegerField(default=0)
+    last_issue_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class IssueMetrics(models.Model):
+    issue = models.OneToOneField(
+        Issue, on_delete=models.CASCADE, primary_key=True
+    )
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    status = models.IntegerField(choices=Issue.Status.choices)
+    status_since = models.DateTimeField()
+    started_at = models.DateTimeField(null=True, blank=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    lead_time = models.DurationField(null=True, blank=True)
+    cycle_time = models.DurationField(null=True, blank=True)
+    time_open = models.DurationField()
+    time_done = models.DurationField()
+    time_closed = models.DurationField()
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,231 @@
+from django.db import connection, transaction
+from django.db.models import Max
+
+from analytics.models import Checkpoint, IssueMetrics
+from issues.models import History, Issue
+
+CHECKPOINT_NAME = "issue_metrics"
+
+# Rebuilds the metrics of every issue touched by History rows in the
+# (last_id, max_id] range, or created in the (last_issue_id, max_issue_id]
+# range so that issues without History get a row too. A project refresh only
+# rebuilds the issues of that project. Each issue starts OPEN at its creation
+# time and every STATUS row opens a new segment that ends where the next one
+# begins.
+REFRESH_SQL = """
+WITH touched AS (
+    SELECT issue_id
+    FROM {history}
+    WHERE id > %(last_id)s AND id <= %(max_id)s{project_filter}
+    UNION
+    SELECT id
+    FROM {issue}
+    WHERE id > %(last_issue_id)s
+        AND id <= %(max_issue_id)s{issue_project_filter}
+),
+transitions AS (
+    SELECT
+        i.id AS issue_id,
+        i.created_at AS changed_at,
+        {open} AS status,
+        0 AS seq
+    FROM {issue} i
+    JOIN touched t ON t.issue_id = i.id
+    UNION ALL
+    SELECT h.issue_id, h.created_at, h.status, h.id
+    FROM {history} h
+    JOIN touched t ON t.issue_id = h.issue_id
+    WHERE h.type = {status_type} AND h.id <= %(max_id)s
+),
+segments AS (
+    SELECT
+        issue_id,
+        status,
+        changed_at,
+        LAG(status) OVER w AS previous_status,
+        LEAD(changed_at) OVER w AS ended_at,
+        ROW_NUMBER() OVER (
+            PARTITION BY issue_id ORDER BY changed_at DESC, seq DESC
+        ) AS recency
+    FROM transitions
+    WINDOW w AS (PARTITION BY issue_id ORDER BY changed_at, seq)
+),
+started AS (
+    SELECT h.issue_id, MIN(h.created_at) AS started_at
+    FROM {history} h
+    JOIN touched t ON t.issue_id = h.issue_id
+    WHERE h.type IN ({assignment_type}, {status_type})
+        AND h.id <= %(max_id)s
+    GROUP BY h.issue_id
+),
+metrics AS (
+    SELECT
+        issue_id,
+        MAX(status) FILTER (WHERE recency = 1) AS status,
+        MAX(changed_at) FILTER (WHERE recency = 1) AS status_since,
+        MAX(changed_at) FILTER (
+            WHERE status <> {open} AND previous_status = {open}
+        ) AS resolution,
+        COALESCE(
+            SUM(ended_at - changed_at) FILTER (WHERE status = {open}),
+            '0'::interval
+        ) AS time_open,
+        COALESCE(
+            SUM(ended_at - changed_at) FILTER (WHERE status = {done}),
+            '0'::interval
+        ) AS time_done,
+        COALESCE(
+            SUM(ended_at - changed_at) FILTER (WHERE status = {closed}),
+            '0'::interval
+        ) AS time_closed
+    FROM segments
+    GROUP BY issue_id
+),
+resolved AS (
+    SELECT
+        m.*,
+        i.project_id,
+        i.created_at,
+        s.started_at,
+        CASE WHEN m.status <> {open} THEN m.resolution END AS resolved_at
+    FROM metrics m
+    JOIN {issue} i ON i.id = m.issue_id
+    LEFT JOIN started s ON s.issue_id = m.issue_id
+)
+INSERT INTO {metrics} (
+    issue_id,
+    project_id,
+    status,
+    status_since,
+    started_at,
+    resolved_at,
+    lead_time,
+    cycle_time,
+    time_open,
+    time_done,
+    time_closed,
+    updated_at
+)
+SELECT
+    issue_id,
+    project_id,
+    status,
+    status_since,
+    started_at,
+    resolved_at,
+    resolved_at - created_at,
+    resolved_at - LEAST(COALESCE(started_at, created_at), resolved_at),
+    time_open,
+    time_done,
+    time_closed,
+    NOW()
+FROM resolved
+ON CONFLICT (issue_id) DO UPDATE SET
+    project_id = EXCLUDED.project_id,
+    status = EXCLUDED.status,
+    status_since = EXCLUDED.status_since,
+    started_at = EXCLUDED.started_at,
+    resolved_at = EXCLUDED.resolved_at,
+    lead_time = EXCLUDED.lead_time,
+    cycle_time = EXCLUDED.cycle_time,
+    time_open = EXCLUDED.time_open,
+    time_done = EXCLUDED.time_done,
+    time_closed = EXCLUDED.time_closed,
+    updated_at = EXCLUDED.updated_at
+"""
+
+
+PROJECT_FILTER = """
+        AND issue_id IN (SELECT id FROM {issue} WHERE project_id = %(project_id)s)"""
+ISSUE_PROJECT_FILTER = """
+        AND project_id = %(project_id)s"""
+
+
+def _refresh_sql(project_id: int | None) -> str:
+    project_filter = issue_project_filter = ""
+    if project_id is not None:
+        project_filter = PROJECT_FILTER.format(issue=Issue._meta.db_table)
+        issue_project_filter = ISSUE_PROJECT_FILTER
+
+    return REFRESH_SQL.format(
+        history=History._meta.db_table,
+        issue=Issue._meta.db_table,
+        metrics=IssueMetrics._meta.db_table,
+        open=Issue.Status.OPEN.value,
+        done=Issue.Status.DONE.value,
+        closed=Issue.Status.CLOSED.value,
+        status_type=History.Type.STATUS.value,
+        assignment_type=History.Type.ASSIGNMENT.value,
+        project_filter=project_filter,
+        issue_project_filter=issue_project_filter,
+    )
+
+
+def _max_ids() -> tuple[int, int]:
+    max_id = History.objects.aggregate(Max("id"))["id__max"] or 0
+    max_issue_id = Issue.objects.aggregate(Max("id"))["id__max"] or 0
+    return max_id, max_issue_id
+
+
+# Brings the metrics of one project up to date without moving the checkpoint,
+# so the next full run still covers the other projects. The upserts are the
+# same, so running both over the same rows is harmless.
+def refresh_project_metrics(project_id: int) -> int:
+    checkpoint = Checkpoint.objects.filter(name=CHECKPOINT_NAME).first()
+    if checkpoint is None:
+        checkpoint = Checkpoint(name=CHECKPOINT_NAME)
+
+    max_id, max_issue_id = _max_ids()
+    if (
+        max_id <= checkpoint.last_history_id
+        and max_issue_id <= checkpoint.last_issue_id
+    ):
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _refresh_sql(project_id),
+            {
+                "last_id": checkpoint.last_history_id,
+                "max_id": max_id,
+                "last_issue_id": checkpoint.last_issue_id,
+                "max_issue_id": max_issue_id,
+                "project_id": project_id,
+            },
+        )
+        return cursor.rowcount
+
+
+def refresh_issue_metrics(full: bool = False) -> int:
+    with transaction.atomic():
+        checkpoint, _ = Checkpoint.objects.select_for_update().get_or_create(
+            name=CHECKPOINT_NAME
+        )
+        if full:
+            checkpoint.last_history_id = 0
+            checkpoint.last_issue_id = 0
+
+        max_id, max_issue_id = _max_ids()
+        if (
+            max_id <= checkpoint.last_history_id
+            and max_issue_id <= checkpoint.last_issue_id
+        ):
+            return 0
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _refresh_sql(None),
+                {
+                    "last_id": checkpoint.last_history_id,
+                    "max_id": max_id,
+                    "last_issue_id": checkpoint.last_issue_id,
+                    "max_issue_id": max_issue_id,
+                },
+            )
+            updated = cursor.rowcount
+
+        checkpoint.last_history_id = max_id
+        checkpoint.last_issue_id = max_issue_id
+        checkpoint.save()
+
+    return updated
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from analytics.models import Checkpoint, IssueMetrics
+from analytics.refresh import (
+    CHECKPOINT_NAME,
+    refresh_issue_metrics,
+    refresh_project_metrics,
+)
+from issues.models import History, Issue
+from projects.models import Project
+from users.models import User
+
+
+class RefreshTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user")
+        cls.start = timezone.now() - timedelta(days=10)
+        cls.issues = []
+        for i in range(2):
+            project = Project.objects.create(name=f"Project {i}")
+            issue = Issue.objects.create(
+                project=project, number=1, created_by=cls.user, title="Issue"
+            )
+            Issue.objects.filter(pk=issue.pk).update(created_at=cls.start)
+            cls.issues.append(issue)
+
+    def change_status(self, issue: Issue, status: int, days: int):
+        history = History.objects.create(
+            issue=issue,
+            user=self.user,
+            type=History.Type.STATUS,
+            status=status,
+        )
+        History.objects.filter(pk=history.pk).update(
+            created_at=self.start + timedelta(days=days)
+        )
+
+    def test_lead_time_and_time_in_status(self):
+        issue = self.issues[0]
+        self.change_status(issue, Issue.Status.DONE, 3)
+        self.change_status(issue, Issue.Status.OPEN, 4)
+        self.change_status(issue, Issue.Status.CLOSED, 6)
+
+        refresh_issue_metrics()
+
+        metrics = IssueMetrics.objects.get(issue=issue)
+        self.assertEqual(metrics.status, Issue.Status.CLOSED)
+        self.assertEqual(metrics.lead_time, timedelta(days=6))
+        self.assertEqual(metrics.cycle_time, timedelta(days=3))
+        self.assertEqual(metrics.time_open, timedelta(days=5))
+        self.assertEqual(metrics.time_done, timedelta(days=1))
+
+    def test_refresh_only_touches_new_rows(self):
+        # Both issues are new, only one has History
+        self.change_status(self.issues[0], Issue.Status.DONE, 1)
+        self.assertEqual(refresh_issue_metrics(), 2)
+        self.assertEqual(refresh_issue_metrics(), 0)
+
+        self.change_status(self.issues[1], Issue.Status.DONE, 2)
+        self.assertEqual(refresh_issue_metrics(), 1)
+
+    def test_issues_without_history_are_seeded(self):
+        self.assertEqual(refresh_issue_metrics(), 2)
+
+        metrics = IssueMetrics.objects.get(issue=self.issues[1])
+        self.assertEqual(metrics.status, Issue.Status.OPEN)
+        self.assertEqual(metrics.status_since, self.start)
+        self.assertIsNone(metrics.resolved_at)
+        self.assertEqual(metrics.time_open, timedelta(0))
+
+    def test_project_refresh_keeps_the_checkpoint(self):
+        for issue in self.issues:
+            self.change_status(issue, Issue.Status.DONE, 2)
+
+        project_id = self.issues[0].project_id  # type: ignore
+        self.assertEqual(refresh_project_metrics(project_id), 1)
+        self.assertFalse(
+            IssueMetrics.objects.filter(issue=self.issues[1]).exists()
+        )
+        self.assertFalse(
+            Checkpoint.objects.filter(
+                name=CHECKPOINT_NAME, last_history_id__gt=0
+            ).exists()
+        )
+
+        self.assertEqual(refresh_issue_metrics(), 2)
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = "analytics"
+urlpatterns = [
+    path("analytics", views.dashboard.dashboard, name="dashboard"),
+    path("analytics/refresh", views.dashboard.refresh, name="refresh"),
+]
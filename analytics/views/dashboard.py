@@ -0,0 +1,157 @@
+from datetime import timedelta
+
+from django.db.models import (
+    Avg,
+    Count,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    Q,
+    Sum,
+)
+from django.db.models.functions import Now, TruncWeek
+from django.http.response import HttpResponseForbidden
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from django.utils.translation import gettext_lazy
+from django.views.decorators.http import require_POST, require_safe
+from django_htmx.http import HttpResponseClientRefresh
+
+from analytics.models import IssueMetrics
+from analytics.refresh import refresh_project_metrics
+from core.htmx import render_htmx, show_message
+from core.typing import HttpRequest
+from issues.models import Issue
+from users.decorators import login_required, project_required
+
+LEAD_TIME_BUCKETS = [
+    (gettext_lazy("< 1 day"), None, timedelta(days=1)),
+    (gettext_lazy("1-3 days"), timedelta(days=1), timedelta(days=3)),
+    (gettext_lazy("3-7 days"), timedelta(days=3), timedelta(days=7)),
+    (gettext_lazy("1-2 weeks"), timedelta(days=7), timedelta(days=14)),
+    (gettext_lazy("2-4 weeks"), timedelta(days=14), timedelta(days=28)),
+    (gettext_lazy("> 4 weeks"), timedelta(days=28), None),
+]
+THROUGHPUT_WEEKS = 8
+
+
+def format_duration(value: timedelta | None) -> str:
+    if value is None:
+        return "-"
+
+    minutes = int(value.total_seconds() // 60)
+    days, minutes = divmod(minutes, 60 * 24)
+    hours, minutes = divmod(minutes, 60)
+
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
+
+
+def chart_rows(values: list[tuple[str, float, str]]):
+    highest = max([row[1] for row in values] + [0])
+
+    return [
+        {
+            "label": label,
+            "display": display,
+            "percent": round(value * 100 / highest) if highest else 0,
+        }
+        for label, value, display in values
+    ]
+
+
+@login_required
+@project_required
+@require_safe
+def dashboard(request: HttpRequest):
+    metrics = IssueMetrics.objects.filter(
+        project=request.selected_project.project
+    )
+    current_age = ExpressionWrapper(
+        Now() - F("status_since"), output_field=DurationField()
+    )
+
+    aggregates = {
+        "issues": Count("pk"),
+        "resolved": Count("pk", filter=Q(resolved_at__isnull=False)),
+        "lead_time": Avg("lead_time"),
+        "cycle_time": Avg("cycle_time"),
+    }
+    for status in Issue.Status:
+        field = f"time_{status.name.lower()}"
+        aggregates[field] = Sum(field)
+        aggregates[f"current_{field}"] = Sum(
+            current_age, filter=Q(status=status)
+        )
+    for i, (_label, start, end) in enumerate(LEAD_TIME_BUCKETS):
+        bucket = Q(lead_time__isnull=False)
+        if start is not None:
+            bucket &= Q(lead_time__gte=start)
+        if end is not None:
+            bucket &= Q(lead_time__lt=end)
+        aggregates[f"bucket_{i}"] = Count("pk", filter=bucket)
+
+    summary = metrics.aggregate(**aggregates)
+    issue_count = summary["issues"]
+
+    time_in_status = []
+    for status in Issue.Status:
+        field = f"time_{status.name.lower()}"
+        total = (summary[field] or timedelta()) + (
+            summary[f"current_{field}"] or timedelta()
+        )
+        average = total / issue_count if issue_count else timedelta()
+        time_in_status.append(
+            (status.label, average.total_seconds(), format_duration(average))
+        )
+
+    lead_time_distribution = [
+        (label, summary[f"bucket_{i}"], str(summary[f"bucket_{i}"]))
+        for i, (label, _start, _end) in enumerate(LEAD_TIME_BUCKETS)
+    ]
+
+    since = timezone.now() - timedelta(weeks=THROUGHPUT_WEEKS)
+    weeks = (
+        metrics.filter(resolved_at__gte=since)
+        .annotate(week=TruncWeek("resolved_at"))
+        .values("week")
+        .annotate(count=Count("pk"))
+        .order_by("week")
+    )
+    throughput = [
+        (week["week"].strftime("%d/%m"), week["count"], str(week["count"]))
+        for week in weeks
+    ]
+
+    return render_htmx(
+        request,
+        "analytics/dashboard.html",
+        {
+            "issue_count": issue_count,
+            "resolved_count": summary["resolved"],
+            "lead_time": format_duration(summary["lead_time"]),
+            "cycle_time": format_duration(summary["cycle_time"]),
+            "time_in_status": chart_rows(time_in_status),
+            "lead_time_distribution": chart_rows(lead_time_distribution),
+            "throughput": chart_rows(throughput),
+        },
+    )
+
+
+@login_required
+@project_required
+@require_POST
+def refresh(request: HttpRequest):
+    if not request.selected_project.can_refresh_analytics:
+        return show_message(
+            HttpResponseForbidden(),  # type: ignore
+            "error",
+            _("You are not allowed to refresh the analytics."),
+        )
+
+    refresh_project_metrics(request.selected_project.project.pk)
+
+    return HttpResponseClientRefresh()
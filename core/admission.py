@@ -0,0 +1,174 @@
+import threading
+import time
+from typing import Any
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+from core.typing import HttpRequest
+
+# Views shed first when the workers or the database are saturated. The
+# autocomplete views are only low priority for their JSON searches.
+LOW_PRIORITY_VIEWS = [
+    "users:notifications_counter",
+]
+AUTOCOMPLETE_VIEWS = [
+    "issues:assign_user",
+    "issues:assign_team",
+    "projects:invite_member",
+    "projects:assign_team_member",
+]
+
+IN_FLIGHT_PREFIX = "admission:in-flight:"
+# Requests are counted in the bucket of the time they started, and the last two
+# buckets are added up. A count lost to a killed worker is gone a bucket later.
+BUCKET_SECONDS = 30
+
+# Weight of every query in the average query time, so it follows about the last
+# 1 / DB_TIME_WEIGHT of them. The average is only used once it has
+# DB_MIN_SAMPLES queries, and starts over after DB_IDLE_SECONDS without any.
+DB_TIME_WEIGHT = 0.05
+DB_MIN_SAMPLES = 20
+DB_IDLE_SECONDS = 30.0
+
+_db_lock = threading.Lock()
+_db_time_ms = 0.0
+_db_samples = 0
+_db_updated = 0.0
+
+
+def is_low_priority(request: HttpRequest) -> bool:
+    match = request.resolver_match
+    if match is None:
+        return False
+
+    if match.view_name in LOW_PRIORITY_VIEWS:
+        return True
+
+    return (
+        match.view_name in AUTOCOMPLETE_VIEWS
+        and request.method == "GET"
+        and request.headers.get("Accept") == "application/json"
+    )
+
+
+_client = None
+
+
+def _redis():
+    global _client
+
+    if _client is None:
+        import redis
+
+        _client = redis.Redis.from_url(settings.ADMISSION_REDIS_URL)
+
+    return _client
+
+
+def counts_in_flight() -> bool:
+    # Counts of each process would only see the requests of one worker
+    return settings.ADMISSION_REDIS_URL is not None
+
+
+def _bucket_key(bucket: int) -> str:
+    return f"{IN_FLIGHT_PREFIX}{bucket}"
+
+
+def request_started() -> tuple[str | None, int]:
+    """Counts the request in, returning the key to count it out with and how
+    many other requests are in flight. Takes a single round trip."""
+    if not counts_in_flight():
+        return None, 0
+
+    bucket = int(time.time() // BUCKET_SECONDS)
+    key = _bucket_key(bucket)
+    try:
+        pipeline = _redis().pipeline(transaction=False)
+        pipeline.incr(key)
+        pipeline.expire(key, BUCKET_SECONDS * 3)
+        pipeline.get(_bucket_key(bucket - 1))
+        current, _, previous = pipeline.execute()
+    except Exception:
+        return None, 0
+
+    # The request itself is not waiting for a worker
+    return key, max(current + int(previous or 0) - 1, 0)
+
+
+def request_finished(key: str | None):
+    if key is None:
+        return
+
+    try:
+        # The bucket may have expired while the request ran, the one created
+        # again expires too
+        pipeline = _redis().pipeline(transaction=False)
+        pipeline.decr(key)
+        pipeline.expire(key, BUCKET_SECONDS * 3)
+        pipeline.execute()
+    except Exception:
+        pass
+
+
+# An exponentially weighted average of the query times of this process. The
+# weight is fixed, so a single query after an idle period can't make it.
+def record_query(duration_ms: float):
+    global _db_time_ms, _db_samples, _db_updated
+
+    now = time.monotonic()
+    with _db_lock:
+        if now - _db_updated > DB_IDLE_SECONDS:
+            _db_samples = 0
+
+        if _db_samples == 0:
+            _db_time_ms = duration_ms
+        else:
+            _db_time_ms += (duration_ms - _db_time_ms) * DB_TIME_WEIGHT
+        _db_samples += 1
+        _db_updated = now
+
+
+def db_time_ms() -> float:
+    # Without enough recent queries there is nothing to say the database is
+    # slow
+    if (
+        _db_samples < DB_MIN_SAMPLES
+        or time.monotonic() - _db_updated > DB_IDLE_SECONDS
+    ):
+        return 0.0
+
+    return _db_time_ms
+
+
+def time_queries(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record_query((time.perf_counter() - start) * 1000)
+
+
+def overloaded(in_flight: int) -> str | None:
+    """Returns why a low priority request should be shed, given the number of
+    other requests in flight, or None."""
+    if db_time_ms() >= settings.ADMISSION_DB_TIME_MS:
+        return "database"
+
+    if in_flight >= settings.ADMISSION_MAX_IN_FLIGHT:
+        return "workers"
+
+    return None
+
+
+def _on_connection_created(connection, **_: Any):
+    # The plans of core.slowqueries are taken outside of any request
+    if getattr(connection, "slow_query_explain", False):
+        return
+
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
+
+
+def connect_signals():
+    connection_created.connect(_on_connection_created)
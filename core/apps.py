@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core import admission, metrics, querycache, slowqueries
+
+        admission.connect_signals()
+        metrics.connect_signals()
+        querycache.connect_signals()
+        slowqueries.connect_signals()
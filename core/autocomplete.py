@@ -0,0 +1,133 @@
+import hashlib
+import uuid
+from typing import Any, Callable, TypedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.typing import HttpRequest
+
+KEY_PREFIX = "autocomplete:"
+
+
+class Option(TypedDict):
+    value: Any
+    label: str
+    # What the search prefix is matched against
+    terms: list[str]
+
+
+def option(value: Any, label: str, *terms: str) -> Option:
+    return {
+        "value": value,
+        "label": label,
+        "terms": [term.casefold() for term in terms],
+    }
+
+
+def is_search(request: HttpRequest) -> bool:
+    """Whether the request asks for options rather than the dialog."""
+    return request.headers.get("Accept") == "application/json"
+
+
+def _version_key(scope: str) -> str:
+    return f"{KEY_PREFIX}version:{scope}"
+
+
+def _key(
+    request: HttpRequest, scopes: list[str], version: str, prefix: str
+) -> str:
+    view_name = request.resolver_match.view_name
+    scope = ",".join(scopes)
+    digest = hashlib.md5(prefix.encode()).hexdigest()
+    return (
+        f"{KEY_PREFIX}{view_name}:{request.user.pk}:{scope}:{version}:{digest}"
+    )
+
+
+def invalidate(*scopes: str):
+    """Drops the cached results of every user for the scopes, after a change
+    to what they can find is committed."""
+    if not settings.SHARED_CACHE:
+        return
+
+    def bump():
+        # Outlives every result cached under it, so no version comes back
+        cache.set_many(
+            {_version_key(scope): uuid.uuid4().hex for scope in scopes},
+            settings.AUTOCOMPLETE_CACHE_SECONDS * 2,
+        )
+
+    transaction.on_commit(bump)
+
+
+# Results of a search are cached for the user for a few seconds. A search for a
+# prefix that extends one already searched is answered from those results when
+# they were complete, so typing a name makes one query rather than one for every
+# character. Without a shared cache nothing is cached, as another process would
+# not see the invalidation.
+def options(
+    request: HttpRequest,
+    scopes: list[str],
+    find: Callable[[str, int], list[Option]],
+) -> list[dict[str, Any]]:
+    """Returns at most AUTOCOMPLETE_LIMIT options for the "filter" parameter,
+    calling find(prefix, limit) for them unless a cached search covers it.
+    The results are dropped when any of the scopes is invalidated."""
+    prefix = (request.GET.get("filter") or "").casefold()
+    limit = settings.AUTOCOMPLETE_LIMIT
+    timeout = settings.AUTOCOMPLETE_CACHE_SECONDS
+
+    if not settings.SHARED_CACHE:
+        return _values(find(prefix, limit))
+
+    versions = cache.get_many([_version_key(scope) for scope in scopes])
+    version = ",".join(
+        versions.get(_version_key(scope), "") for scope in scopes
+    )
+    keys = {
+        _key(request, scopes, version, prefix[:length]): length
+        for length in range(len(prefix), -1, -1)
+    }
+    cached = cache.get_many(list(keys))
+
+    found = None
+    for key, length in keys.items():
+        entry = cached.get(key)
+        if entry is None:
+            continue
+
+        if length == len(prefix):
+            found = entry["options"]
+            break
+
+        if entry["complete"]:
+            found = [
+                item
+                for item in entry["options"]
+                if any(term.startswith(prefix) for term in item["terms"])
+            ]
+            cache.set(
+                _key(request, scopes, version, prefix),
+                {"options": found, "complete": True},
+                timeout,
+            )
+            break
+
+    if found is None:
+        # One more than the limit tells if there are more
+        found = find(prefix, limit + 1)
+        complete = len(found) <= limit
+        found = found[:limit]
+        cache.set(
+            _key(request, scopes, version, prefix),
+            {"options": found, "complete": complete},
+            timeout,
+        )
+
+    return _values(found)
+
+
+def _values(found: list[Option]) -> list[dict[str, Any]]:
+    return [{"value": item["value"], "label": item["label"]} for item in found]
@@ -0,0 +1,313 @@
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+logger = logging.getLogger(__name__)
+
+CLEAR_ALL = "*"
+
+
+# The L1 entries of a process with the Redis connections keeping them fresh.
+# Django creates a cache instance per thread, they all share this so a process
+# has one L1, one listener thread and one publishing connection.
+class _Process:
+    def __init__(self, redis_url: str, channel: str):
+        self.redis_url = redis_url
+        self.channel = channel
+        self.entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.sender = uuid.uuid4().hex
+        self.publisher: Any = None
+        self.stats = {
+            "l1": {"hits": 0, "misses": 0},
+            "l2": {"hits": 0, "misses": 0},
+        }
+
+    def delete(self, key: str):
+        with self.lock:
+            if key == CLEAR_ALL:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+    def redis(self):
+        import redis
+
+        return redis.Redis.from_url(self.redis_url)
+
+    def start_listener(self):
+        if not self.redis_url:
+            return
+
+        thread = threading.Thread(
+            target=self.listen,
+            name="tiered-cache-invalidation",
+            daemon=True,
+        )
+        thread.start()
+
+    def listen(self):
+        while True:
+            try:
+                pubsub = self.redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Anything written while the listener was down may be stale
+                self.delete(CLEAR_ALL)
+
+                for message in pubsub.listen():
+                    sender, _, key = message["data"].decode().partition(":")
+                    if sender != self.sender:
+                        self.delete(key)
+            except Exception:
+                logger.exception("Cache invalidation listener failed")
+                time.sleep(1)
+
+    def invalidate(self, key: str):
+        self.delete(key)
+        if not self.redis_url:
+            return
+
+        try:
+            with self.lock:
+                if self.publisher is None:
+                    self.publisher = self.redis()
+                publisher = self.publisher
+            publisher.publish(self.channel, f"{self.sender}:{key}")
+        except Exception:
+            self.publisher = None
+            logger.exception("Could not publish a cache invalidation")
+
+
+# Keyed by pid: after a fork the entries and the listener thread belong to the
+# parent process, so the child starts over.
+_processes: dict[tuple[int, str, str], _Process] = {}
+_processes_lock = threading.Lock()
+
+
+def _process(redis_url: str, channel: str) -> _Process:
+    key = (os.getpid(), redis_url, channel)
+    process = _processes.get(key)
+    if process is not None:
+        return process
+
+    with _processes_lock:
+        process = _processes.get(key)
+        if process is None:
+            for other in [k for k in _processes if k[0] != key[0]]:
+                del _processes[other]
+
+            process = _processes[key] = _Process(redis_url, channel)
+            process.start_listener()
+
+    return process
+
+
+# Two level cache: a small per process LRU (L1) in front of another configured
+# cache (L2). Writes and deletes are broadcast over Redis pub/sub so the other
+# processes drop their L1 copy, and the L1 timeout bounds how stale a value can
+# get if a message is lost.
+class TieredCache(BaseCache):
+    def __init__(self, location: str, params: dict[str, Any]):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+
+        self.redis_url = location
+        self.l2_alias = options.get("L2", "redis")
+        self.l1_max_entries = options.get("L1_MAX_ENTRIES", 1000)
+        self.l1_timeout = options.get("L1_TIMEOUT", 10)
+        self.channel = options.get("CHANNEL", "hercules:cache:invalidate")
+
+    @property
+    def l2(self) -> BaseCache:
+        return caches[self.l2_alias]
+
+    @property
+    def _process(self) -> _Process:
+        return _process(self.redis_url, self.channel)
+
+    # L1
+
+    def _l1_get(self, key: str) -> tuple[bool, Any]:
+        process = self._process
+        with process.lock:
+            entry = process.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                process.entries.pop(key, None)
+                process.stats["l1"]["misses"] += 1
+                return False, None
+
+            process.entries.move_to_end(key)
+            process.stats["l1"]["hits"] += 1
+            value = entry[1]
+
+        return True, pickle.loads(value)
+
+    def _l1_set(self, key: str, value: Any, timeout: float | None):
+        l1_timeout = self.l1_timeout
+        if timeout is not None:
+            l1_timeout = min(l1_timeout, timeout)
+        if l1_timeout <= 0:
+            self._process.delete(key)
+            return
+
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        process = self._process
+        with process.lock:
+            process.entries[key] = (time.monotonic() + l1_timeout, data)
+            process.entries.move_to_end(key)
+            while len(process.entries) > self.l1_max_entries:
+                process.entries.popitem(last=False)
+
+    def _l2_stat(self, name: str, count: int = 1):
+        process = self._process
+        with process.lock:
+            process.stats["l2"][name] += count
+
+    def _timeout(self, timeout: Any) -> float | None:
+        if timeout is DEFAULT_TIMEOUT:
+            return self.default_timeout
+
+        return timeout
+
+    def _invalidate(self, key: str):
+        self._process.invalidate(key)
+
+    # Cache API
+
+    def get(self, key: str, default: Any = None, version: int | None = None):
+        l1_key = self.make_and_validate_key(key, version)
+
+        found, value = self._l1_get(l1_key)
+        if found:
+            return value
+
+        missing = object()
+        value = self.l2.get(key, missing, version)
+        if value is missing:
+            self._l2_stat("misses")
+            return default
+
+        self._l2_stat("hits")
+        self._l1_set(l1_key, value, self.l1_timeout)
+        return value
+
+    def get_many(self, keys: list[str], version: int | None = None):
+        result = {}
+        missing = []
+        for key in keys:
+            found, value = self._l1_get(
+                self.make_and_validate_key(key, version)
+            )
+            if found:
+                result[key] = value
+            else:
+                missing.append(key)
+
+        if missing:
+            values = self.l2.get_many(missing, version)
+            self._l2_stat("hits", len(values))
+            self._l2_stat("misses", len(missing) - len(values))
+
+            for key, value in values.items():
+                self._l1_set(
+                    self.make_and_validate_key(key, version),
+                    value,
+                    self.l1_timeout,
+                )
+            result.update(values)
+
+        return result
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ):
+        l1_key = self.make_and_validate_key(key, version)
+
+        self.l2.set(key, value, timeout, version)
+        self._invalidate(l1_key)
+        self._l1_set(l1_key, value, self._timeout(timeout))
+
+    def add(
+        self,
+        key: str,
+        value: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> bool:
+        l1_key = self.make_and_validate_key(key, version)
+
+        added = self.l2.add(key, value, timeout, version)
+        if added:
+            self._invalidate(l1_key)
+            self._l1_set(l1_key, value, self._timeout(timeout))
+
+        return added
+
+    def set_many(
+        self,
+        data: dict[str, Any],
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ):
+        failed = self.l2.set_many(data, timeout, version)
+        for key in data:
+            self._invalidate(self.make_and_validate_key(key, version))
+
+        return failed
+
+    def touch(
+        self,
+        key: str,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: int | None = None,
+    ) -> bool:
+        return self.l2.touch(key, timeout, version)
+
+    def delete(self, key: str, version: int | None = None) -> bool:
+        deleted = self.l2.delete(key, version)
+        self._invalidate(self.make_and_validate_key(key, version))
+        return deleted
+
+    def delete_many(self, keys: list[str], version: int | None = None):
+        self.l2.delete_many(keys, version)
+        for key in keys:
+            self._invalidate(self.make_and_validate_key(key, version))
+
+    def has_key(self, key: str, version: int | None = None) -> bool:
+        found, _ = self._l1_get(self.make_and_validate_key(key, version))
+        return found or self.l2.has_key(key, version)
+
+    def incr(self, key: str, delta: int = 1, version: int | None = None):
+        value = self.l2.incr(key, delta, version)
+        self._invalidate(self.make_and_validate_key(key, version))
+        return value
+
+    def decr(self, key: str, delta: int = 1, version: int | None = None):
+        return self.incr(key, -delta, version)
+
+    def clear(self):
+        self.l2.clear()
+        self._invalidate(CLEAR_ALL)
+
+    def close(self, **kwargs: Any):
+        self.l2.close(**kwargs)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        process = self._process
+        with process.lock:
+            stats = {level: dict(s) for level, s in process.stats.items()}
+            stats["l1"]["entries"] = len(process.entries)
+
+        return stats
@@ -4,11 +4,54 @@ from typing import Any
 from django.http.response import HttpResponse as BHttpResponse
 from django.http.response import HttpResponseRedirect
 from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
 from django.utils.translation import gettext as _
 from django_htmx.http import HttpResponseClientRedirect
 
+from core import metrics
 from core.typing import HttpRequest, HttpResponse
 
+# Set by base.html on every htmx request made from a page with the full app
+# shell, which boosted navigations can then keep instead of re-rendering
+SHELL_HEADER = "Hercules-Shell"
+
+# Sidebar link highlighted for each view, or for every view in a namespace
+NAVIGATION = {
+    "projects:select_project": "select",
+    "projects:new_project": "select",
+    "projects:index": "main",
+    "projects:rename": "main",
+    "projects:members": "members",
+    "projects:invite_member": "members",
+    "projects:teams": "teams",
+    "projects:new_team": "teams",
+    "projects:team": "teams",
+    "projects:rename_team": "teams",
+    "projects:assign_team_member": "teams",
+    "issues": "issues",
+    "analytics": "analytics",
+    "core": "profiles",
+}
+
+
+def active_navigation(request: HttpRequest) -> str | None:
+    match = request.resolver_match
+    if match is None:
+        return None
+
+    return NAVIGATION.get(match.view_name, NAVIGATION.get(match.namespace))
+
+
+def keeps_shell(request: HttpRequest, context: dict[str, Any]) -> bool:
+    return bool(
+        request.htmx
+        and request.htmx.boosted
+        and not request.htmx.history_restore_request
+        and request.headers.get(SHELL_HEADER)
+        and request.user.is_authenticated
+        and not context.get("hide_sidebar")
+    )
+
 
 def render_htmx(
     request: HttpRequest,
@@ -23,38 +66,37 @@ def render_htmx(
         context = {}
 
     if request.htmx and not request.htmx.boosted:
-        return render(
-            request,
-            template_name,
-            context,
-            content_type,
-            status,
-            using,
-        )
+        mode, page_template = "partial", template_name
+    elif custom_full_template_name:
+        mode, page_template = "full", custom_full_template_name
+    else:
+        context["partial_content_template"] = template_name
+        context["active_navigation"] = active_navigation(request)
+
+        # The page already has the sidebar and header, so only the contents of
+        # main and the highlighted navigation link are sent
+        if keeps_shell(request, context):
+            mode, page_template = "boosted", "boosted.html"
+        else:
+            mode, page_template = "full", "base.html"
 
-    if custom_full_template_name:
-        return render(
+    with metrics.RENDER_DURATION.labels(template_name, mode).time():
+        response = render(
             request,
-            custom_full_template_name,
+            page_template,
             context,
             content_type,
             status,
             using,
         )
 
-    if context is None:
-        context = {}
-
-    context["partial_content_template"] = template_name
+    if mode == "boosted":
+        response.headers["HX-Retarget"] = "main"
+        response.headers["HX-Reswap"] = "innerHTML scroll:top"
+    if page_template in ["base.html", "boosted.html"]:
+        patch_vary_headers(response, ("HX-Request", SHELL_HEADER))
 
-    return render(
-        request,
-        "base.html",
-        context,
-        content_type,
-        status,
-        using,
-    )
+    return response
 
 
 def show_message(
@@ -0,0 +1,137 @@
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Id of the request being handled, set by core.middleware.RequestIdMiddleware
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+# Name of the view handling it, once the URL was resolved
+view_name: ContextVar[str | None] = ContextVar("view_name", default=None)
+
+# Attributes every LogRecord has, anything else was passed through extra
+STANDARD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+}
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id.get()
+
+        return True
+
+
+# Keeps a fraction of the records of each level, for example {"DEBUG": 0.1}.
+# Levels that are not listed are always kept.
+class SamplingFilter(logging.Filter):
+    def __init__(self, rates: dict[str, float] | None = None):
+        super().__init__()
+        self.rates = {
+            logging.getLevelName(level): rate
+            for level, rate in (rates or {}).items()
+        }
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno)
+        return rate is None or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        for key, value in vars(record).items():
+            if key not in STANDARD_ATTRIBUTES:
+                data[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        if record.stack_info:
+            data["stack"] = self.formatStack(record.stack_info)
+
+        return json.dumps(data, default=str)
+
+
+# Puts records on a queue and writes them to a rotating file from a background
+# thread, so slow disks and rotation never block the thread that logged. The
+# thread is started in each process on its first record, as it doesn't survive
+# the fork of the gunicorn workers.
+class QueuedRotatingFileHandler(QueueHandler):
+    def __init__(
+        self,
+        filename: str,
+        maxBytes: int = 0,
+        backupCount: int = 0,
+        encoding: str | None = "utf-8",
+    ):
+        super().__init__(queue.SimpleQueue())
+        self.target = RotatingFileHandler(
+            filename,
+            maxBytes=maxBytes,
+            backupCount=backupCount,
+            encoding=encoding,
+            delay=True,
+        )
+        self.listener: QueueListener | None = None
+        self._pid: int | None = None
+        self._start_lock = threading.Lock()
+
+    def setFormatter(self, fmt: logging.Formatter | None):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only the formatting that needs the original objects happens here,
+        # the target formats the rest on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                formatter = self.formatter or logging.Formatter()
+                record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self._pid != os.getpid():
+            self._start()
+
+        super().enqueue(record)
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+
+            # Records left by the parent process are its own to write
+            self.queue = queue.SimpleQueue()
+            self.listener = QueueListener(self.queue, self.target)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def close(self):
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+
+        self.target.close()
+        super().close()
@@ -0,0 +1,197 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.base import Template
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core import querycache
+from issues.models import Counter, History, Issue
+from projects.models import Project, ProjectMember, Role, Team, TeamMember
+from users.models import User
+
+# Pages rendered by the benchmark, with the arguments of their URL
+PAGES = [
+    ("projects:select_project", {}),
+    ("projects:index", {}),
+    ("projects:members", {}),
+    ("projects:teams", {}),
+    ("projects:team", {"team_id": None}),
+    ("issues:list", {}),
+    ("issues:issue", {"number": 1}),
+    ("analytics:dashboard", {}),
+    ("users:profile", {}),
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def timed_templates(timings: dict[str, list[float]]):
+    # Template.render is also what includes call, so each time is inclusive
+    original = Template.render
+
+    def render(self, context):
+        start = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            timings[self.origin.template_name].append(
+                time.perf_counter() - start
+            )
+
+    Template.render = render
+    try:
+        yield
+    finally:
+        Template.render = original
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the main pages on a seeded dataset and reports the render "
+        "time of each template. Nothing is kept in the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--members", type=int, default=50)
+        parser.add_argument("--teams", type=int, default=10)
+        parser.add_argument("--issues", type=int, default=200)
+
+    def seed(self, options) -> tuple[User, Project, ProjectMember, Team]:
+        users = User.objects.bulk_create(
+            [
+                User(username=f"benchmark-{time.time_ns()}-{i}")
+                for i in range(options["members"])
+            ]
+        )
+        user = users[0]
+        project = Project.objects.create(name="Benchmark")
+        members = ProjectMember.objects.bulk_create(
+            [
+                ProjectMember(
+                    project=project,
+                    user=member,
+                    role=Role.OWNER if member == user else Role.DEVELOPER,
+                    accepted=True,
+                )
+                for member in users
+            ]
+        )
+        teams = Team.objects.bulk_create(
+            [
+                Team(project=project, name=f"Team {i}")
+                for i in range(options["teams"])
+            ]
+        )
+        TeamMember.objects.bulk_create(
+            [
+                TeamMember(team=team, member=member)
+                for i, team in enumerate(teams)
+                for member in members[i :: len(teams)]
+            ]
+        )
+        issues = Issue.objects.bulk_create(
+            [
+                Issue(
+                    project=project,
+                    number=number,
+                    created_by=users[number % len(users)],
+                    title=f"Issue {number}",
+                )
+                for number in range(1, options["issues"] + 1)
+            ]
+        )
+        Counter.objects.create(project=project, number=len(issues))
+        History.objects.bulk_create(
+            [
+                History(
+                    issue=issue,
+                    user=users[i % len(users)],
+                    type=History.Type.STATUS,
+                    status=Issue.Status.OPEN,
+                )
+                for issue in issues
+                for i in range(3)
+            ]
+        )
+
+        return user, project, members[0], teams[0]
+
+    def handle(self, *args, **options):
+        timings: dict[str, list[float]] = defaultdict(list)
+
+        try:
+            with transaction.atomic():
+                user, project, member, team = self.seed(options)
+                self.render_pages(user, project, member, team, options, timings)
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            # Results cached while seeding must not outlive the rollback
+            for model in querycache.tracked_models():
+                querycache.bump_version(model)
+
+        self.report(timings)
+
+    def render_pages(
+        self,
+        user: User,
+        project: Project,
+        member: ProjectMember,
+        team: Team,
+        options,
+        timings: dict[str, list[float]],
+    ):
+        client = Client()
+        client.force_login(user)
+        session = client.session
+        session["selected_project"] = {
+            "project_id": project.pk,
+            "member_id": member.pk,
+            "role": member.role,
+        }
+        session.save()
+
+        urls = []
+        for name, kwargs in PAGES:
+            if "team_id" in kwargs:
+                kwargs = {**kwargs, "team_id": team.pk}
+            urls.append(reverse(name, kwargs=kwargs))
+
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            # The first round only fills the caches
+            for url in urls:
+                client.get(url)
+
+            with timed_templates(timings):
+                for _ in range(options["iterations"]):
+                    for url in urls:
+                        response = client.get(url)
+                        if response.status_code != 200:
+                            self.stderr.write(
+                                f"{url} returned {response.status_code}"
+                            )
+
+    def report(self, timings: dict[str, list[float]]):
+        rows = sorted(
+            timings.items(), key=lambda item: sum(item[1]), reverse=True
+        )
+
+        self.stdout.write(
+            f"{'Template':<50} {'Renders':>8} {'Mean ms':>9} {'Total ms':>9}"
+        )
+        for name, times in rows:
+            total = sum(times) * 1000
+            self.stdout.write(
+                f"{name:<50} {len(times):>8} {total / len(times):>9.3f} "
+                f"{total:>9.1f}"
+            )
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.partitions import add_months, create_partition, partitioned_tables
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the monthly partitions of the partitioned tables ahead of time"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="How many months after the current one should exist",
+        )
+        parser.add_argument(
+            "--worker",
+            action="store_true",
+            help="Keep creating them every --interval seconds instead of exiting",
+        )
+        parser.add_argument("--interval", type=float, default=60 * 60 * 24)
+
+    def create(self, months_ahead: int):
+        current = timezone.now().date().replace(day=1)
+
+        for table in partitioned_tables():
+            for months in range(months_ahead + 1):
+                month = add_months(current, months)
+                if create_partition(table, month):
+                    self.stdout.write(
+                        f"Created {table} partition for {month:%Y-%m}"
+                    )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                self.create(options["months_ahead"])
+            except Exception as e:
+                if not options["worker"]:
+                    raise
+                self.stderr.write(f"Creating partitions failed: {e!r}")
+
+            if not options["worker"]:
+                return
+
+            time.sleep(options["interval"])
@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from core import slowqueries
+
+
+class Command(BaseCommand):
+    help = (
+        "Lists the slowest statements captured recently, grouped by query, "
+        "with their sampled plans"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Show the latest plan of each query",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Empty the buffer instead of listing it",
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            slowqueries.clear()
+            self.stdout.write("Slow query buffer cleared")
+            return
+
+        groups = defaultdict(list)
+        for entry in slowqueries.entries():
+            groups[entry["fingerprint"]].append(entry)
+
+        worst = sorted(
+            groups.values(),
+            key=lambda entries: max(e["duration_ms"] for e in entries),
+            reverse=True,
+        )
+        if not worst:
+            self.stdout.write("No slow queries recorded")
+
+        for entries in worst[: options["limit"]]:
+            durations = [entry["duration_ms"] for entry in entries]
+            latest = entries[-1]
+
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{len(entries)}x, max {max(durations):.1f} ms, "
+                    f"mean {sum(durations) / len(durations):.1f} ms"
+                )
+            )
+            self.stdout.write(latest["fingerprint"])
+            self.stdout.write(f"  last at {latest['at']}")
+            self.stdout.write(f"  view: {latest['view'] or '-'}")
+            self.stdout.write(f"  template: {latest['template'] or '-'}")
+            self.stdout.write(f"  location: {latest['location'] or '-'}")
+            self.stdout.write(f"  params: {latest['params']}")
+
+            if options["plans"]:
+                plans = [entry["plan"] for entry in entries if entry["plan"]]
+                if plans:
+                    self.stdout.write(plans[-1])
+
+            self.stdout.write("")
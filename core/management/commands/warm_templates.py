@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.warmup import compile_templates
+
+
+class Command(BaseCommand):
+    help = "Compiles every template of the project and fails on any error"
+
+    def handle(self, *args, **options):
+        compiled, errors = compile_templates(within=settings.BASE_DIR)
+
+        for name, error in errors.items():
+            self.stderr.write(f"{name}: {error}")
+
+        if errors:
+            raise CommandError(f"{len(errors)} template(s) failed to compile")
+
+        self.stdout.write(f"{len(compiled)} template(s) compiled")
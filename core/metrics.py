@@ -0,0 +1,178 @@
+import os
+from contextvars import ContextVar
+from typing import Any
+
+from django.core.cache import caches
+from django.db.backends.signals import connection_created
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from core.cache import TieredCache
+
+# With several gunicorn workers, each one writes its samples to files in
+# PROMETHEUS_MULTIPROC_DIR (set by hercules.gunicorn_conf) and /metrics adds
+# them up. Without it, as under runserver, the process keeps its own samples.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+UNRESOLVED = "unresolved"
+
+REQUEST_DURATION = Histogram(
+    "hercules_request_duration_seconds",
+    "Time spent handling a request",
+    ["view", "method"],
+)
+REQUESTS = Counter(
+    "hercules_requests",
+    "Requests handled, by response status",
+    ["view", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "hercules_request_queries",
+    "Database queries made by a request",
+    ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+RENDER_DURATION = Histogram(
+    "hercules_render_duration_seconds",
+    "Time spent rendering a page with render_htmx, by response mode",
+    ["template", "mode"],
+)
+DECORATOR_REDIRECTS = Counter(
+    "hercules_decorator_redirects",
+    "Requests turned away by login_required and project_required",
+    ["reason"],
+)
+CACHE_REQUESTS = Counter(
+    "hercules_cache_requests",
+    "Lookups in the tiered cache, by level and result",
+    ["level", "result"],
+)
+NOTIFICATION_POLLS = Counter(
+    "hercules_notification_polls",
+    "Polls of the notification counter, by whether the count went up",
+    ["changed"],
+)
+SHED_REQUESTS = Counter(
+    "hercules_shed_requests",
+    "Low priority requests turned away by admission control",
+    ["view", "reason"],
+)
+COMPRESSION_ORIGINAL_BYTES = Counter(
+    "hercules_compression_original_bytes",
+    "Size of the compressible responses before minifying and compressing",
+    ["view"],
+)
+COMPRESSION_SAVED_BYTES = Counter(
+    "hercules_compression_saved_bytes",
+    "Bytes taken off the compressible responses by minifying and compressing",
+    ["view"],
+)
+IMAGE_PROCESSING_DURATION = Histogram(
+    "hercules_image_processing_duration_seconds",
+    "Time spent cropping and resizing an uploaded picture",
+)
+
+# Queries made by the current request, counted by count_queries
+_queries: ContextVar[list[int] | None] = ContextVar("queries", default=None)
+
+# Cache statistics of this process when they were last exported
+_cache_stats: dict[tuple[str, str], int] = {}
+
+
+def start_request() -> Any:
+    return _queries.set([0])
+
+
+def finish_request(
+    token: Any, view: str | None, method: str, status: int, seconds: float
+):
+    queries = _queries.get()
+    _queries.reset(token)
+
+    view = view or UNRESOLVED
+    REQUEST_DURATION.labels(view, method).observe(seconds)
+    REQUESTS.labels(view, status).inc()
+    if queries is not None:
+        REQUEST_QUERIES.labels(view).observe(queries[0])
+
+    export_cache_stats()
+
+
+def count_queries(execute, sql, params, many, context):
+    queries = _queries.get()
+    if queries is not None:
+        queries[0] += 1
+
+    return execute(sql, params, many, context)
+
+
+def export_cache_stats():
+    cache = caches["default"]
+    if not isinstance(cache, TieredCache):
+        return
+
+    # The cache keeps running totals, the counters only get what is new
+    for level, stats in cache.stats().items():
+        for result in ["hits", "misses"]:
+            value = stats[result]
+            previous = _cache_stats.get((level, result), 0)
+            if value > previous:
+                CACHE_REQUESTS.labels(level, result).inc(value - previous)
+            _cache_stats[level, result] = value
+
+
+class JobQueueCollector:
+    def collect(self):
+        from issues.models import ImportJob
+        from projects.models import DeletionJob
+
+        depth = GaugeMetricFamily(
+            "hercules_job_queue_depth",
+            "Background jobs waiting for a worker",
+            labels=["queue"],
+        )
+        depth.add_metric(
+            ["import"],
+            ImportJob.objects.filter(status=ImportJob.Status.PENDING).count(),
+        )
+        depth.add_metric(
+            ["deletion"],
+            DeletionJob.objects.filter(
+                status=DeletionJob.Status.PENDING
+            ).count(),
+        )
+        yield depth
+
+
+_jobs = CollectorRegistry()
+_jobs.register(JobQueueCollector())
+
+
+def exposition() -> bytes:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return generate_latest(registry) + generate_latest(_jobs)
+
+
+def _on_connection_created(connection, **_: Any):
+    # The plans of core.slowqueries are taken outside of any request
+    if getattr(connection, "slow_query_explain", False):
+        return
+
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+def connect_signals():
+    connection_created.connect(_on_connection_created)
@@ -0,0 +1,297 @@
+import logging
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+from core import admission, log, metrics, profiling, routers
+from core.typing import HttpRequest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+access_logger = logging.getLogger("hercules.access")
+
+PRIMARY_COOKIE = "hercules_primary"
+REQUEST_ID_HEADER = "X-Request-ID"
+VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9-]{1,64}")
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+
+# Tags every log record of the request with an id, taken from the proxy when it
+# sends one, and writes the access log with the request timings
+class RequestIdMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        request_id = request.headers.get(REQUEST_ID_HEADER, "")
+        if not VALID_REQUEST_ID.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+
+        token = log.request_id.set(request_id)
+        view_token = log.view_name.set(None)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            response.headers[REQUEST_ID_HEADER] = request_id
+
+            match = request.resolver_match
+            access_logger.info(
+                "%s %s %s",
+                request.method,
+                request.get_full_path(),
+                response.status_code,
+                extra={
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "view": match.view_name if match else None,
+                    "duration_ms": round(
+                        (time.perf_counter() - start) * 1000, 3
+                    ),
+                },
+            )
+        finally:
+            log.request_id.reset(token)
+            log.view_name.reset(view_token)
+
+        return response
+
+    def process_view(
+        self, request: HttpRequest, view_func, view_args, view_kwargs
+    ):
+        log.view_name.set(request.resolver_match.view_name)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        token = metrics.start_request()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+        finally:
+            match = request.resolver_match
+            metrics.finish_request(
+                token,
+                match.view_name if match else None,
+                request.method,
+                status,
+                time.perf_counter() - start,
+            )
+
+        return response
+
+
+# Counts the requests in flight on every worker and turns low priority ones
+# away with a quick 503 while the workers or the database are saturated
+class AdmissionControlMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        key, request.in_flight = admission.request_started()
+        try:
+            return self.get_response(request)
+        finally:
+            admission.request_finished(key)
+
+    def process_view(
+        self, request: HttpRequest, view_func, view_args, view_kwargs
+    ):
+        if not admission.is_low_priority(request):
+            return None
+
+        reason = admission.overloaded(request.in_flight)
+        if reason is None:
+            return None
+
+        metrics.SHED_REQUESTS.labels(
+            request.resolver_match.view_name, reason
+        ).inc()
+        response = HttpResponse(status=503)
+        response.headers["Retry-After"] = str(settings.ADMISSION_RETRY_AFTER)
+        return response
+
+
+# Profiles the requests of staff members that carry a profiling token. Other
+# requests only pay for the lookup of the token.
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        token = request.GET.get(profiling.PROFILE_PARAM) or request.headers.get(
+            profiling.PROFILE_HEADER
+        )
+        if (
+            token
+            and request.user.is_staff
+            and profiling.check_token(token, request.user)
+        ):
+            return profiling.profile(request, self.get_response)
+
+        return self.get_response(request)
+
+
+class ReplicaPinMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        routers.reset()
+        if request.method not in ("GET", "HEAD", "OPTIONS"):
+            routers.pin_to_primary()
+        elif request.COOKIES.get(PRIMARY_COOKIE):
+            routers.pin_to_primary()
+
+        response = self.get_response(request)
+
+        # Keep reading from the primary for a while after a write, so the next
+        # pages never miss it because of replication lag
+        if routers.wrote_to_primary():
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+
+        routers.reset()
+        return response
+
+
+# Runs of whitespace outside these elements render the same as a single one
+PRESERVED_BLOCK = re.compile(
+    r"(<(pre|script|style|textarea)\b.*?</\2\s*>)", re.DOTALL | re.IGNORECASE
+)
+WHITESPACE = re.compile(r"\s{2,}")
+
+
+def minify_html(html: str) -> str:
+    parts = PRESERVED_BLOCK.split(html)
+
+    minified = []
+    # split() returns the text, then the two groups of each preserved block
+    for i in range(0, len(parts), 3):
+        minified.append(
+            WHITESPACE.sub(
+                lambda m: "\n" if "\n" in m.group() else " ", parts[i]
+            )
+        )
+        if i + 1 < len(parts):
+            minified.append(parts[i + 1])
+
+    return "".join(minified)
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor()
+    for chunk in sequence:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        response = self.get_response(request)
+
+        if response.has_header("Content-Encoding") or response.status_code in (
+            204,
+            304,
+        ):
+            return response
+
+        content_type = response.get("Content-Type", "")
+        is_html = content_type.startswith("text/html")
+        if not is_html and not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        accept_encoding = request.headers.get("Accept-Encoding", "")
+        encoding = None
+        # Brotli has no room for the random padding gzip gets against BREACH,
+        # so it is not used for responses that carry a CSRF token
+        if (
+            brotli is not None
+            and "br" in accept_encoding
+            and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        ):
+            encoding = "br"
+        elif "gzip" in accept_encoding:
+            encoding = "gzip"
+
+        if response.streaming:
+            if encoding is None:
+                return response
+
+            if encoding == "br":
+                response.streaming_content = _brotli_sequence(
+                    response.streaming_content
+                )
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, max_random_bytes=100
+                )
+            del response.headers["Content-Length"]
+            self.set_encoding(response, encoding)
+            return response
+
+        original_size = len(response.content)
+        if is_html:
+            charset = response.charset or "utf-8"
+            response.content = minify_html(
+                response.content.decode(charset)
+            ).encode(charset)
+
+        if encoding is not None and len(response.content) >= (
+            settings.COMPRESSION_MIN_SIZE
+        ):
+            if encoding == "br":
+                response.content = brotli.compress(response.content)
+            else:
+                response.content = compress_string(
+                    response.content, max_random_bytes=100
+                )
+            self.set_encoding(response, encoding)
+
+        response.headers["Content-Length"] = str(len(response.content))
+
+        match = request.resolver_match
+        view = match.view_name if match else metrics.UNRESOLVED
+        metrics.COMPRESSION_ORIGINAL_BYTES.labels(view).inc(original_size)
+        metrics.COMPRESSION_SAVED_BYTES.labels(view).inc(
+            original_size - len(response.content)
+        )
+
+        return response
+
+    def set_encoding(self, response, encoding: str):
+        # A compressed body is not byte for byte the same as the original
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+
+        response.headers["Content-Encoding"] = encoding
@@ -0,0 +1,175 @@
+import json
+import logging
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections, models
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from core.querycache import CachedQuerySet
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_count(queryset: models.QuerySet) -> int | None:
+    """Returns the number of rows Postgres expects the queryset to return, or
+    None where it has no estimate."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    query = queryset.query
+    try:
+        sql, params = query.get_compiler(using=queryset.db).as_sql()
+    except EmptyResultSet:
+        return 0
+
+    try:
+        with connection.cursor() as cursor:
+            # A whole table is estimated from its statistics, anything else
+            # from the plan of the query
+            if (
+                not query.where
+                and len(query.alias_map) <= 1
+                and not query.is_sliced
+            ):
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                rows = cursor.fetchone()[0]
+                # -1 until the table was first analyzed
+                return int(rows) if rows >= 0 else None
+
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+    except Exception:
+        logger.exception("Could not estimate the rows of a query")
+        return None
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+# Counts are cached like the querysets of core.querycache (with a shared cache
+# only), so they are invalidated by writes to any table they read. Rows are
+# counted up to PAGINATOR_ESTIMATE_ABOVE, bigger sets use the estimate of the
+# planner instead and the pages past it can still be reached.
+class CachedPaginator(Paginator):
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.estimated = False
+
+    def _count(self) -> int:
+        queryset = self.object_list
+        if not isinstance(queryset, models.QuerySet):
+            return len(queryset)
+
+        key = None
+        if settings.SHARED_CACHE and isinstance(queryset, CachedQuerySet):
+            if queryset._cache_ttl is None:
+                queryset = queryset.cached()
+            key = queryset._cache_key("paginator-count")
+
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                count, self.estimated = cached
+                return count
+
+        # Bounded by the limit, so a big set costs no more than a small one
+        limit = settings.PAGINATOR_ESTIMATE_ABOVE
+        count = models.QuerySet.count(queryset[:limit])
+        if count >= limit:
+            estimate = estimate_count(queryset)
+            if estimate is None:
+                count = models.QuerySet.count(queryset)
+            else:
+                count, self.estimated = max(estimate, limit), True
+
+        if key is not None:
+            cache.set(key, (count, self.estimated), queryset._cache_ttl)
+
+        return count
+
+    @cached_property
+    def count(self) -> int:
+        return self._count()
+
+    def validate_number(self, number: Any) -> int:
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if not self.estimated or int(number) < 1:
+                raise
+
+            return int(number)
+
+    def page(self, number: Any) -> Page:
+        number = self.validate_number(number)
+        if not self.estimated:
+            return super().page(number)
+
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom : bottom + self.per_page], number, self
+        )
+
+
+class HasNextPage(Page):
+    def __init__(
+        self,
+        object_list: list[Any],
+        number: int,
+        paginator: Paginator,
+        next_page: bool,
+    ):
+        super().__init__(object_list, number, paginator)
+        self.next_page = next_page
+
+    def has_next(self) -> bool:
+        return self.next_page
+
+    def start_index(self) -> int:
+        if not self.object_list:
+            return 0
+
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self) -> int:
+        return self.start_index() + len(self.object_list) - 1
+
+
+# Never counts: a page is fetched with one more row, telling if there is a next
+# one. There is no number of pages, so the navigation only goes one page ahead.
+class HasNextPaginator(Paginator):
+    count = None  # type: ignore
+    num_pages = None  # type: ignore
+
+    def validate_number(self, number: Any) -> int:
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_("That page number is not an integer"))
+
+        if number < 1:
+            raise EmptyPage(_("That page number is less than 1"))
+
+        return number
+
+    def page(self, number: Any) -> HasNextPage:
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        items = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not items and (number > 1 or not self.allow_empty_first_page):
+            raise EmptyPage(_("That page contains no results"))
+
+        return HasNextPage(
+            items[: self.per_page], number, self, len(items) > self.per_page
+        )
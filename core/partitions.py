@@ -0,0 +1,289 @@
+from datetime import date
+
+from django.apps import apps
+from django.db import connection, transaction
+
+PARTITIONED_MODELS = ["issues.History", "users.Notification"]
+PARTITION_COLUMN = "created_at"
+ARCHIVE_SCHEMA = "archive"
+
+# Replaces an existing table with a copy partitioned by month. Postgres does
+# not allow identity columns on partitioned tables, so the id switches to a
+# plain sequence owned by the column, and the primary key must include the
+# partition column. Foreign keys and indexes are recreated from the old table.
+CONVERT_SQL = """
+DO $$
+DECLARE
+    constraint_row record;
+    definitions text[];
+    definition text;
+    first_month date;
+    last_month date;
+    partition_month date;
+BEGIN
+    FOR constraint_row IN
+        SELECT conname FROM pg_constraint
+        WHERE conrelid = '{table}'::regclass AND contype = 'p'
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE {table} RENAME CONSTRAINT %I TO %I',
+            constraint_row.conname,
+            constraint_row.conname || '_old'
+        );
+    END LOOP;
+
+    ALTER TABLE {table} RENAME TO {table}_old;
+    ALTER TABLE {table}_old ALTER COLUMN id DROP IDENTITY IF EXISTS;
+    ALTER TABLE {table}_old ALTER COLUMN id DROP DEFAULT;
+    DROP SEQUENCE IF EXISTS {table}_id_seq;
+
+    SELECT array_agg(pg_get_indexdef(indexrelid)) INTO definitions
+    FROM pg_index
+    WHERE indrelid = '{table}_old'::regclass AND NOT indisprimary;
+
+    CREATE SEQUENCE {table}_id_seq;
+    CREATE TABLE {table} (
+        LIKE {table}_old INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+    ) PARTITION BY RANGE ({column});
+    ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq');
+    ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id;
+    ALTER TABLE {table} ADD PRIMARY KEY (id, {column});
+
+    FOR constraint_row IN
+        SELECT conname, pg_get_constraintdef(oid) AS definition
+        FROM pg_constraint
+        WHERE conrelid = '{table}_old'::regclass AND contype = 'f'
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE {table} ADD CONSTRAINT %I %s',
+            constraint_row.conname,
+            constraint_row.definition
+        );
+    END LOOP;
+
+    SELECT
+        date_trunc('month', MIN({column}) AT TIME ZONE 'UTC')::date,
+        date_trunc('month', NOW() AT TIME ZONE 'UTC')::date
+    INTO first_month, last_month
+    FROM {table}_old;
+    first_month := LEAST(COALESCE(first_month, last_month), last_month);
+    last_month := (last_month + interval '{months_ahead} months')::date;
+
+    partition_month := first_month;
+    WHILE partition_month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+            '{table}_p' || to_char(partition_month, 'YYYYMM'),
+            to_char(partition_month, 'YYYY-MM-DD') || ' 00:00:00+00',
+            to_char(partition_month + interval '1 month', 'YYYY-MM-DD') || ' 00:00:00+00'
+        );
+        partition_month := (partition_month + interval '1 month')::date;
+    END LOOP;
+    CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;
+
+    INSERT INTO {table} SELECT * FROM {table}_old;
+    PERFORM setval(
+        '{table}_id_seq',
+        COALESCE((SELECT MAX(id) FROM {table}), 0) + 1,
+        false
+    );
+    DROP TABLE {table}_old;
+
+    FOREACH definition IN ARRAY COALESCE(definitions, ARRAY[]::text[]) LOOP
+        EXECUTE regexp_replace(
+            definition,
+            ' ON (ONLY )?(\\S+\\.)?{table}_old ',
+            ' ON {table} '
+        );
+    END LOOP;
+END
+$$;
+"""
+
+
+# Turns the partitioned table back into a plain one, with the identity id and
+# primary key Django creates. Partitions in the archive schema are left alone.
+REVERT_SQL = """
+DO $$
+DECLARE
+    constraint_row record;
+    definitions text[];
+    definition text;
+BEGIN
+    ALTER TABLE {table} RENAME TO {table}_partitioned;
+    ALTER TABLE {table}_partitioned
+        RENAME CONSTRAINT {table}_pkey TO {table}_partitioned_pkey;
+
+    SELECT array_agg(pg_get_indexdef(indexrelid)) INTO definitions
+    FROM pg_index
+    WHERE indrelid = '{table}_partitioned'::regclass AND NOT indisprimary;
+
+    CREATE TABLE {table} (
+        LIKE {table}_partitioned INCLUDING CONSTRAINTS
+    );
+    INSERT INTO {table} SELECT * FROM {table}_partitioned;
+
+    FOR constraint_row IN
+        SELECT conname, pg_get_constraintdef(oid) AS definition
+        FROM pg_constraint
+        WHERE conrelid = '{table}_partitioned'::regclass AND contype = 'f'
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE {table} ADD CONSTRAINT %I %s',
+            constraint_row.conname,
+            constraint_row.definition
+        );
+    END LOOP;
+
+    -- Also drops the partitions and the sequence owned by the id
+    DROP TABLE {table}_partitioned CASCADE;
+
+    ALTER TABLE {table} ADD PRIMARY KEY (id);
+    ALTER TABLE {table} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY;
+    PERFORM setval(
+        pg_get_serial_sequence('{table}', 'id'),
+        COALESCE((SELECT MAX(id) FROM {table}), 0) + 1,
+        false
+    );
+
+    FOREACH definition IN ARRAY COALESCE(definitions, ARRAY[]::text[]) LOOP
+        EXECUTE regexp_replace(
+            definition,
+            ' ON (ONLY )?(\\S+\\.)?{table}_partitioned ',
+            ' ON {table} '
+        );
+    END LOOP;
+END
+$$;
+"""
+
+
+def convert_to_partitioned_sql(table: str, months_ahead: int = 3) -> str:
+    return CONVERT_SQL.format(
+        table=table,
+        column=PARTITION_COLUMN,
+        months_ahead=months_ahead,
+    )
+
+
+def revert_partitioned_sql(table: str) -> str:
+    return REVERT_SQL.format(table=table)
+
+
+def partitioned_tables() -> list[str]:
+    return [
+        apps.get_model(model)._meta.db_table for model in PARTITIONED_MODELS
+    ]
+
+
+def add_months(month: date, months: int) -> date:
+    year, month_index = divmod(month.month - 1 + months, 12)
+    return date(month.year + year, month_index + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _bound(month: date) -> str:
+    return f"{month:%Y-%m-%d} 00:00:00+00"
+
+
+def list_partitions(table: str) -> dict[str, date | None]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions: dict[str, date | None] = {}
+    for name in names:
+        suffix = name.removeprefix(f"{table}_p")
+        if suffix != name and len(suffix) == 6 and suffix.isdigit():
+            partitions[name] = date(int(suffix[:4]), int(suffix[4:]), 1)
+        else:
+            partitions[name] = None
+
+    return partitions
+
+
+def create_partition(table: str, month: date) -> bool:
+    name = partition_name(table, month)
+    if name in list_partitions(table):
+        return False
+
+    quote = connection.ops.quote_name
+    start, end = _bound(month), _bound(add_months(month, 1))
+    default = quote(f"{table}_default")
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Rows that landed in the default partition for this month must be
+        # moved, otherwise Postgres refuses to create the new partition.
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {default} "
+            f"WHERE {PARTITION_COLUMN} >= %s AND {PARTITION_COLUMN} < %s)",
+            [start, end],
+        )
+        move_rows = cursor.fetchone()[0]
+
+        if move_rows:
+            cursor.execute(
+                f"ALTER TABLE {quote(table)} DETACH PARTITION {default}"
+            )
+
+        cursor.execute(
+            f"CREATE TABLE {quote(name)} PARTITION OF {quote(table)} "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+
+        if move_rows:
+            cursor.execute(
+                f"INSERT INTO {quote(table)} SELECT * FROM {default} "
+                f"WHERE {PARTITION_COLUMN} >= %s AND {PARTITION_COLUMN} < %s",
+                [start, end],
+            )
+            cursor.execute(
+                f"DELETE FROM {default} "
+                f"WHERE {PARTITION_COLUMN} >= %s AND {PARTITION_COLUMN} < %s",
+                [start, end],
+            )
+            cursor.execute(
+                f"ALTER TABLE {quote(table)} ATTACH PARTITION {default} DEFAULT"
+            )
+
+    return True
+
+
+# Rows matching keep (an SQL condition) are moved back into the table first,
+# where they land in the default partition as their month no longer has one
+def detach_partition(
+    table: str, name: str, archive: bool = False, keep: str | None = None
+):
+    quote = connection.ops.quote_name
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}"
+        )
+
+        if keep is not None:
+            cursor.execute(
+                f"INSERT INTO {quote(table)} "
+                f"SELECT * FROM {quote(name)} WHERE {keep}"
+            )
+            cursor.execute(f"DELETE FROM {quote(name)} WHERE {keep}")
+
+        if archive:
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+            cursor.execute(
+                f"ALTER TABLE {quote(name)} SET SCHEMA {ARCHIVE_SCHEMA}"
+            )
+        else:
+            cursor.execute(f"DROP TABLE {quote(name)}")
@@ -0,0 +1,217 @@
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.utils import timezone
+
+from core import log
+from core.typing import HttpRequest
+from users.models import User
+
+# A request is profiled when it carries a token from make_token in this query
+# parameter or header, and the token belongs to the staff user making it
+PROFILE_PARAM = "_profile"
+PROFILE_HEADER = "X-Hercules-Profile"
+SALT = "hercules.profile"
+
+SAMPLE_INTERVAL = 0.001
+NAME = re.compile(r"\d{8}-\d{6}-[0-9a-f]{8}")
+
+
+def make_token(user: User) -> str:
+    return signing.TimestampSigner(salt=SALT).sign(str(user.pk))
+
+
+def check_token(token: str, user: User) -> bool:
+    try:
+        value = signing.TimestampSigner(salt=SALT).unsign(
+            token, max_age=settings.PROFILE_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+
+    return value == str(user.pk)
+
+
+@lru_cache(maxsize=4096)
+def _frame_name(code) -> str:
+    filename = code.co_filename
+    base_dir = str(settings.BASE_DIR)
+    if filename.startswith(base_dir):
+        filename = filename[len(base_dir) + 1 :]
+    elif "site-packages/" in filename:
+        filename = filename.rsplit("site-packages/", 1)[1]
+
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(
+        ";", ","
+    )
+
+
+# Samples the stack of one thread at a fixed interval, counting each distinct
+# stack in the collapsed format used by flame graph tools
+class Sampler(threading.Thread):
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name="request-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+class QueryLog:
+    def __init__(self):
+        self.queries: list[dict[str, Any]] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {
+                    "alias": context["connection"].alias,
+                    "sql": sql,
+                    "many": many,
+                    "duration_ms": round(
+                        (time.perf_counter() - start) * 1000, 3
+                    ),
+                }
+            )
+
+
+def profile(request: HttpRequest, get_response: Callable):
+    sampler = Sampler(threading.get_ident())
+    queries = QueryLog()
+    started_at = timezone.now()
+    start = time.perf_counter()
+
+    # The sampler can only look at the stack when it holds the GIL, so it is
+    # handed over as often as samples are taken while the request runs
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(SAMPLE_INTERVAL / 2)
+    sampler.start()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+
+            response = get_response(request)
+    finally:
+        sampler.stop()
+        sys.setswitchinterval(switch_interval)
+
+    duration = time.perf_counter() - start
+    match = request.resolver_match
+    query = request.GET.copy()
+    query.pop(PROFILE_PARAM, None)
+    path = request.path
+    if query:
+        path = f"{path}?{query.urlencode()}"
+
+    save(
+        {
+            "url_name": match.view_name if match else None,
+            "method": request.method,
+            "path": path,
+            "status": response.status_code,
+            "user": request.user.username,
+            "request_id": log.request_id.get(),
+            "started_at": started_at.isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "interval_ms": SAMPLE_INTERVAL * 1000,
+            "samples": sum(sampler.stacks.values()),
+            "query_count": len(queries.queries),
+            "query_ms": round(
+                sum(query["duration_ms"] for query in queries.queries), 3
+            ),
+            "queries": queries.queries,
+        },
+        sampler.collapsed(),
+    )
+
+    return response
+
+
+def profiles_dir() -> Path:
+    return Path(settings.PROFILES_DIR)
+
+
+def save(data: dict[str, Any], collapsed: str):
+    directory = profiles_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    name = f"{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+    (directory / f"{name}.folded").write_text(collapsed)
+    (directory / f"{name}.json").write_text(json.dumps(data))
+
+    for old in sorted(directory.glob("*.json"))[: -settings.PROFILES_KEEP]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".folded").unlink(missing_ok=True)
+
+
+def load(name: str) -> dict[str, Any] | None:
+    path = profiles_dir() / f"{name}.json"
+    if not NAME.fullmatch(name) or not path.is_file():
+        return None
+
+    data = json.loads(path.read_text())
+    data["name"] = name
+    return data
+
+
+def recent(url_name: str | None = None) -> list[dict[str, Any]]:
+    profiles = []
+    for path in sorted(profiles_dir().glob("*.json"), reverse=True):
+        data = json.loads(path.read_text())
+        if url_name and data["url_name"] != url_name:
+            continue
+
+        data["name"] = path.stem
+        del data["queries"]
+        profiles.append(data)
+
+    return profiles
+
+
+def self_samples(name: str, limit: int = 30) -> list[tuple[str, int]]:
+    path = profiles_dir() / f"{name}.folded"
+    if not NAME.fullmatch(name) or not path.is_file():
+        return []
+
+    counts: Counter[str] = Counter()
+    for line in path.read_text().splitlines():
+        stack, _, count = line.rpartition(" ")
+        counts[stack.rsplit(";", 1)[-1]] += int(count)
+
+    return counts.most_common(limit)
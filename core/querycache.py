@@ -0,0 +1,248 @@
+import hashlib
+import logging
+import re
+import time
+from functools import cache as memoize
+from typing import Any
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+# Models whose writes invalidate cached querysets. A cached queryset that reads
+# from any other table is not cached at all, as nothing would invalidate it.
+TRACKED_MODELS = [
+    "issues.Issue",
+    "projects.Project",
+    "projects.ProjectMember",
+    "projects.Team",
+    "projects.TeamMember",
+    "users.User",
+]
+
+# Querysets of these models that only read the rows of one value of the foreign
+# key can be cached with that value as scope, so writes to rows of other values
+# don't drop them, e.g. the issues of one project. Rows never move to another.
+SCOPE_FIELDS = {
+    "issues.Issue": "project",
+}
+# Writes that don't tell their scope, like bulk updates, drop every scope
+ALL_SCOPES = "*"
+
+VERSION_PREFIX = "querycache:version:"
+RESULT_PREFIX = "querycache:result:"
+QUOTED_NAME = re.compile(r'"([^"]+)"')
+
+
+def _version_key(model: type[models.Model], scope: Any = None) -> str:
+    if scope is None:
+        return f"{VERSION_PREFIX}{model._meta.label_lower}"
+
+    return f"{VERSION_PREFIX}{model._meta.label_lower}:{scope}"
+
+
+def _scope_field(model: type[models.Model]) -> str | None:
+    return SCOPE_FIELDS.get(model._meta.label)
+
+
+@memoize
+def tracked_models() -> set[type[models.Model]]:
+    return {apps.get_model(label) for label in TRACKED_MODELS}
+
+
+@memoize
+def models_by_table() -> dict[str, type[models.Model]]:
+    return {model._meta.db_table: model for model in apps.get_models()}
+
+
+def get_versions(keys: list[str]) -> list[int]:
+    versions = cache.get_many(keys)
+
+    # A missing version starts from the current time instead of 0, so entries
+    # cached before the version was evicted can never match again
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns())
+            versions[key] = cache.get(key)
+
+    return [versions[key] for key in keys]
+
+
+def bump_version(model: type[models.Model], scope: Any = None):
+    keys = [_version_key(model)]
+    if _scope_field(model) is not None:
+        keys.append(_version_key(model, ALL_SCOPES if scope is None else scope))
+
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns())
+
+
+def invalidate(model: type[models.Model], scope: Any = None):
+    """Drops the cached querysets reading the model once the transaction
+    commits. With a scope, those cached for other scopes are kept."""
+    if not settings.SHARED_CACHE:
+        return
+
+    transaction.on_commit(lambda: bump_version(model, scope))
+
+
+def _on_change(sender: type[models.Model], instance: models.Model, **_: Any):
+    field = _scope_field(sender)
+    if field is None:
+        invalidate(sender)
+    else:
+        invalidate(sender, getattr(instance, f"{field}_id"))
+
+
+def connect_signals():
+    for model in tracked_models():
+        post_save.connect(_on_change, sender=model, weak=False)
+        post_delete.connect(_on_change, sender=model, weak=False)
+
+
+class CachedQuerySet(models.QuerySet):
+    _cache_ttl: int | None = None
+    _cache_scope: Any = None
+
+    def cached(self, ttl: int | None = None, scope: Any = None):
+        """Caches the rows and counts of the queryset until a write to one of
+        its tables, without a shared cache it is not cached. A scope (see
+        SCOPE_FIELDS) must only be given when the queryset filters on it."""
+        if not settings.SHARED_CACHE:
+            return self._chain()
+
+        # Versions are bumped once a write is committed on the primary. A
+        # replica may not have it yet, and rows read from it would be cached
+        # under the new version.
+        clone = self.using(self._db or DEFAULT_DB_ALIAS)
+        clone._cache_ttl = ttl or settings.QUERYCACHE_TTL
+        clone._cache_scope = scope
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._cache_ttl = self._cache_ttl
+        clone._cache_scope = self._cache_scope
+        return clone
+
+    def _version_keys(self, dependencies: list[type[models.Model]]):
+        keys = []
+        for model in dependencies:
+            if (
+                model is self.model
+                and self._cache_scope is not None
+                and _scope_field(model) is not None
+            ):
+                keys.append(_version_key(model, ALL_SCOPES))
+                keys.append(_version_key(model, self._cache_scope))
+            else:
+                keys.append(_version_key(model))
+
+        return keys
+
+    def _dependencies(self, sql: str) -> list[type[models.Model]] | None:
+        tables = models_by_table()
+        dependencies = {
+            tables[name] for name in QUOTED_NAME.findall(sql) if name in tables
+        }
+        for lookup in self._prefetch_related_lookups:
+            if (
+                isinstance(lookup, models.Prefetch)
+                and lookup.queryset is not None
+            ):
+                dependencies.add(lookup.queryset.model)
+            else:
+                # Prefetches without a queryset are not tracked
+                return None
+
+        if not dependencies <= tracked_models():
+            return None
+
+        return sorted(dependencies, key=lambda model: model._meta.label_lower)
+
+    def _cache_key(self, kind: str) -> str | None:
+        if self._cache_ttl is None or self.query.select_for_update:
+            return None
+
+        try:
+            sql, params = self.query.get_compiler(using=self.db).as_sql()
+        except EmptyResultSet:
+            return None
+
+        dependencies = self._dependencies(sql)
+        if dependencies is None:
+            logger.debug("Not caching a query on untracked models: %s", sql)
+            return None
+
+        versions = get_versions(self._version_keys(dependencies))
+        digest = hashlib.sha1(
+            repr(
+                (
+                    kind,
+                    self.db,
+                    sql,
+                    params,
+                    self._iterable_class.__name__,
+                    versions,
+                )
+            ).encode()
+        ).hexdigest()
+
+        return f"{RESULT_PREFIX}{digest}"
+
+    def _fetch_all(self):
+        if self._result_cache is not None:
+            return super()._fetch_all()
+
+        key = self._cache_key("rows")
+        if key is None:
+            return super()._fetch_all()
+
+        result = cache.get(key)
+        if result is not None:
+            self._result_cache = result
+            self._prefetch_done = True
+            return
+
+        super()._fetch_all()
+        cache.set(key, self._result_cache, self._cache_ttl)
+
+    def count(self) -> int:
+        if self._result_cache is not None:
+            return len(self._result_cache)
+
+        key = self._cache_key("count")
+        if key is None:
+            return super().count()
+
+        count = cache.get(key)
+        if count is None:
+            count = super().count()
+            cache.set(key, count, self._cache_ttl)
+
+        return count
+
+    # Bulk writes do not send the model signals
+
+    def update(self, **kwargs: Any) -> int:
+        rows = super().update(**kwargs)
+        invalidate(self.model)
+        return rows
+
+    def bulk_create(self, *args: Any, **kwargs: Any):
+        result = super().bulk_create(*args, **kwargs)
+        invalidate(self.model)
+        return result
+
+    def bulk_update(self, *args: Any, **kwargs: Any):
+        rows = super().bulk_update(*args, **kwargs)
+        invalidate(self.model)
+        return rows
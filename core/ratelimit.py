@@ -0,0 +1,128 @@
+import logging
+import math
+import threading
+import time
+from functools import wraps
+from typing import Callable
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from core.typing import HttpRequest
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ratelimit:"
+MEMORY_MAX_BUCKETS = 10000
+
+# Refills the bucket for the time since the last call, then takes a token if
+# there is one. Returns whether a token was taken and the tokens left.
+TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "at")
+local tokens = tonumber(bucket[1]) or burst
+local at = tonumber(bucket[2]) or now
+
+tokens = math.min(burst, tokens + math.max(0, now - at) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "at", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+_script = None
+_memory: dict[str, tuple[float, float]] = {}
+_memory_lock = threading.Lock()
+
+
+def _redis_script():
+    global _script
+
+    if _script is None:
+        import redis
+
+        client = redis.Redis.from_url(settings.RATE_LIMIT_REDIS_URL)
+        _script = client.register_script(TOKEN_BUCKET)
+
+    return _script
+
+
+def _take_redis(key: str, rate: float, burst: int) -> tuple[bool, float]:
+    allowed, tokens = _redis_script()(
+        keys=[key], args=[rate, burst, time.time()]
+    )
+    return bool(allowed), float(tokens)
+
+
+# Per process buckets, used without Redis or while it can't be reached
+def _take_memory(key: str, rate: float, burst: int) -> tuple[bool, float]:
+    now = time.monotonic()
+    with _memory_lock:
+        tokens, at = _memory.get(key, (burst, now))
+        tokens = min(burst, tokens + max(0.0, now - at) * rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        if key not in _memory and len(_memory) >= MEMORY_MAX_BUCKETS:
+            _memory.clear()
+        _memory[key] = (tokens, now)
+
+    return allowed, tokens
+
+
+def take(key: str, rate: float, burst: int) -> tuple[bool, float]:
+    """Takes a token from the bucket, returning whether there was one and how
+    many seconds until the next one otherwise."""
+    key = f"{KEY_PREFIX}{key}"
+
+    if settings.RATE_LIMIT_REDIS_URL:
+        try:
+            allowed, tokens = _take_redis(key, rate, burst)
+        except Exception:
+            logger.exception("Rate limiting falls back to memory")
+            allowed, tokens = _take_memory(key, rate, burst)
+    else:
+        allowed, tokens = _take_memory(key, rate, burst)
+
+    return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+def rate_limit(scope: str, when: Callable[[HttpRequest], bool] | None = None):
+    """Limits each user to the rate and burst of RATE_LIMITS[scope] requests
+    per view, answering the others with a 429. With when, only the requests
+    it returns True for are limited."""
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapper_view(request: HttpRequest, *args, **kwargs):
+            if when is not None and not when(request):
+                return view_func(request, *args, **kwargs)
+
+            limit = settings.RATE_LIMITS[scope]
+            view_name = request.resolver_match.view_name
+            user = request.user.pk if request.user.is_authenticated else None
+            client = user or request.META.get("REMOTE_ADDR")
+
+            allowed, retry_after = take(
+                f"{scope}:{view_name}:{client}", limit["rate"], limit["burst"]
+            )
+            if allowed:
+                return view_func(request, *args, **kwargs)
+
+            response = HttpResponse(status=429)
+            response.headers["Retry-After"] = str(math.ceil(retry_after))
+            return response
+
+        return _wrapper_view
+
+    return decorator
@@ -0,0 +1,53 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = "default"
+
+# Reads go to the primary while pinned. Writing pins the rest of the request
+# (or command), so it always sees its own writes
+_pinned: ContextVar[bool] = ContextVar("pinned_to_primary", default=False)
+_wrote: ContextVar[bool] = ContextVar("wrote_to_primary", default=False)
+
+
+def replicas() -> list[str]:
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+def pin_to_primary():
+    _pinned.set(True)
+
+
+def wrote_to_primary() -> bool:
+    return _wrote.get()
+
+
+def reset():
+    _pinned.set(False)
+    _wrote.set(False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if not aliases or _pinned.get():
+            return PRIMARY
+
+        # Reads inside a transaction must see the rows it already changed
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        _wrote.set(True)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
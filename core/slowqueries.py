@@ -0,0 +1,289 @@
+import fcntl
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import date
+from typing import Any
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+from django.utils import timezone
+
+from core import log
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIX = "EXPLAIN "
+ANALYZE_PREFIX = "EXPLAIN (ANALYZE, BUFFERS) "
+EXPLAINABLE = re.compile(
+    r"\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b", re.IGNORECASE
+)
+READ_ONLY = re.compile(r"\s*(SELECT|WITH)\b", re.IGNORECASE)
+# Anything that writes, locks rows or has side effects a rollback doesn't undo,
+# anywhere in the statement (a data-modifying CTE, a locking clause)
+SIDE_EFFECTS = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|MERGE|INTO)\b"
+    r"|\bFOR\s+(NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b"
+    r"|\b(nextval|setval|pg_advisory_\w+)\s*\(",
+    re.IGNORECASE,
+)
+PLACEHOLDER_LIST = re.compile(r"%s(, %s)+")
+
+# Set while recording, so the queries it may cause are not recorded
+_recording: ContextVar[bool] = ContextVar("slow_query_recording", default=False)
+
+_explainer: ThreadPoolExecutor | None = None
+_explainer_pid: int | None = None
+_explainer_lock = threading.Lock()
+
+
+def fingerprint(sql: str) -> str:
+    # IN lists of different sizes are still the same query
+    return PLACEHOLDER_LIST.sub("%s, ...", sql)
+
+
+def redact(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, date):
+        return value.isoformat()
+
+    return f"<{type(value).__name__}>"
+
+
+# The innermost template being rendered and the innermost frame of the project
+# itself (not Django, a library or this module) that made the query
+def origin() -> tuple[str | None, str | None]:
+    template = None
+    location = None
+    base_dir = str(settings.BASE_DIR)
+
+    frame = sys._getframe(2)
+    while frame is not None and (template is None or location is None):
+        code = frame.f_code
+        if template is None and code.co_name == "render":
+            instance = frame.f_locals.get("self")
+            if isinstance(instance, Template) and instance.origin:
+                template = instance.origin.template_name
+
+        filename = code.co_filename
+        if (
+            location is None
+            and filename.startswith(base_dir)
+            and filename != __file__
+            and "site-packages" not in filename
+        ):
+            location = (
+                f"{filename[len(base_dir) + 1 :]}:{frame.f_lineno} "
+                f"({code.co_name})"
+            )
+
+        frame = frame.f_back
+
+    return template, location
+
+
+def _merge(lines: list[str]) -> list[dict[str, Any]]:
+    # Plans are appended as lines of their own once taken
+    found: dict[str, dict[str, Any]] = {}
+    for line in lines:
+        try:
+            item = json.loads(line)
+        except ValueError:
+            continue
+
+        if "sql" in item:
+            found[item["id"]] = item
+        elif item.get("id") in found:
+            found[item["id"]]["plan"] = item["plan"]
+
+    return list(found.values())[-settings.SLOW_QUERY_BUFFER :]
+
+
+def entries() -> list[dict[str, Any]]:
+    try:
+        with open(settings.SLOW_QUERY_FILE, encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            return _merge(f.readlines())
+    except FileNotFoundError:
+        return []
+
+
+def _append(item: dict[str, Any]):
+    # Every process appends to the same file under a lock, and the one that
+    # finds it past twice the buffer rewrites it with the last entries
+    try:
+        with open(settings.SLOW_QUERY_FILE, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.write(json.dumps(item, default=str) + "\n")
+            f.flush()
+
+            f.seek(0)
+            lines = f.readlines()
+            if len(lines) > settings.SLOW_QUERY_BUFFER * 2:
+                f.truncate(0)
+                f.writelines(
+                    json.dumps(entry, default=str) + "\n"
+                    for entry in _merge(lines)
+                )
+    except Exception:
+        logger.exception("Could not update the slow query buffer")
+
+
+def clear():
+    try:
+        with open(settings.SLOW_QUERY_FILE, "r+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.truncate(0)
+    except FileNotFoundError:
+        pass
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _explainer, _explainer_pid
+
+    # Threads don't survive the fork of the gunicorn workers
+    if _explainer_pid != os.getpid():
+        with _explainer_lock:
+            if _explainer_pid != os.getpid():
+                _explainer = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="slow-query-explain"
+                )
+                _explainer_pid = os.getpid()
+
+    return _explainer  # type: ignore
+
+
+_explain_connections = threading.local()
+
+
+def _explain_connection(alias: str):
+    # A connection of its own, so the plan is never taken inside the
+    # transaction of the request and never recorded itself
+    existing = getattr(_explain_connections, alias, None)
+    if existing is None:
+        existing = connections.create_connection(alias)
+        existing.slow_query_explain = True
+        setattr(_explain_connections, alias, existing)
+
+    return existing
+
+
+def explain_prefix(sql: str) -> str | None:
+    """Returns how the statement can be explained: with ANALYZE only when
+    running it again is harmless, else without running it, or None."""
+    if not EXPLAINABLE.match(sql):
+        return None
+
+    if READ_ONLY.match(sql) and not SIDE_EFFECTS.search(sql):
+        return ANALYZE_PREFIX
+
+    return EXPLAIN_PREFIX
+
+
+def explain(entry_id: str, alias: str, sql: str, params: Any, prefix: str):
+    connection = _explain_connection(alias)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("BEGIN")
+            try:
+                cursor.execute(
+                    "SET LOCAL statement_timeout = %s",
+                    [settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS],
+                )
+                cursor.execute(prefix + sql, params)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.execute("ROLLBACK")
+    except Exception as e:
+        connection.close()
+        plan = f"EXPLAIN failed: {e!r}"
+
+    _append({"id": entry_id, "plan": plan})
+
+
+def record(alias: str, sql: str, params: Any, duration_ms: float):
+    template, location = origin()
+    entry = {
+        "id": uuid.uuid4().hex,
+        "at": timezone.now().isoformat(),
+        "alias": alias,
+        "duration_ms": round(duration_ms, 3),
+        "sql": sql,
+        "fingerprint": fingerprint(sql),
+        "params": redact(params),
+        "view": log.view_name.get(),
+        "request_id": log.request_id.get(),
+        "template": template,
+        "location": location,
+        "plan": None,
+    }
+
+    logger.warning(
+        "Slow query (%.1f ms) in %s: %s",
+        duration_ms,
+        entry["view"] or location,
+        sql,
+        extra={
+            key: entry[key]
+            for key in ["alias", "duration_ms", "template", "location"]
+        },
+    )
+
+    _append(entry)
+
+    prefix = explain_prefix(sql)
+    if (
+        prefix is not None
+        and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+    ):
+        # The statement may run again, so it happens off the request thread
+        _executor().submit(explain, entry["id"], alias, sql, params, prefix)
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms >= settings.SLOW_QUERY_MS and not _recording.get():
+            token = _recording.set(True)
+            try:
+                record(
+                    context["connection"].alias,
+                    sql,
+                    None if many else params,
+                    duration_ms,
+                )
+            except Exception:
+                logger.exception("Could not record a slow query")
+            finally:
+                _recording.reset(token)
+
+
+def _on_connection_created(connection, **_: Any):
+    if getattr(connection, "slow_query_explain", False):
+        return
+
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
+
+
+def connect_signals():
+    if settings.SLOW_QUERY_MS is not None:
+        connection_created.connect(_on_connection_created)
@@ -47,3 +47,32 @@ document.body.addEventListener("form:hideModal", function(evt) {
 
     dialog.close();
 });
+
+// Polling elements marked with data-backoff skip their requests for a while
+// when the server is shedding load or rate limiting them, doubling the wait on
+// every refusal
+const maxBackoffSeconds = 600;
+
+document.body.addEventListener("htmx:beforeRequest", function(evt) {
+    const element = evt.detail.elt;
+    if (!element.hasAttribute("data-backoff")) return;
+
+    const until = Number(element.dataset.backoffUntil || 0);
+    if (Date.now() < until) {
+        evt.preventDefault();
+    }
+});
+
+document.body.addEventListener("htmx:responseError", function(evt) {
+    const element = evt.detail.elt;
+    const xhr = evt.detail.xhr;
+    if (!element.hasAttribute("data-backoff")) return;
+    if (xhr.status !== 503 && xhr.status !== 429) return;
+
+    const retryAfter = Number(xhr.getResponseHeader("Retry-After")) || 30;
+    const previous = Number(element.dataset.backoffSeconds || 0);
+    const seconds = Math.min(Math.max(retryAfter, previous * 2), maxBackoffSeconds);
+
+    element.dataset.backoffSeconds = seconds;
+    element.dataset.backoffUntil = Date.now() + seconds * 1000;
+});
@@ -0,0 +1,69 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".css",
+    ".js",
+    ".json",
+    ".map",
+    ".svg",
+    ".txt",
+    ".webmanifest",
+    ".xml",
+}
+MIN_SIZE = 256
+
+
+# Fingerprints the collected files and writes .gz (and .br, when the brotli
+# package is installed) siblings next to them, so they can be served
+# precompressed with far-future cache headers.
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # Files missing from the manifest (collected before they were added) fall
+    # back to their plain names instead of failing the page
+    manifest_strict = False
+    # The vendored scripts point to source maps that are not shipped, so only
+    # the references inside stylesheets are rewritten
+    patterns = tuple(
+        (extension, rules)
+        for extension, rules in ManifestStaticFilesStorage.patterns
+        if extension == "*.css"
+    )
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+
+        if dry_run:
+            return
+
+        for name in self.hashed_files.values():
+            if os.path.splitext(name)[1] not in COMPRESSIBLE_EXTENSIONS:
+                continue
+
+            path = self.path(name)
+            with open(path, "rb") as f:
+                content = f.read()
+            if len(content) < MIN_SIZE:
+                continue
+
+            self._write_compressed(
+                f"{path}.gz", gzip.compress(content, 9, mtime=0), content
+            )
+            if brotli is not None:
+                self._write_compressed(
+                    f"{path}.br", brotli.compress(content), content
+                )
+
+    def _write_compressed(self, path: str, compressed: bytes, content: bytes):
+        # Not worth serving when it barely saves anything
+        if len(compressed) >= len(content) * 0.95:
+            return
+
+        with open(path, "wb") as f:
+            f.write(compressed)
@@ -1,3 +1,688 @@
-from django.test import TestCase
+import re
+import time
+import uuid
+from typing import Any
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.core.paginator import EmptyPage
+from django.db.models import QuerySet
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import override_settings
+from django.urls import resolve, reverse
+
+from core import admission, paginator, querycache, ratelimit, slowqueries
+from core.cache import CLEAR_ALL, TieredCache, _Process
+from issues.models import History, Issue
+from projects.models import Project, ProjectMember, Team
+from users.models import Notification, NotificationType, User
+
+
+# The dataset is large enough for the planner to prefer an index on its own,
+# and each query must use the index added for it, not just any index (the
+# foreign keys have their own).
+class HotQueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create(
+            [User(username=f"user-{i}") for i in range(200)]
+        )
+        projects = Project.objects.bulk_create(
+            [Project(name=f"Project {i}") for i in range(100)]
+        )
+        ProjectMember.objects.bulk_create(
+            [
+                ProjectMember(
+                    project=project,
+                    user=user,
+                    accepted=(i + j) % 3 != 0,
+                    rejected=(i + j) % 7 == 0,
+                )
+                for i, project in enumerate(projects)
+                for j, user in enumerate(users)
+            ]
+        )
+        issues = Issue.objects.bulk_create(
+            [
+                Issue(
+                    project=project,
+                    number=number,
+                    created_by=users[number % len(users)],
+                    title=f"Issue {number}",
+                )
+                for project in projects
+                for number in range(1, 21)
+            ]
+        )
+        History.objects.bulk_create(
+            [
+                History(
+                    issue=issue,
+                    user=users[i % len(users)],
+                    type=History.Type.STATUS,
+                    status=Issue.Status.OPEN,
+                )
+                for issue in issues
+                for i in range(10)
+            ]
+        )
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user=user,
+                    notification_type=NotificationType.PROJECT_INVITATION,
+                    read=i % 4 != 0,
+                )
+                for user in users
+                for i in range(100)
+            ]
+        )
+
+        cls.user = users[0]
+        cls.project = projects[0]
+        cls.issue = issues[0]
+
+        with connection.cursor() as cursor:
+            for model in [Notification, History, ProjectMember]:
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def index_names(self, index: str) -> set[str]:
+        # On a partitioned table the plan names the index of each partition
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = %s::regclass",
+                [index],
+            )
+            return {index} | {row[0] for row in cursor.fetchall()}
+
+    def assertUsesIndex(self, queryset: QuerySet, index: str):
+        plan = queryset.explain()
+        used = any(
+            re.search(rf"\b(using|on) {re.escape(name)}\b", plan)
+            for name in self.index_names(index)
+        )
+        self.assertTrue(used, f"{index} is not used:\n{plan}")
+
+    def test_unread_notification_count(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(user=self.user, read=False).values(
+                "pk"
+            ),
+            "notification_unread_idx",
+        )
+
+    def test_notification_list(self):
+        notifications = Notification.objects.filter(user=self.user)
+        self.assertUsesIndex(
+            notifications.order_by("-created_at")[:5],
+            "notification_user_created_idx",
+        )
+
+    def test_issue_history(self):
+        self.assertUsesIndex(
+            History.objects.filter(issue=self.issue).order_by("created_at"),
+            "history_issue_created_idx",
+        )
+
+    def test_user_projects(self):
+        self.assertUsesIndex(
+            ProjectMember.objects.filter(
+                user=self.user, accepted=True, rejected=False
+            ),
+            "member_accepted_user_idx",
+        )
+
+    def test_project_members(self):
+        self.assertUsesIndex(
+            ProjectMember.objects.filter(
+                project=self.project, accepted=True, rejected=False
+            ),
+            "member_accepted_project_idx",
+        )
+
+
+class ExplainPrefixTests(SimpleTestCase):
+    def test_read_only_selects_are_analyzed(self):
+        for sql in [
+            'SELECT "users_user"."id" FROM "users_user" WHERE "id" = %s',
+            "  select count(*) from issues_issue",
+            "WITH recent AS (SELECT id FROM issues_issue) SELECT * FROM recent",
+            'SELECT "updated_at", "deleting" FROM "projects_team"',
+        ]:
+            with self.subTest(sql=sql):
+                self.assertEqual(
+                    slowqueries.explain_prefix(sql), slowqueries.ANALYZE_PREFIX
+                )
+
+    def test_statements_with_side_effects_are_not_run(self):
+        for sql in [
+            "WITH touched AS (SELECT 1) INSERT INTO analytics_issuemetrics "
+            "SELECT * FROM touched ON CONFLICT (issue_id) DO NOTHING",
+            "WITH gone AS (DELETE FROM t RETURNING id) SELECT * FROM gone",
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+            "FROM generate_series(1, %s)",
+            "SELECT setval('seq', 1)",
+            "SELECT * FROM issues_issue FOR UPDATE",
+            "SELECT * FROM issues_issue FOR NO KEY UPDATE SKIP LOCKED",
+            "SELECT * FROM issues_issue FOR SHARE",
+            "SELECT * FROM issues_issue FOR KEY SHARE",
+            "SELECT * INTO copy FROM issues_issue",
+            "SELECT pg_advisory_xact_lock(1)",
+            "UPDATE issues_issue SET status = 2",
+            "DELETE FROM issues_issue",
+        ]:
+            with self.subTest(sql=sql):
+                self.assertEqual(
+                    slowqueries.explain_prefix(sql), slowqueries.EXPLAIN_PREFIX
+                )
+
+    def test_other_statements_are_not_explained(self):
+        for sql in ["BEGIN", "SET LOCAL statement_timeout = 1", "VACUUM t"]:
+            with self.subTest(sql=sql):
+                self.assertIsNone(slowqueries.explain_prefix(sql))
+
+
+@override_settings(ADMISSION_MAX_IN_FLIGHT=2, ADMISSION_DB_TIME_MS=250)
+class AdmissionTests(SimpleTestCase):
+    def request(self, name: str, **headers):
+        path = reverse(name, args=[1] if name.startswith("issues") else [])
+        request = RequestFactory().get(path, headers=headers)
+        request.resolver_match = resolve(path)
+        return request
+
+    def test_low_priority_views(self):
+        self.assertTrue(
+            admission.is_low_priority(
+                self.request("users:notifications_counter")
+            )
+        )
+        self.assertFalse(
+            admission.is_low_priority(self.request("projects:members"))
+        )
+
+    def test_only_autocomplete_searches_are_low_priority(self):
+        search = self.request("issues:assign_user", accept="application/json")
+        dialog = self.request("issues:assign_user", accept="text/html")
+        self.assertTrue(admission.is_low_priority(search))
+        self.assertFalse(admission.is_low_priority(dialog))
+
+    def test_unresolved_requests_are_not_low_priority(self):
+        request = RequestFactory().get("/")
+        request.resolver_match = None
+        self.assertFalse(admission.is_low_priority(request))
+
+    def test_overloaded_workers(self):
+        with mock.patch.object(admission, "db_time_ms", return_value=0.0):
+            self.assertIsNone(admission.overloaded(0))
+            # Every worker is busy, but nothing else waits for one
+            self.assertIsNone(admission.overloaded(1))
+            self.assertEqual(admission.overloaded(2), "workers")
+
+    def test_overloaded_database(self):
+        with mock.patch.object(admission, "db_time_ms", return_value=300.0):
+            self.assertEqual(admission.overloaded(0), "database")
+
+    def test_db_time_needs_enough_recent_queries(self):
+        with mock.patch.multiple(
+            admission, _db_samples=0, _db_time_ms=0.0, _db_updated=0.0
+        ):
+            for _ in range(admission.DB_MIN_SAMPLES - 1):
+                admission.record_query(1000)
+            self.assertEqual(admission.db_time_ms(), 0.0)
+
+            admission.record_query(1000)
+            self.assertEqual(admission.db_time_ms(), 1000)
+
+    @override_settings(ADMISSION_REDIS_URL="redis://localhost")
+    def test_request_is_not_counted_as_in_flight(self):
+        pipeline = mock.Mock()
+        pipeline.execute.return_value = [3, True, b"2"]
+        client = mock.Mock()
+        client.pipeline.return_value = pipeline
+
+        with mock.patch.object(admission, "_redis", return_value=client):
+            key, in_flight = admission.request_started()
+
+        self.assertEqual(in_flight, 4)
+        self.assertTrue(key.startswith(admission.IN_FLIGHT_PREFIX))
+        client.pipeline.assert_called_once()
+
+    @override_settings(ADMISSION_REDIS_URL=None)
+    def test_nothing_is_counted_without_redis(self):
+        self.assertEqual(admission.request_started(), (None, 0))
+
+
+@override_settings(SHARED_CACHE=True)
+class QueryCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_writes_change_the_key(self):
+        queryset = Issue.objects.filter(status=Issue.Status.OPEN).cached()
+        key = queryset._cache_key("rows")
+        self.assertIsNotNone(key)
+
+        querycache.bump_version(Team)
+        self.assertEqual(queryset._cache_key("rows"), key)
+
+        querycache.bump_version(Issue)
+        self.assertNotEqual(queryset._cache_key("rows"), key)
+
+    def test_writes_to_other_scopes_keep_the_key(self):
+        queryset = Issue.objects.filter(project_id=1).cached(scope=1)
+        key = queryset._cache_key("rows")
+
+        querycache.bump_version(Issue, 2)
+        self.assertEqual(queryset._cache_key("rows"), key)
+
+        querycache.bump_version(Issue, 1)
+        self.assertNotEqual(queryset._cache_key("rows"), key)
+
+    def test_writes_without_a_scope_change_every_scope(self):
+        queryset = Issue.objects.filter(project_id=1).cached(scope=1)
+        key = queryset._cache_key("rows")
+
+        querycache.bump_version(Issue)
+        self.assertNotEqual(queryset._cache_key("rows"), key)
+
+    def test_unscoped_querysets_follow_every_scope(self):
+        queryset = Issue.objects.filter(status=Issue.Status.OPEN).cached()
+        key = queryset._cache_key("rows")
+
+        querycache.bump_version(Issue, 2)
+        self.assertNotEqual(queryset._cache_key("rows"), key)
+
+    def test_evicted_versions_start_over(self):
+        queryset = Issue.objects.filter(status=Issue.Status.OPEN).cached()
+        key = queryset._cache_key("rows")
+
+        cache.delete(querycache._version_key(Issue))
+        self.assertNotEqual(queryset._cache_key("rows"), key)
+
+    def test_untracked_tables_are_not_cached(self):
+        queryset = Issue.objects.filter(message__body__isnull=False).cached()
+        self.assertIsNone(queryset._cache_key("rows"))
+
+    @override_settings(SHARED_CACHE=False)
+    def test_nothing_is_cached_without_a_shared_cache(self):
+        queryset = Issue.objects.filter(status=Issue.Status.OPEN).cached()
+        self.assertIsNone(queryset._cache_key("rows"))
+
+
+@override_settings(SHARED_CACHE=True)
+class QueryCacheCommitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user")
+        cls.projects = [
+            Project.objects.create(name=f"Project {i}") for i in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def versions(self, *keys: str) -> list[int]:
+        return querycache.get_versions(list(keys))
+
+    def test_versions_are_bumped_on_commit(self):
+        key = querycache._version_key(Project)
+        before = self.versions(key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.projects[0].name = "Renamed"
+            self.projects[0].save()
+            self.assertEqual(self.versions(key), before)
+
+        self.assertNotEqual(self.versions(key), before)
+
+    def test_rolled_back_writes_keep_the_versions(self):
+        key = querycache._version_key(Project)
+        before = self.versions(key)
+
+        with self.captureOnCommitCallbacks(execute=False):
+            self.projects[0].name = "Renamed"
+            self.projects[0].save()
+
+        self.assertEqual(self.versions(key), before)
+
+    def test_writes_bump_their_scope_only(self):
+        first, second = self.projects
+        keys = [
+            querycache._version_key(Issue, first.pk),
+            querycache._version_key(Issue, second.pk),
+        ]
+        before = self.versions(*keys)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Issue.objects.create(
+                project=first, number=1, created_by=self.user, title="Issue"
+            )
+
+        after = self.versions(*keys)
+        self.assertNotEqual(after[0], before[0])
+        self.assertEqual(after[1], before[1])
+
+    def test_bulk_updates_bump_every_scope(self):
+        key = querycache._version_key(Issue, querycache.ALL_SCOPES)
+        before = self.versions(key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Issue.objects.filter(project=self.projects[0]).update(
+                status=Issue.Status.DONE
+            )
+
+        self.assertNotEqual(self.versions(key), before)
+
+    def test_cached_rows_are_read_once(self):
+        queryset = Project.objects.filter(pk=self.projects[0].pk).cached()
+        list(queryset)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(list(queryset.all()), [self.projects[0]])
+
+
+# Stops the listener loop, which retries on any Exception
+class StopListening(BaseException):
+    pass
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+        "l2": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "tiered-cache-tests",
+        },
+    }
+)
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        # Without a Redis URL nothing is published and no listener is started,
+        # a channel of its own gives each test a new L1
+        self.cache = TieredCache(
+            "",
+            {
+                "OPTIONS": {
+                    "L2": "l2",
+                    "L1_TIMEOUT": 10,
+                    "L1_MAX_ENTRIES": 2,
+                    "CHANNEL": uuid.uuid4().hex,
+                },
+            },
+        )
+        self.cache.l2.clear()
+
+    def test_values_are_read_from_l1(self):
+        self.cache.set("key", 1)
+        self.cache.l2.set("key", 2)
+
+        self.assertEqual(self.cache.get("key"), 1)
+        self.assertEqual(self.cache.stats()["l1"]["hits"], 1)
+
+    def test_l1_entries_expire(self):
+        self.cache.set("key", 1)
+        self.cache.l2.set("key", 2)
+
+        with mock.patch(
+            "core.cache.time.monotonic", return_value=time.monotonic() + 11
+        ):
+            self.assertEqual(self.cache.get("key"), 2)
+
+    def test_l1_never_outlives_the_value(self):
+        self.cache.set("key", 1, timeout=1)
+        self.cache.l2.set("key", 2)
+
+        with mock.patch(
+            "core.cache.time.monotonic", return_value=time.monotonic() + 2
+        ):
+            self.assertEqual(self.cache.get("key"), 2)
+
+    def test_l1_keeps_the_recently_used_entries(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+
+        entries = self.cache._process.entries
+        self.assertEqual(
+            list(entries),
+            [self.cache.make_key("a"), self.cache.make_key("c")],
+        )
+
+    def test_misses_are_read_from_l2(self):
+        self.cache.l2.set("key", 1)
+
+        self.assertEqual(self.cache.get_many(["key", "missing"]), {"key": 1})
+        self.assertEqual(self.cache.get("key"), 1)
+        stats = self.cache.stats()
+        self.assertEqual(stats["l2"], {"hits": 1, "misses": 1})
+        self.assertEqual(stats["l1"]["hits"], 1)
+
+    def test_writes_drop_the_l1_entry(self):
+        self.cache.set("key", 1)
+        self.cache.delete("key")
+
+        self.assertIsNone(self.cache.get("key"))
+
+
+class CacheInvalidationTests(SimpleTestCase):
+    def setUp(self):
+        self.process = _Process("redis://localhost", uuid.uuid4().hex)
+        self.process.entries["a"] = (time.monotonic() + 10, b"")
+        self.process.entries["b"] = (time.monotonic() + 10, b"")
+
+    def listen(self, *messages: str):
+        def received():
+            for message in messages:
+                yield {"data": message.encode()}
+            raise StopListening
+
+        pubsub = mock.Mock()
+        pubsub.listen.side_effect = received
+        client = mock.Mock()
+        client.pubsub.return_value = pubsub
+
+        with mock.patch.object(self.process, "redis", return_value=client):
+            with self.assertRaises(StopListening):
+                self.process.listen()
+
+    def test_messages_of_other_processes_drop_the_entry(self):
+        with mock.patch.object(self.process, "delete") as delete:
+            self.listen("other:a", f"{self.process.sender}:b")
+
+        # The first call drops everything written while not subscribed
+        self.assertEqual(
+            delete.call_args_list, [mock.call(CLEAR_ALL), mock.call("a")]
+        )
+
+    def test_subscribing_clears_l1(self):
+        self.listen()
+        self.assertEqual(len(self.process.entries), 0)
+
+    def test_clear_all_message(self):
+        with mock.patch.object(self.process, "delete") as delete:
+            self.listen(f"other:{CLEAR_ALL}")
+
+        self.assertEqual(delete.call_args_list[-1], mock.call(CLEAR_ALL))
+
+    def test_invalidations_are_published_with_the_sender(self):
+        publisher = mock.Mock()
+        self.process.publisher = publisher
+
+        self.process.invalidate("a")
+
+        self.assertNotIn("a", self.process.entries)
+        self.assertIn("b", self.process.entries)
+        publisher.publish.assert_called_once_with(
+            self.process.channel, f"{self.process.sender}:a"
+        )
+
+
+@override_settings(RATE_LIMIT_REDIS_URL=None)
+class MemoryRateLimitTests(SimpleTestCase):
+    def setUp(self):
+        self.key = uuid.uuid4().hex
+        self.now = time.monotonic()
+
+    def take(self, seconds: float = 0):
+        with mock.patch(
+            "core.ratelimit.time.monotonic", return_value=self.now + seconds
+        ):
+            return ratelimit.take(self.key, 2, 3)
+
+    def test_burst_then_refused(self):
+        self.assertEqual(
+            [self.take()[0] for _ in range(4)], [True, True, True, False]
+        )
+
+    def test_retry_after(self):
+        for _ in range(3):
+            self.take()
+
+        allowed, retry_after = self.take(0.25)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 0.25)
+
+    def test_tokens_refill_up_to_the_burst(self):
+        for _ in range(3):
+            self.take()
+
+        self.assertTrue(self.take(0.5)[0])
+        self.assertFalse(self.take(0.5)[0])
+        self.assertEqual(
+            [self.take(60)[0] for _ in range(4)], [True, True, True, False]
+        )
+
+    def test_redis_errors_fall_back_to_memory(self):
+        with override_settings(RATE_LIMIT_REDIS_URL="redis://localhost"):
+            with mock.patch.object(
+                ratelimit, "_take_redis", side_effect=ConnectionError
+            ):
+                with self.assertLogs("core.ratelimit", "ERROR"):
+                    self.assertTrue(self.take()[0])
+
+        self.assertIn(f"{ratelimit.KEY_PREFIX}{self.key}", ratelimit._memory)
+
+
+# Runs the Lua script against the Redis of the settings
+@skipUnless(settings.RATE_LIMIT_REDIS_URL, "Redis is not configured")
+class RedisRateLimitTests(SimpleTestCase):
+    def setUp(self):
+        self.key = f"{ratelimit.KEY_PREFIX}test:{uuid.uuid4().hex}"
+        self.now = time.time()
+
+    def tearDown(self):
+        ratelimit._redis_script().registered_client.delete(self.key)
+
+    def take(self, seconds: float = 0):
+        with mock.patch(
+            "core.ratelimit.time.time", return_value=self.now + seconds
+        ):
+            return ratelimit._take_redis(self.key, 2, 3)
+
+    def test_burst_then_refused(self):
+        self.assertEqual(
+            [self.take()[0] for _ in range(4)], [True, True, True, False]
+        )
+
+    def test_tokens_refill_up_to_the_burst(self):
+        for _ in range(3):
+            self.take()
+
+        allowed, tokens = self.take(0.5)
+        self.assertTrue(allowed)
+        self.assertAlmostEqual(tokens, 0)
+        self.assertEqual(
+            [self.take(60)[0] for _ in range(4)], [True, True, True, False]
+        )
+
+    def test_bucket_expires(self):
+        self.take()
+
+        ttl = ratelimit._redis_script().registered_client.ttl(self.key)
+        self.assertGreater(ttl, 0)
+        self.assertLessEqual(ttl, 3)
+
+
+@override_settings(SHARED_CACHE=False, PAGINATOR_ESTIMATE_ABOVE=100)
+class CachedPaginatorTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def patch(self, target: Any, attribute: str, **kwargs: Any):
+        patcher = mock.patch.object(target, attribute, **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def paginator(self, counts: list[int], estimate: int | None = None):
+        """Returns a paginator of issues whose counts return the given values
+        in turn, and the mocks of the count and of the estimate."""
+        count = self.patch(QuerySet, "count", autospec=True, side_effect=counts)
+        estimate_count = self.patch(
+            paginator, "estimate_count", return_value=estimate
+        )
+
+        return (
+            paginator.CachedPaginator(Issue.objects.order_by("pk"), 10),
+            count,
+            estimate_count,
+        )
+
+    def test_small_sets_are_counted_exactly(self):
+        pages, count, estimate_count = self.paginator([42])
+
+        self.assertEqual(pages.count, 42)
+        self.assertFalse(pages.estimated)
+        estimate_count.assert_not_called()
+        # Only up to the limit
+        self.assertEqual(count.call_args.args[0].query.high_mark, 100)
+
+    def test_big_sets_are_estimated(self):
+        pages, _, estimate_count = self.paginator([100], 5000)
+
+        self.assertEqual(pages.count, 5000)
+        self.assertTrue(pages.estimated)
+        estimate_count.assert_called_once()
+
+    def test_estimates_below_the_limit_are_raised_to_it(self):
+        pages, _, _ = self.paginator([100], 20)
+
+        self.assertEqual(pages.count, 100)
+        self.assertTrue(pages.estimated)
+
+    def test_big_sets_without_an_estimate_are_counted(self):
+        pages, count, _ = self.paginator([100, 250])
+
+        self.assertEqual(pages.count, 250)
+        self.assertFalse(pages.estimated)
+        self.assertEqual(count.call_count, 2)
+
+    def test_pages_past_an_estimate_can_be_reached(self):
+        pages, _, _ = self.paginator([100], 200)
+
+        self.assertEqual(pages.validate_number(30), 30)
+        with self.assertRaises(EmptyPage):
+            pages.validate_number(0)
+
+    def test_pages_past_an_exact_count_can_not(self):
+        pages, _, _ = self.paginator([42])
+
+        with self.assertRaises(EmptyPage):
+            pages.validate_number(6)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_counts_are_cached(self):
+        pages, count, estimate_count = self.paginator([100], 5000)
+        self.assertEqual(pages.count, 5000)
+
+        again = paginator.CachedPaginator(Issue.objects.order_by("pk"), 10)
+        self.assertEqual(again.count, 5000)
+        self.assertTrue(again.estimated)
+        self.assertEqual(count.call_count, 1)
+        self.assertEqual(estimate_count.call_count, 1)
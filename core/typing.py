@@ -42,11 +42,21 @@ class SelectedProject:
     def can_assign_to_issue(self):
         return self.role in [Role.OWNER, Role.MANAGER]
 
+    @cached_property
+    def can_import_issues(self):
+        return self.role == Role.OWNER
+
+    @cached_property
+    def can_refresh_analytics(self):
+        return self.role in [Role.OWNER, Role.MANAGER]
+
 
 class HttpRequest(BHttpRequest):
     htmx: HtmxDetails
     user: User
     selected_project: SelectedProject
+    # Other requests in flight on all workers, see core.admission
+    in_flight: int
 
 
 class HttpResponse(BHttpResponse):
@@ -0,0 +1,19 @@
+from django.urls import path
+
+from . import views
+
+app_name = "core"
+urlpatterns = [
+    path("metrics", views.metrics.metrics, name="metrics"),
+    path("profiles", views.profiles.profile_list, name="profiles"),
+    path(
+        "profiles/<str:name>",
+        views.profiles.profile_detail,
+        name="profile",
+    ),
+    path(
+        "profiles/<str:name>/stacks",
+        views.profiles.profile_stacks,
+        name="profile_stacks",
+    ),
+]
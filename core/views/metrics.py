@@ -0,0 +1,25 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_safe
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from core import metrics as core_metrics
+from core.typing import HttpRequest
+
+
+@require_safe
+def metrics(request: HttpRequest):
+    if not settings.METRICS_TOKEN:
+        raise Http404
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        core_metrics.exposition(), content_type=CONTENT_TYPE_LATEST
+    )
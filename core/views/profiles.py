@@ -0,0 +1,81 @@
+from django.http import FileResponse, Http404
+from django.http.response import HttpResponseForbidden
+from django.utils.translation import gettext as _
+from django.views.decorators.http import require_safe
+
+from core import profiling
+from core.htmx import render_htmx, show_message
+from core.typing import HttpRequest
+from users.decorators import login_required
+
+
+def forbidden():
+    return show_message(
+        HttpResponseForbidden(),  # type: ignore
+        "error",
+        _("Only staff members can see the profiles."),
+    )
+
+
+@login_required
+@require_safe
+def profile_list(request: HttpRequest):
+    if not request.user.is_staff:
+        return forbidden()
+
+    url_name = request.GET.get("url_name") or None
+    profiles = profiling.recent()
+    url_names = sorted({p["url_name"] for p in profiles if p["url_name"]})
+    if url_name:
+        profiles = [p for p in profiles if p["url_name"] == url_name]
+
+    return render_htmx(
+        request,
+        "core/profiles/list.html",
+        {
+            "profiles": profiles,
+            "url_names": url_names,
+            "url_name": url_name,
+            "token": profiling.make_token(request.user),
+            "param": profiling.PROFILE_PARAM,
+            "header": profiling.PROFILE_HEADER,
+        },
+    )
+
+
+@login_required
+@require_safe
+def profile_detail(request: HttpRequest, name: str):
+    if not request.user.is_staff:
+        return forbidden()
+
+    profile = profiling.load(name)
+    if profile is None:
+        raise Http404()
+
+    return render_htmx(
+        request,
+        "core/profiles/detail.html",
+        {
+            "profile": profile,
+            "self_samples": profiling.self_samples(name),
+        },
+    )
+
+
+@login_required
+@require_safe
+def profile_stacks(request: HttpRequest, name: str):
+    if not request.user.is_staff:
+        return forbidden()
+
+    path = profiling.profiles_dir() / f"{name}.folded"
+    if profiling.load(name) is None or not path.is_file():
+        raise Http404()
+
+    return FileResponse(
+        open(path, "rb"),
+        as_attachment=True,
+        filename=path.name,
+        content_type="text/plain",
+    )
@@ -0,0 +1,113 @@
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import URLResolver, get_resolver
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(
+    engine: DjangoTemplates, within: Path | None = None
+) -> list[str]:
+    names = set()
+    loaders = []
+    for loader in engine.engine.template_loaders:
+        loaders.extend(getattr(loader, "loaders", [loader]))
+
+    for loader in loaders:
+        for directory in loader.get_dirs():
+            if within is not None and not Path(directory).is_relative_to(
+                within
+            ):
+                continue
+
+            for root, _, files in os.walk(directory):
+                for file in files:
+                    if file.endswith((".html", ".txt")):
+                        path = os.path.join(root, file)
+                        names.add(os.path.relpath(path, directory))
+
+    return sorted(names)
+
+
+# Compiles every template found by the loaders, optionally only the ones in
+# directories under within. With the cached loader the compiled templates are
+# kept for the life of the process.
+def compile_templates(
+    within: Path | None = None,
+) -> tuple[list[str], dict[str, Exception]]:
+    compiled = []
+    errors = {}
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+
+        for name in template_names(engine, within):
+            try:
+                engine.get_template(name)
+            except Exception as e:
+                errors[name] = e
+            else:
+                compiled.append(name)
+
+    return compiled, errors
+
+
+def warm_templates() -> int:
+    compiled, errors = compile_templates()
+    for name, error in errors.items():
+        logger.error("Could not compile template %s: %s", name, error)
+
+    return len(compiled)
+
+
+def _count_patterns(resolver: URLResolver) -> int:
+    count = 0
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            count += _count_patterns(pattern)
+        else:
+            count += 1
+
+    return count
+
+
+def warm_urls() -> int:
+    # Populating the resolver imports every view module
+    resolver = get_resolver()
+    resolver.reverse_dict
+    return _count_patterns(resolver)
+
+
+def warm_translations() -> int:
+    for code, _ in settings.LANGUAGES:
+        translation.trans_real.translation(code)
+
+    return len(settings.LANGUAGES)
+
+
+PHASES: list[tuple[str, Callable[[], int]]] = [
+    ("urls", warm_urls),
+    ("translations", warm_translations),
+    ("templates", warm_templates),
+]
+
+
+# Loads everything a request would otherwise load lazily, so it happens once in
+# the gunicorn master instead of on the first requests of every worker.
+# Returns the phase name, items loaded and seconds taken for each phase.
+def warm_up() -> list[tuple[str, int, float]]:
+    timings = []
+    for name, phase in PHASES:
+        start = time.perf_counter()
+        count = phase()
+        timings.append((name, count, time.perf_counter() - start))
+
+    return timings
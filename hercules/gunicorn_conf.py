@@ -0,0 +1,62 @@
+# Production gunicorn settings, used with
+# python -m gunicorn -c python:hercules.gunicorn_conf
+#
+# The application is loaded and warmed up once in the master, then the workers
+# are forked from it and share those pages copy-on-write.
+import gc
+import os
+import shutil
+import time
+from pathlib import Path
+
+wsgi_app = "hercules.wsgi:application"
+bind = ":3333"
+workers = int(os.environ.get("GUNICORN_WORKERS", 2))
+timeout = 120
+loglevel = "info"
+preload_app = True
+
+# Where the workers write their Prometheus samples (see core.metrics). It has
+# to be set before prometheus_client is imported.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    str(Path(__file__).resolve().parent.parent / "logs" / "metrics"),
+)
+
+# Samples of the workers of a previous run are not part of this one. This runs
+# when the config is read, as the preloaded application already writes samples
+# before on_starting.
+_metrics_dir = Path(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+shutil.rmtree(_metrics_dir, ignore_errors=True)
+_metrics_dir.mkdir(parents=True)
+
+_started = time.perf_counter()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def when_ready(server):
+    from django.db import connections
+
+    from core.warmup import warm_up
+
+    server.log.info(
+        "Application loaded in %.3fs", time.perf_counter() - _started
+    )
+
+    for name, count, seconds in warm_up():
+        server.log.info("Warmed up %d %s in %.3fs", count, name, seconds)
+
+    # Nothing opened in the master may be shared with the workers
+    connections.close_all()
+
+    # Objects created so far live as long as the process, so keeping them out
+    # of the collector stops it from touching (and copying) their pages
+    gc.collect()
+    gc.freeze()
+
+    server.log.info("Ready in %.3fs", time.perf_counter() - _started)
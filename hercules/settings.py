@@ -36,6 +36,11 @@ if os.environ.get("HERCULES_USE_ENV", "0") == "1":
             "LOCATION": os.environ.get("DJANGO_CACHE_REDIS_URL"),
         }
 
+    replicas = []
+    for replica_host in os.environ.get("POSTGRES_REPLICA_HOSTS", "").split():
+        host, separator, port = replica_host.partition(":")
+        replicas.append({"host": host, "port": port or 5432})
+
     config = {
         "debug": os.environ.get("DJANGO_DEBUG", "0") == "1",
         "db": {
@@ -45,6 +50,7 @@ if os.environ.get("HERCULES_USE_ENV", "0") == "1":
             "password": os.environ.get("POSTGRES_PASSWORD"),
             "db-name": os.environ.get("POSTGRES_DB"),
         },
+        "db-replicas": replicas,
         "allowed-hosts": allowed_hosts,
         "trusted-origins": trusted_origins,
         "secret-key": os.environ.get("DJANGO_SECRET_KEY"),
@@ -54,6 +60,10 @@ if os.environ.get("HERCULES_USE_ENV", "0") == "1":
             "NGINX_SECRET_MEDIA_PATH", "secret-files"
         ),
         "cache": cache,
+        "session": {
+            "engine": os.environ.get("DJANGO_SESSION_ENGINE", "db"),
+        },
+        "metrics-token": os.environ.get("METRICS_TOKEN"),
     }
 else:
     with open(BASE_DIR / "config.json", "r") as f:
@@ -94,29 +104,50 @@ INSTALLED_APPS = [
     "users",
     "projects",
     "issues",
+    "analytics",
     "django_htmx",
 ]
 
 MIDDLEWARE = [
+    "core.middleware.RequestIdMiddleware",
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.AdmissionControlMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
 ]
 
+# HTML responses are minified, and any text response at least this many bytes
+# long is compressed with brotli or gzip (see core.middleware)
+COMPRESSION_MIN_SIZE = 512
+
 ROOT_URLCONF = "hercules.urls"
 
+# Compiled templates are kept for the life of the process. Outside debug they
+# are all compiled before the workers fork (see core.warmup), and
+# "manage.py warm_templates" checks that every one of them compiles.
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": True,
         "OPTIONS": {
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -144,11 +175,91 @@ DATABASES = {
     }
 }
 
+# Optional read replicas. Reads go to a random replica unless the request wrote
+# to the primary in the last REPLICA_PIN_SECONDS (see core.routers)
+for i, replica in enumerate(config.get("db-replicas") or [], start=1):
+    DATABASES[f"replica_{i}"] = {
+        **DATABASES["default"],
+        "HOST": replica["host"],
+        "PORT": replica.get("port", DATABASES["default"]["PORT"]),
+        "USER": replica.get("username", DATABASES["default"]["USER"]),
+        "PASSWORD": replica.get("password", DATABASES["default"]["PASSWORD"]),
+        "TEST": {"MIRROR": "default"},
+    }
+
+if len(DATABASES) > 1:
+    DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+    MIDDLEWARE.insert(3, "core.middleware.ReplicaPinMiddleware")
+
+REPLICA_PIN_SECONDS = 5
+
 
 # Cache
 # https://docs.djangoproject.com/en/4.2/ref/settings/#std-setting-CACHES
+# When Redis is configured, the default cache keeps a small per process copy of
+# hot values in front of it (see core.cache.TieredCache)
 if config["cache"] is not None:
-    CACHES = {"default": config["cache"]}
+    CACHES = {
+        "default": {
+            "BACKEND": "core.cache.TieredCache",
+            "LOCATION": config["cache"]["LOCATION"],
+            "OPTIONS": {
+                "L2": "redis",
+                "L1_MAX_ENTRIES": 1000,
+                "L1_TIMEOUT": 10,
+            },
+        },
+        "redis": config["cache"],
+    }
+
+# Without Redis every process has its own local memory cache, so nothing that
+# must be seen by the other gunicorn workers is cached
+SHARED_CACHE = config["cache"] is not None
+
+
+# Cached querysets (core.querycache) expire after this many seconds even if
+# none of their tables changed
+
+QUERYCACHE_TTL = 300
+
+
+# Pagination
+# List pages count their rows once per change to the tables they read (see
+# core.paginator). Rows are only counted up to this many, the page numbers of
+# bigger sets come from the estimate of Postgres.
+
+PAGINATOR_ESTIMATE_ABOVE = 10000
+
+
+# Sessions
+# https://docs.djangoproject.com/en/4.2/topics/http/sessions/#configuring-the-session-engine
+# The cache engines are only used with a shared cache, as the default local
+# memory cache is not shared between the gunicorn workers
+
+session_engine = (config.get("session") or {}).get("engine", "db")
+if session_engine not in ["db", "cache", "cached_db"]:
+    session_engine = "db"
+if config["cache"] is None:
+    session_engine = "db"
+
+SESSION_ENGINE = f"django.contrib.sessions.backends.{session_engine}"
+if config["cache"] is not None:
+    SESSION_CACHE_ALIAS = "redis"
+
+
+# Notifications
+# Monthly notification partitions older than this are dropped daily by the
+# prune_notifications worker. Their unread rows move to the default partition
+# and are deleted once read.
+
+NOTIFICATION_RETENTION_MONTHS = 6
+
+# Assignments in the same project are merged into a single unread notification
+# when they happen within this many seconds of it (0 disables coalescing).
+# With a digest period, they are merged per aligned period instead
+
+NOTIFICATION_COALESCE_WINDOW = 15 * 60
+NOTIFICATION_DIGEST_PERIOD = 0
 
 
 # Password validation
@@ -174,46 +285,140 @@ AUTH_USER_MODEL = "users.User"
 # Logging
 # https://docs.djangoproject.com/en/4.2/topics/logging/
 
+# Outside debug, records go through queues and are written as JSON lines by
+# background threads (see core.log), so the request threads never wait on the
+# disk. Every record carries the id of the request that logged it.
+
+# Fraction of the records kept for each level of the application loggers
+LOG_SAMPLE_RATES = {"DEBUG": 0.05}
+
 if not DEBUG:
     LOGGING = {
         "version": 1,
         "disable_existing_loggers": False,
-        "formatters": {
-            "basic": {
-                "format": "%(asctime)s.%(msecs)03d %(levelname)8s  %(name)s\n%(message)s",
-                "datefmt": "%Y-%m-%d %H:%M:%S",
+        "filters": {
+            "request_id": {
+                "()": "core.log.RequestIdFilter",
             },
-            "access": {
-                "format": "%(asctime)s %(message)s",
-                "datefmt": "[%d/%b/%Y:%H:%M:%S %z]",
+            "sampling": {
+                "()": "core.log.SamplingFilter",
+                "rates": LOG_SAMPLE_RATES,
+            },
+        },
+        "formatters": {
+            "json": {
+                "()": "core.log.JsonFormatter",
             },
         },
         "handlers": {
             "request": {
-                "class": "logging.handlers.RotatingFileHandler",
+                "()": "core.log.QueuedRotatingFileHandler",
                 "filename": BASE_DIR / "logs" / "error.log",
                 "maxBytes": 1024 * 1024 * 15,
                 "backupCount": 10,
-                "formatter": "basic",
+                "formatter": "json",
+                "filters": ["request_id"],
             },
-            "server": {
-                "class": "logging.handlers.RotatingFileHandler",
+            "access": {
+                "()": "core.log.QueuedRotatingFileHandler",
+                "filename": BASE_DIR / "logs" / "access.log",
+                "maxBytes": 1024 * 1024 * 15,
+                "backupCount": 10,
+                "formatter": "json",
+                "filters": ["request_id"],
+            },
+            "app": {
+                "()": "core.log.QueuedRotatingFileHandler",
                 "filename": BASE_DIR / "logs" / "info.log",
                 "maxBytes": 1024 * 1024 * 15,
                 "backupCount": 10,
-                "formatter": "access",
+                "formatter": "json",
+                "filters": ["request_id", "sampling"],
             },
         },
         "loggers": {
             "django.request": {
                 "handlers": ["request"],
             },
-            "django.server": {
-                "handlers": ["server"],
+            "hercules.access": {
+                "handlers": ["access"],
+                "level": "INFO",
+                "propagate": False,
+            },
+            "core": {
+                "handlers": ["app"],
+                "level": "DEBUG",
+            },
+            "hercules": {
+                "handlers": ["app"],
+                "level": "DEBUG",
             },
         },
     }
 
+# Slow queries
+# Statements taking at least SLOW_QUERY_MS are logged and kept in a buffer of
+# the last SLOW_QUERY_BUFFER ones in SLOW_QUERY_FILE, which every worker appends
+# to, a sample of them with their plan (EXPLAIN ANALYZE for read only SELECTs,
+# see core.slowqueries and the slow_queries command). None disables the capture.
+
+SLOW_QUERY_MS = 200
+SLOW_QUERY_EXPLAIN_RATE = 0.1
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = 10000
+SLOW_QUERY_BUFFER = 100
+SLOW_QUERY_FILE = BASE_DIR / "logs" / "slow_queries.ndjson"
+
+
+# Admission control
+# Low priority requests (see core.admission) get a 503 while this many other
+# requests are in flight on all workers together, meaning every worker is busy
+# and the rest are queued, or while queries of the worker took
+# ADMISSION_DB_TIME_MS on average. The requests in flight are counted in Redis,
+# without it only the query times are checked.
+
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get("GUNICORN_WORKERS", 2))
+ADMISSION_DB_TIME_MS = 250
+ADMISSION_RETRY_AFTER = 60
+ADMISSION_REDIS_URL = (
+    config["cache"]["LOCATION"] if config["cache"] is not None else None
+)
+
+
+# Rate limiting
+# Token buckets per user and view (see core.ratelimit): "rate" tokens a second
+# up to "burst" of them. Kept in Redis when configured, else in each process.
+
+RATE_LIMIT_REDIS_URL = (
+    config["cache"]["LOCATION"] if config["cache"] is not None else None
+)
+RATE_LIMITS = {
+    "autocomplete": {"rate": 5, "burst": 20},
+    "polling": {"rate": 0.2, "burst": 10},
+}
+
+# Autocomplete searches return at most AUTOCOMPLETE_LIMIT options, and their
+# results are reused for longer prefixes (see core.autocomplete)
+AUTOCOMPLETE_LIMIT = 20
+AUTOCOMPLETE_CACHE_SECONDS = 15
+
+
+# Metrics
+# Prometheus metrics are served at /metrics to scrapers sending this token as
+# "Authorization: Bearer <token>". Without a token they are not served at all,
+# as the address of the client is the proxy's behind nginx or docker.
+
+METRICS_TOKEN = config.get("metrics-token") or None
+
+
+# Profiling
+# Staff members can profile single requests, see core.profiling and the
+# /profiles page. Only the newest PROFILES_KEEP profiles are kept.
+
+PROFILES_DIR = BASE_DIR / "logs" / "profiles"
+PROFILES_KEEP = 200
+PROFILE_TOKEN_MAX_AGE = 60 * 60 * 24
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -244,6 +449,21 @@ LOGIN_REDIRECT_URL = f"/"
 STATIC_URL = f"/static/"
 STATIC_ROOT = BASE_DIR / "static"
 
+# Outside debug, collectstatic fingerprints every file and writes precompressed
+# siblings, which hercules.static_server serves with immutable cache headers
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+if not DEBUG:
+    STORAGES["staticfiles"] = {
+        "BACKEND": "core.storage.CompressedManifestStaticFilesStorage",
+    }
+
 
 # Media files
 # https://docs.djangoproject.com/en/4.2/topics/files/
@@ -0,0 +1,80 @@
+import mimetypes
+from functools import lru_cache
+from os import path, stat
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpRequest
+from django.utils._os import safe_join
+from django.views.decorators.http import require_safe
+
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+# Fingerprinted names change with their content, so they can be cached forever
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=0, must-revalidate"
+
+
+@lru_cache(maxsize=1)
+def _manifest_names(modified: int) -> set[str]:
+    from django.contrib.staticfiles.storage import staticfiles_storage
+
+    return set(staticfiles_storage.load_manifest().values())  # type: ignore
+
+
+# Read from the manifest on disk rather than the storage, which keeps the one
+# it found when it was loaded. A missing manifest is not remembered, and a new
+# one is read again once collectstatic writes it.
+def _hashed_names() -> set[str]:
+    storage = settings.STORAGES["staticfiles"]["BACKEND"]
+    if "Manifest" not in storage:
+        return set()
+
+    from django.contrib.staticfiles.storage import staticfiles_storage
+
+    try:
+        modified = stat(
+            staticfiles_storage.path(
+                staticfiles_storage.manifest_name  # type: ignore
+            )
+        ).st_mtime_ns
+    except FileNotFoundError:
+        return set()
+
+    return _manifest_names(modified)
+
+
+@require_safe
+def static_server(request: HttpRequest, file_path: str):
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, file_path)
+    except ValueError:
+        raise Http404
+
+    if not path.isfile(full_path):
+        raise Http404
+
+    content_type, _ = mimetypes.guess_type(file_path)
+    accept_encoding = request.headers.get("Accept-Encoding", "")
+
+    encoding = None
+    for name, suffix in ENCODINGS:
+        if name in accept_encoding and path.isfile(full_path + suffix):
+            encoding = name
+            full_path += suffix
+            break
+
+    response = FileResponse(
+        open(full_path, "rb"),
+        content_type=content_type or "application/octet-stream",
+        filename=path.basename(file_path),
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+
+    if file_path in _hashed_names():
+        response.headers["Cache-Control"] = IMMUTABLE
+    else:
+        response.headers["Cache-Control"] = REVALIDATE
+
+    return response
@@ -18,14 +18,24 @@ from django.conf import settings
 from django.urls import include, path
 
 from .media_server import media_server
+from .static_server import static_server
 
 media_url = settings.MEDIA_URL
 if media_url[0] == "/":
     media_url = media_url[1:]
 
+static_url = settings.STATIC_URL
+if static_url[0] == "/":
+    static_url = static_url[1:]
+
 urlpatterns = [
     path('', include('users.urls')),
     path('', include('projects.urls')),
     path('', include('issues.urls')),
+    path('', include('analytics.urls')),
+    path('', include('core.urls')),
     path(f"{media_url}<path:file_path>", media_server),
 ]
+
+if not settings.DEBUG:
+    urlpatterns.append(path(f"{static_url}<path:file_path>", static_server))
@@ -0,0 +1,175 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils.translation import gettext as _
+
+from core import autocomplete
+from issues.models import Assignment, History, Issue, Message
+from projects.models import Project, Team, TeamMember
+from users import notifications
+from users.models import User
+
+
+def editable_issues(
+    project: Project, user: User, issue_ids: list[int], can_edit_all: bool
+) -> QuerySet[Issue]:
+    issues = Issue.objects.filter(project=project, pk__in=issue_ids)
+    if not can_edit_all:
+        issues = issues.filter(created_by=user)
+
+    return issues
+
+
+def _lock_ids(issues: QuerySet[Issue]) -> list[int]:
+    return list(
+        issues.select_for_update().order_by("pk").values_list("pk", flat=True)
+    )
+
+
+def change_status(issues: QuerySet[Issue], user: User, status: int) -> int:
+    with transaction.atomic():
+        ids = _lock_ids(issues.exclude(status=status))
+        if not ids:
+            return 0
+
+        Issue.objects.filter(pk__in=ids).update(status=status)
+        History.objects.bulk_create(
+            [
+                History(
+                    issue_id=pk,
+                    user=user,
+                    type=History.Type.STATUS,
+                    status=status,
+                )
+                for pk in ids
+            ]
+        )
+
+    return len(ids)
+
+
+def close_as_duplicate(
+    issues: QuerySet[Issue], user: User, original: Issue
+) -> int:
+    with transaction.atomic():
+        ids = _lock_ids(issues.exclude(pk=original.pk))
+        if not ids:
+            return 0
+
+        text = _("Duplicate of #%(number)d") % {"number": original.number}
+        messages = Message.objects.bulk_create(
+            [
+                Message(
+                    issue_id=pk,
+                    created_by=user,
+                    body={"ops": [{"insert": f"{text}\n"}]},
+                )
+                for pk in ids
+            ]
+        )
+        history = [
+            History(
+                issue_id=message.issue_id,
+                user=user,
+                type=History.Type.MESSAGE,
+                message=message,
+            )
+            for message in messages
+        ]
+
+        closing = list(
+            Issue.objects.filter(pk__in=ids)
+            .exclude(status=Issue.Status.CLOSED)
+            .values_list("pk", flat=True)
+        )
+        Issue.objects.filter(pk__in=closing).update(status=Issue.Status.CLOSED)
+        history += [
+            History(
+                issue_id=pk,
+                user=user,
+                type=History.Type.STATUS,
+                status=Issue.Status.CLOSED,
+            )
+            for pk in closing
+        ]
+        History.objects.bulk_create(history)
+
+    return len(ids)
+
+
+def _assign(
+    issues: QuerySet[Issue],
+    user: User,
+    type: int,
+    recipients: list[User],
+    assignee: User | None = None,
+    team: Team | None = None,
+) -> int:
+    with transaction.atomic():
+        already_assigned = Assignment.objects.filter(
+            type=type, user=assignee, team=team
+        ).values("issue_id")
+        ids = _lock_ids(issues.exclude(pk__in=already_assigned))
+        if not ids:
+            return 0
+
+        assignments = Assignment.objects.bulk_create(
+            [
+                Assignment(issue_id=pk, type=type, user=assignee, team=team)
+                for pk in ids
+            ]
+        )
+        History.objects.bulk_create(
+            [
+                History(
+                    issue_id=assignment.issue_id,
+                    user=user,
+                    type=History.Type.ASSIGNMENT,
+                    assignment=assignment,
+                )
+                for assignment in assignments
+            ]
+        )
+
+        scope = "users" if type == Assignment.Type.USER else "teams"
+        autocomplete.invalidate(*(f"issue:{pk}:{scope}" for pk in ids))
+
+        issues_by_id = Issue.objects.select_related("project").in_bulk(ids)
+        for assignment in assignments:
+            assignment.issue = issues_by_id[assignment.issue_id]
+
+        notifications.send(
+            [
+                notifications.issue_assignment(recipient, assignment)
+                for assignment in assignments
+                for recipient in recipients
+            ]
+        )
+
+    return len(ids)
+
+
+def assign_user(issues: QuerySet[Issue], user: User, assignee: User) -> int:
+    return _assign(
+        issues,
+        user,
+        Assignment.Type.USER,
+        [assignee],
+        assignee=assignee,
+    )
+
+
+def assign_team(issues: QuerySet[Issue], user: User, team: Team) -> int:
+    recipients = [
+        t_member.member.user
+        for t_member in TeamMember.objects.filter(team=team).select_related(
+            "member__user"
+        )
+    ]
+
+    return _assign(
+        issues,
+        user,
+        Assignment.Type.TEAM,
+        recipients,
+        team=team,
+    )
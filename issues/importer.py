@@ -0,0 +1,390 @@
+import csv
+import json
+import os
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Callable, Iterator
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core import querycache
+from issues.models import Counter, History, ImportJob, Issue, Message
+from projects.models import ProjectMember
+from users.models import User
+
+BATCH_SIZE = 1000
+
+# Uploads are saved under MEDIA_ROOT in this directory
+UPLOAD_DIR = "imports"
+UPLOAD_KEEP = timedelta(days=7)
+# Every batch saves the job, a running job without a save for this long was
+# left behind by a worker that stopped
+STALE_AFTER = timedelta(minutes=10)
+
+ISSUE_COLUMNS = (
+    "id",
+    "project_id",
+    "number",
+    "status",
+    "created_by_id",
+    "created_at",
+    "title",
+)
+MESSAGE_COLUMNS = ("id", "issue_id", "created_by_id", "created_at", "body")
+HISTORY_COLUMNS = (
+    "issue_id",
+    "user_id",
+    "created_at",
+    "type",
+    "message_id",
+    "status",
+)
+
+
+class ImportFailed(Exception):
+    pass
+
+
+def read_records(path: str, format: str) -> Iterator[dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        if format == ImportJob.Format.CSV:
+            yield from csv.DictReader(f)
+            return
+
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                yield json.loads(line)
+            except ValueError:
+                raise ImportFailed(f"Line {number}: invalid JSON")
+
+
+def count_records(path: str, format: str) -> int:
+    return sum(1 for _ in read_records(path, format))
+
+
+def _validate(record: Any, position: int) -> dict[str, Any]:
+    if not isinstance(record, dict):
+        raise ImportFailed(f"Record {position}: expected an object")
+
+    title = str(record.get("title") or "").strip()
+    if not title:
+        raise ImportFailed(f"Record {position}: the title is required")
+
+    # A CSV column holds the comments as a JSON list
+    comments = record.get("comments") or []
+    if isinstance(comments, str):
+        try:
+            comments = json.loads(comments)
+        except ValueError:
+            raise ImportFailed(
+                f"Record {position}: comments must be a JSON list"
+            )
+
+    if not isinstance(comments, list) or not all(
+        isinstance(comment, dict) for comment in comments
+    ):
+        raise ImportFailed(
+            f"Record {position}: comments must be a list of objects"
+        )
+
+    return {
+        **record,
+        "title": title,
+        "status": _parse_status(record.get("status"), position),
+        "comments": comments,
+    }
+
+
+def _parse_status(value: Any, position: int) -> int:
+    if value in (None, ""):
+        return Issue.Status.OPEN
+
+    try:
+        status = int(value)
+    except (TypeError, ValueError):
+        try:
+            status = Issue.Status[str(value).upper()].value
+        except KeyError:
+            raise ImportFailed(f"Record {position}: invalid status {value!r}")
+
+    if status not in Issue.Status.values:
+        raise ImportFailed(f"Record {position}: invalid status {value!r}")
+
+    return status
+
+
+def _parse_date(value: Any, default: datetime) -> datetime:
+    if not value:
+        return default
+
+    date = parse_datetime(str(value))
+    if date is None:
+        return default
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+
+    return date
+
+
+def _body(value: Any) -> str:
+    if isinstance(value, dict):
+        return json.dumps(value)
+
+    return json.dumps({"ops": [{"insert": f"{value or ''}\n"}]})
+
+
+# Authors are only matched among the members of the project, others fall back
+# to the user who started the import
+def _map_users(
+    records: list[dict[str, Any]], project_id: int
+) -> dict[str, int]:
+    identifiers = set()
+    for record in records:
+        identifiers.add(record.get("created_by") or "")
+        for comment in record.get("comments") or []:
+            identifiers.add(comment.get("created_by") or "")
+    identifiers.discard("")
+
+    users: dict[str, int] = {}
+    members = ProjectMember.objects.filter(
+        project_id=project_id, accepted=True, rejected=False
+    ).values("user_id")
+    for pk, username, email in User.objects.filter(
+        Q(username__in=identifiers) | Q(email__in=identifiers),
+        pk__in=members,
+    ).values_list("pk", "username", "email"):
+        users[username] = pk
+        if email:
+            users.setdefault(email, pk)
+
+    return users
+
+
+def _reserve(sql: str, params: list[Any]) -> list[int]:
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _reserve_ids(table: str, count: int) -> list[int]:
+    return _reserve(
+        "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+        "FROM generate_series(1, %s)",
+        [table, count],
+    )
+
+
+def _copy(table: str, columns: tuple[str, ...], rows: list[tuple]):
+    if not rows:
+        return
+
+    with connection.cursor() as cursor:
+        with cursor.copy(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+        ) as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+def import_batch(job: ImportJob, records: list[Any], start: int):
+    # Every record is checked before ids and numbers are reserved for them
+    records = [
+        _validate(record, start + i + 1) for i, record in enumerate(records)
+    ]
+    now = timezone.now()
+    users = _map_users(records, job.project_id)  # type: ignore
+    default_user = job.created_by_id  # type: ignore
+
+    comment_count = sum(len(r.get("comments") or []) for r in records)
+    issue_ids = _reserve_ids(Issue._meta.db_table, len(records))
+    message_ids = iter(
+        _reserve_ids(Message._meta.db_table, len(records) + comment_count)
+    )
+    numbers = Counter.reserve(job.project_id, len(records))  # type: ignore
+
+    issues, messages, history = [], [], []
+    for i, record in enumerate(records):
+        issue_id = issue_ids[i]
+        status = record["status"]
+        created_by = users.get(record.get("created_by") or "", default_user)
+        created_at = _parse_date(record.get("created_at"), now)
+
+        issues.append(
+            (
+                issue_id,
+                job.project_id,  # type: ignore
+                numbers[i],
+                status,
+                created_by,
+                created_at,
+                record["title"],
+            )
+        )
+
+        comments = [
+            {
+                "body": record.get("description"),
+                "created_by": created_by,
+                "created_at": created_at,
+            }
+        ]
+        for comment in record.get("comments") or []:
+            comments.append(
+                {
+                    "body": comment.get("body"),
+                    "created_by": users.get(
+                        comment.get("created_by") or "", default_user
+                    ),
+                    "created_at": _parse_date(
+                        comment.get("created_at"), created_at
+                    ),
+                }
+            )
+
+        for comment in comments:
+            message_id = next(message_ids)
+            messages.append(
+                (
+                    message_id,
+                    issue_id,
+                    comment["created_by"],
+                    comment["created_at"],
+                    _body(comment["body"]),
+                )
+            )
+            history.append(
+                (
+                    issue_id,
+                    comment["created_by"],
+                    comment["created_at"],
+                    History.Type.MESSAGE.value,
+                    message_id,
+                    None,
+                )
+            )
+
+        if status != Issue.Status.OPEN:
+            history.append(
+                (
+                    issue_id,
+                    created_by,
+                    _parse_date(
+                        record.get("status_changed_at"),
+                        comments[-1]["created_at"],
+                    ),
+                    History.Type.STATUS.value,
+                    None,
+                    status,
+                )
+            )
+
+    _copy(Issue._meta.db_table, ISSUE_COLUMNS, issues)
+    _copy(Message._meta.db_table, MESSAGE_COLUMNS, messages)
+    _copy(History._meta.db_table, HISTORY_COLUMNS, history)
+
+    # COPY sends no signals, the cached issue counts are dropped here
+    querycache.invalidate(Issue, job.project_id)  # type: ignore
+
+
+def run_import(
+    job: ImportJob,
+    batch_size: int = BATCH_SIZE,
+    progress: Callable[[ImportJob], None] | None = None,
+):
+    job.status = ImportJob.Status.RUNNING
+    job.error = ""
+    job.save()
+
+    try:
+        if job.total is None:
+            job.total = count_records(job.path, job.format)
+            job.save(update_fields=["total", "updated_at"])
+
+        records = read_records(job.path, job.format)
+        for _ in islice(records, job.processed):
+            pass
+
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+
+            with transaction.atomic():
+                import_batch(job, batch, job.processed)
+
+                job.processed += len(batch)
+                job.save(update_fields=["processed", "updated_at"])
+
+            if progress is not None:
+                progress(job)
+    except Exception as e:
+        job.status = ImportJob.Status.FAILED
+        job.error = str(e) if isinstance(e, ImportFailed) else repr(e)
+        job.save()
+        raise
+
+    job.status = ImportJob.Status.DONE
+    job.save()
+    delete_upload(job)
+
+
+def is_upload(path: str) -> bool:
+    uploads = os.path.join(settings.MEDIA_ROOT, UPLOAD_DIR, "")
+    return os.path.abspath(path).startswith(os.path.abspath(uploads))
+
+
+# Files passed to the command belong to whoever ran it, only the uploaded
+# ones are removed
+def delete_upload(job: ImportJob):
+    if not is_upload(job.path):
+        return
+
+    try:
+        os.remove(job.path)
+    except FileNotFoundError:
+        pass
+
+
+def prune_uploads():
+    """Removes the files of failed uploads that were not retried for
+    UPLOAD_KEEP, they can't be retried afterwards."""
+    failed = ImportJob.objects.filter(
+        status=ImportJob.Status.FAILED,
+        updated_at__lt=timezone.now() - UPLOAD_KEEP,
+    )
+    for job in failed.iterator():
+        if is_upload(job.path) and os.path.exists(job.path):
+            delete_upload(job)
+
+
+def next_job() -> ImportJob | None:
+    """Claims the oldest pending job, or one left running by a worker that
+    stopped without making progress for STALE_AFTER. The job is marked as
+    running before the row is unlocked, so two workers never claim the same
+    job."""
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ImportJob.Status.PENDING)
+                | Q(
+                    status=ImportJob.Status.RUNNING,
+                    updated_at__lt=timezone.now() - STALE_AFTER,
+                )
+            )
+            .order_by("created_at")
+            .first()
+        )
+        if job is not None:
+            job.status = ImportJob.Status.RUNNING
+            job.save(update_fields=["status", "updated_at"])
+
+    return job
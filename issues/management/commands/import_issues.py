@@ -0,0 +1,102 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from issues.importer import (
+    BATCH_SIZE,
+    ImportFailed,
+    next_job,
+    prune_uploads,
+    run_import,
+)
+from issues.models import ImportJob
+from projects.models import Project
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Imports issues and comments from a CSV or NDJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?")
+        parser.add_argument("--project", type=int, help="Target project id")
+        parser.add_argument(
+            "--user",
+            help="Username used for records whose author can't be found",
+        )
+        parser.add_argument(
+            "--format",
+            choices=ImportJob.Format.values,
+            default=ImportJob.Format.NDJSON,
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--resume",
+            type=int,
+            metavar="JOB_ID",
+            help="Continue a failed or interrupted import",
+        )
+        parser.add_argument(
+            "--worker",
+            action="store_true",
+            help="Keep processing the imports uploaded through the web page",
+        )
+        parser.add_argument("--poll", type=float, default=5)
+
+    def progress(self, job: ImportJob):
+        self.stdout.write(f"Import {job.pk}: {job.processed}/{job.total}")
+
+    def run(self, job: ImportJob, batch_size: int):
+        try:
+            run_import(job, batch_size, self.progress)
+        except ImportFailed as e:
+            self.stderr.write(f"Import {job.pk} failed: {e}")
+            return
+
+        self.stdout.write(f"Import {job.pk} finished")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        if options["worker"]:
+            while True:
+                job = next_job()
+                if job is None:
+                    prune_uploads()
+                    time.sleep(options["poll"])
+                    continue
+
+                try:
+                    self.run(job, batch_size)
+                except Exception as e:
+                    self.stderr.write(f"Import {job.pk} failed: {e!r}")
+
+        if options["resume"] is not None:
+            job = ImportJob.objects.filter(pk=options["resume"]).first()
+            if job is None:
+                raise CommandError("Import job not found")
+            if job.status == ImportJob.Status.DONE:
+                raise CommandError("Import job already finished")
+
+            self.run(job, batch_size)
+            return
+
+        if not options["path"] or options["project"] is None:
+            raise CommandError("A path and --project are required")
+
+        project = Project.objects.filter(pk=options["project"]).first()
+        if project is None:
+            raise CommandError("Project not found")
+
+        user = User.objects.filter(username=options["user"]).first()
+        if user is None:
+            raise CommandError("--user must be an existing username")
+
+        job = ImportJob.objects.create(
+            project=project,
+            created_by=user,
+            path=options["path"],
+            format=options["format"],
+        )
+        self.stdout.write(f"Created import job {job.pk}")
+        self.run(job, batch_size)
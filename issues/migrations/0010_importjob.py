@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0005_alter_project_name_alter_team_name'),
+        ('issues', '0009_alter_history_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('path', models.TextField()),
+                ('format', models.TextField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')])),
+                ('status', models.IntegerField(choices=[(1, 'Pending'), (2, 'Running'), (3, 'Done'), (4, 'Failed')], default=1)),
+                ('total', models.IntegerField(blank=True, null=True)),
+                ('processed', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='projects.project')),
+            ],
+        ),
+    ]
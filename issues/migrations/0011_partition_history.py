@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from core.partitions import (
+    convert_to_partitioned_sql,
+    revert_partitioned_sql,
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("issues", "0010_importjob"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            convert_to_partitioned_sql("issues_history"),
+            reverse_sql=revert_partitioned_sql("issues_history"),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0011_partition_history"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="history",
+            index=models.Index(
+                fields=["issue", "created_at"], name="history_issue_created_idx"
+            ),
+        ),
+    ]
@@ -1,7 +1,8 @@
-from django.db import models
+from django.db import connection, models
 from django.utils.translation import gettext_lazy as _
 from django_stubs_ext.db.models import TypedModelMeta
 
+from core.querycache import CachedQuerySet
 from projects.models import Project, Team
 from users.models import User
 
@@ -19,6 +20,8 @@ class Issue(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     title = models.TextField()
 
+    objects = CachedQuerySet.as_manager()
+
     class Meta(TypedModelMeta):
         constraints = [
             models.UniqueConstraint(
@@ -32,16 +35,26 @@ class Counter(models.Model):
     project = models.OneToOneField(Project, on_delete=models.CASCADE)
     number = models.IntegerField(default=0)
 
+    # A single statement creates or increments the row, so concurrent callers
+    # never get the same numbers
     @classmethod
-    def get_next(cls, project: Project):
-        counter = cls.objects.filter(project=project).first()
-
-        if counter is None:
-            counter = cls.objects.create(project=project)
+    def reserve(cls, project_id: int, count: int) -> list[int]:
+        table = cls._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (project_id, number) VALUES (%s, %s) "
+                f"ON CONFLICT (project_id) DO UPDATE "
+                f"SET number = {table}.number + EXCLUDED.number "
+                "RETURNING number",
+                [project_id, count],
+            )
+            last = cursor.fetchone()[0]
+
+        return list(range(last - count + 1, last + 1))
 
-        counter.number += 1
-
-        return counter
+    @classmethod
+    def get_next(cls, project: Project) -> int:
+        return cls.reserve(project.pk, 1)[0]
 
 
 class Message(models.Model):
@@ -95,3 +108,34 @@ class History(models.Model):
         choices=Issue.Status.choices, blank=True, null=True
     )
     title = models.TextField(null=True, blank=True)
+
+    class Meta(TypedModelMeta):
+        indexes = [
+            models.Index(
+                fields=["issue", "created_at"],
+                name="history_issue_created_idx",
+            ),
+        ]
+
+
+class ImportJob(models.Model):
+    class Status(models.IntegerChoices):
+        PENDING = 1, _("Pending")
+        RUNNING = 2, _("Running")
+        DONE = 3, _("Done")
+        FAILED = 4, _("Failed")
+
+    class Format(models.TextChoices):
+        CSV = "csv", "CSV"
+        NDJSON = "ndjson", "NDJSON"
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    path = models.TextField()
+    format = models.TextField(choices=Format.choices)
+    status = models.IntegerField(choices=Status.choices, default=Status.PENDING)
+    total = models.IntegerField(null=True, blank=True)
+    processed = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default="")
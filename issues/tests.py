@@ -1,3 +1,79 @@
-from django.test import TestCase
+import os
+import tempfile
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+
+from issues.importer import ImportFailed, _map_users, _validate, read_records
+from issues.models import ImportJob, Issue
+from projects.models import Project, ProjectMember
+from users.models import User
+
+
+class RecordTests(SimpleTestCase):
+    def test_csv_comments_are_parsed(self):
+        record = _validate({"title": "A", "comments": '[{"body": "b"}]'}, 1)
+        self.assertEqual(record["comments"], [{"body": "b"}])
+
+    def test_missing_comments(self):
+        self.assertEqual(
+            _validate({"title": "A", "comments": ""}, 1)["comments"], []
+        )
+        self.assertEqual(_validate({"title": "A"}, 1)["comments"], [])
+
+    def test_invalid_records_fail(self):
+        for record in [
+            ["not", "an", "object"],
+            "text",
+            {"title": "A", "comments": "not json"},
+            {"title": "A", "comments": '"text"'},
+            {"title": "A", "comments": ["text"]},
+            {"comments": []},
+            {"title": "  "},
+            {"title": "A", "status": "unknown"},
+            {"title": "A", "status": 99},
+        ]:
+            with self.subTest(record=record):
+                with self.assertRaises(ImportFailed):
+                    _validate(record, 1)
+
+    def test_title_and_status_are_parsed(self):
+        record = _validate({"title": " A ", "status": "done"}, 1)
+        self.assertEqual(record["title"], "A")
+        self.assertEqual(record["status"], Issue.Status.DONE)
+        self.assertEqual(
+            _validate({"title": "A"}, 1)["status"], Issue.Status.OPEN
+        )
+
+    def test_invalid_json_line_fails(self):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".ndjson", delete=False
+        ) as f:
+            f.write('{"title": "A"}\n{broken\n')
+        self.addCleanup(os.remove, f.name)
+
+        with self.assertRaisesMessage(ImportFailed, "Line 2"):
+            list(read_records(f.name, ImportJob.Format.NDJSON))
+
+
+class MapUsersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(name="Project")
+        cls.member = User.objects.create(username="member", email="m@a.com")
+        cls.invited = User.objects.create(username="invited")
+        cls.outsider = User.objects.create(username="outsider")
+        ProjectMember.objects.create(
+            project=cls.project, user=cls.member, accepted=True
+        )
+        ProjectMember.objects.create(project=cls.project, user=cls.invited)
+
+    def test_only_members_are_matched(self):
+        records = [
+            {"created_by": "member", "comments": [{"created_by": "m@a.com"}]},
+            {"created_by": "invited", "comments": []},
+            {"created_by": "outsider", "comments": []},
+        ]
+        self.assertEqual(
+            _map_users(records, self.project.pk),
+            {"member": self.member.pk, "m@a.com": self.member.pk},
+        )
@@ -6,6 +6,8 @@ app_name = "issues"
 urlpatterns = [
     path("issues", views.issue_list.IssueList.as_view(), name="list"),
     path("issues/new", views.new.NewIssue.as_view(), name="new"),
+    path("issues/bulk", views.bulk.bulk, name="bulk"),
+    path("issues/import", views.importer.Import.as_view(), name="import"),
     path("issues/<int:number>", views.issue.issue, name="issue"),
     path(
         "issues/<int:number>/rename",
@@ -1 +1 @@
-from . import issue, issue_list, new
+from . import bulk, importer, issue, issue_list, new
@@ -0,0 +1,111 @@
+from django.http.response import HttpResponseBadRequest
+from django.utils.translation import gettext as _
+from django.views.decorators.http import require_POST
+from django_htmx.http import HttpResponseClientRefresh
+
+from core.htmx import show_message
+from core.typing import HttpRequest
+from issues import bulk as bulk_actions
+from issues.models import Issue
+from projects.models import ProjectMember, Team
+from users.decorators import login_required, project_required
+
+
+def _int(value: str | None) -> int | None:
+    try:
+        return int(value or "")
+    except ValueError:
+        return None
+
+
+def _bad_request(message: str):
+    return show_message(
+        HttpResponseBadRequest(),  # type: ignore
+        "error",
+        message,
+    )
+
+
+@login_required
+@project_required
+@require_POST
+def bulk(request: HttpRequest):
+    project = request.selected_project.project
+    action = request.POST.get("action")
+
+    try:
+        issue_ids = [int(pk) for pk in request.POST.getlist("issues")]
+    except ValueError:
+        issue_ids = []
+
+    if not issue_ids:
+        return _bad_request(_("No issues selected."))
+
+    if action == "status":
+        status = _int(request.POST.get("status"))
+        if status not in Issue.Status.values:
+            return _bad_request(_("Invalid status"))
+
+        issues = bulk_actions.editable_issues(
+            project,
+            request.user,
+            issue_ids,
+            request.selected_project.can_change_issue_status,
+        )
+        bulk_actions.change_status(issues, request.user, status)
+    elif action == "duplicate":
+        original = Issue.objects.filter(
+            project=project,
+            number=_int(request.POST.get("original")),
+        ).first()
+        if original is None:
+            return _bad_request(_("Issue not found"))
+
+        issues = bulk_actions.editable_issues(
+            project,
+            request.user,
+            issue_ids,
+            request.selected_project.can_change_issue_status,
+        )
+        bulk_actions.close_as_duplicate(issues, request.user, original)
+    elif action == "assign_user":
+        member = (
+            ProjectMember.objects.select_related("user")
+            .filter(
+                project=project,
+                user_id=_int(request.POST.get("user")),
+                accepted=True,
+                rejected=False,
+            )
+            .first()
+        )
+        if member is None:
+            return _bad_request(_("User not found"))
+
+        issues = bulk_actions.editable_issues(
+            project,
+            request.user,
+            issue_ids,
+            request.selected_project.can_assign_to_issue,
+        )
+        bulk_actions.assign_user(issues, request.user, member.user)
+    elif action == "assign_team":
+        team = Team.objects.filter(
+            project=project,
+            pk=_int(request.POST.get("team")),
+            deleting=False,
+        ).first()
+        if team is None:
+            return _bad_request(_("Team not found"))
+
+        issues = bulk_actions.editable_issues(
+            project,
+            request.user,
+            issue_ids,
+            request.selected_project.can_assign_to_issue,
+        )
+        bulk_actions.assign_team(issues, request.user, team)
+    else:
+        return _bad_request(_("Invalid action"))
+
+    return HttpResponseClientRefresh()
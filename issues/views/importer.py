@@ -0,0 +1,111 @@
+import os
+import uuid
+
+from django.core.files.storage import default_storage
+from django.http.response import HttpResponseBadRequest, HttpResponseForbidden
+from django.shortcuts import get_object_or_404, render
+from django.utils.decorators import method_decorator
+from django.utils.translation import gettext as _
+from django.views import View
+
+from core.htmx import render_htmx, show_message
+from core.typing import HttpRequest
+from issues.importer import UPLOAD_DIR
+from issues.models import ImportJob
+from users.decorators import login_required, project_required
+
+
+class Import(View):
+    def forbidden(self):
+        return show_message(
+            HttpResponseForbidden(),  # type: ignore
+            "error",
+            _("Only the owner of a project can import issues."),
+        )
+
+    def jobs(self, request: HttpRequest):
+        return ImportJob.objects.filter(
+            project=request.selected_project.project
+        ).order_by("-created_at")[:10]
+
+    @method_decorator(login_required)
+    @method_decorator(project_required)
+    def get(self, request: HttpRequest):
+        if not request.selected_project.can_import_issues:
+            return self.forbidden()
+
+        job_id = request.GET.get("job")
+        if job_id:
+            job = get_object_or_404(
+                ImportJob,
+                pk=job_id,
+                project=request.selected_project.project,
+            )
+            return render(request, "issues/import-job.html", {"job": job})
+
+        return render_htmx(
+            request,
+            "issues/import.html",
+            {
+                "jobs": self.jobs(request),
+                "formats": ImportJob.Format.choices,
+            },
+        )
+
+    @method_decorator(login_required)
+    @method_decorator(project_required)
+    def post(self, request: HttpRequest):
+        if not request.selected_project.can_import_issues:
+            return self.forbidden()
+
+        upload = request.FILES.get("file")
+        format = request.POST.get("format")
+        if upload is None or format not in ImportJob.Format.values:
+            return show_message(
+                HttpResponseBadRequest(),  # type: ignore
+                "error",
+                _("Select a CSV or NDJSON file to import."),
+            )
+
+        name = default_storage.save(
+            os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}.{format}"), upload
+        )
+        ImportJob.objects.create(
+            project=request.selected_project.project,
+            created_by=request.user,
+            path=default_storage.path(name),
+            format=format,
+        )
+
+        return render_htmx(
+            request,
+            "issues/import.html",
+            {
+                "jobs": self.jobs(request),
+                "formats": ImportJob.Format.choices,
+            },
+        )
+
+    @method_decorator(login_required)
+    @method_decorator(project_required)
+    def put(self, request: HttpRequest):
+        if not request.selected_project.can_import_issues:
+            return self.forbidden()
+
+        job = get_object_or_404(
+            ImportJob,
+            pk=request.GET.get("job"),
+            project=request.selected_project.project,
+            status=ImportJob.Status.FAILED,
+        )
+        if not os.path.exists(job.path):
+            return show_message(
+                HttpResponseBadRequest(),  # type: ignore
+                "error",
+                _("The file of this import is no longer available."),
+            )
+
+        job.status = ImportJob.Status.PENDING
+        job.save()
+
+        return render(request, "issues/import-job.html", {"job": job})
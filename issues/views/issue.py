@@ -7,19 +7,21 @@ from django.http.response import (HttpResponseBadRequest,
                                   HttpResponseForbidden, JsonResponse)
 from django.shortcuts import get_object_or_404, render
 from django.template.loader import render_to_string
-from django.templatetags.static import static
 from django.utils.decorators import method_decorator
 from django.utils.translation import gettext as _
 from django.views import View
 from django.views.decorators.http import require_POST
 from django_htmx.http import HttpResponseClientRefresh
 
+from core import autocomplete
 from core.htmx import render_htmx, show_message
+from core.ratelimit import rate_limit
 from core.typing import HttpRequest, HttpResponse
 from issues.models import Assignment, History, Issue, Message
 from projects.models import ProjectMember, Team, TeamMember
+from users import display, notifications
 from users.decorators import login_required, project_required
-from users.models import Notification, NotificationType, User
+from users.models import User
 
 
 @login_required
@@ -28,18 +30,17 @@ def issue(request: HttpRequest, number: int):
     issue = get_object_or_404(
         Issue, project=request.selected_project.project, number=number
     )
-    history = (
+    history = list(
         History.objects.filter(issue=issue)
         .select_related(
-            "assignment__user",
+            "assignment",
             "assignment__team",
             "message",
-            "user",
         )
         .order_by("created_at")
     )
     assignments = (
-        Assignment.objects.select_related("user", "team")
+        Assignment.objects.select_related("team")
         .filter(issue=issue)
         .order_by(
             "user__first_name",
@@ -56,6 +57,13 @@ def issue(request: HttpRequest, number: int):
         a for a in assignments if a.type == Assignment.Type.TEAM
     ]
 
+    display.get_many(
+        [issue.created_by_id]  # type: ignore
+        + [change.user_id for change in history]  # type: ignore
+        + [change.assignment.user_id for change in history if change.assignment]
+        + [a.user_id for a in user_assignments]  # type: ignore
+    )
+
     return render_htmx(
         request,
         "issues/issue.html",
@@ -225,6 +233,7 @@ def comment(request: HttpRequest, number: int):
 class AssignUser(View):
     @method_decorator(login_required)
     @method_decorator(project_required)
+    @method_decorator(rate_limit("autocomplete", when=autocomplete.is_search))
     def get(self, request: HttpRequest, number: int):
         issue = get_object_or_404(
             Issue, project=request.selected_project.project, number=number
@@ -254,27 +263,38 @@ class AssignUser(View):
                 rejected=False,
             ).values_list("user_id", flat=True)
 
-            filter = request.GET.get("filter") or ""
-            users = (
-                User.objects.annotate(
-                    fullname=Concat("first_name", Value(" "), "last_name")
+            def find(filter: str, limit: int) -> list[autocomplete.Option]:
+                users = (
+                    User.objects.annotate(
+                        fullname=Concat("first_name", Value(" "), "last_name")
+                    )
+                    .exclude(pk__in=assigned_ids)
+                    .filter(
+                        Q(fullname__istartswith=filter)
+                        | Q(username__istartswith=filter)
+                    )
+                    .filter(pk__in=member_ids)
+                    .order_by("username")
                 )
-                .exclude(pk__in=assigned_ids)
-                .filter(
-                    Q(fullname__istartswith=filter)
-                    | Q(username__istartswith=filter)
-                )
-                .filter(pk__in=member_ids)
-            )
-
-            options = [
-                {
-                    "value": user.pk,
-                    "label": user.fullname.strip() or user.username,  # type: ignore
-                }
-                for user in users
-            ]
 
+                return [
+                    autocomplete.option(
+                        user.pk,
+                        user.fullname.strip() or user.username,  # type: ignore
+                        user.fullname,  # type: ignore
+                        user.username,
+                    )
+                    for user in users[:limit]
+                ]
+
+            options = autocomplete.options(
+                request,
+                [
+                    f"issue:{issue.pk}:users",
+                    f"project:{issue.project_id}:members",  # type: ignore
+                ],
+                find,
+            )
             return JsonResponse(options, safe=False)
 
         response = render(
@@ -327,17 +347,12 @@ class AssignUser(View):
                 type=Assignment.Type.USER,
                 user=user,
             )
-            Notification.objects.create(
-                user=user,
-                notification_type=NotificationType.ISSUE_ASSIGNMENT,
-                issue_assignment=assignment,
+            autocomplete.invalidate(f"issue:{issue.pk}:users")
+            notifications.send(
+                [notifications.issue_assignment(user, assignment)]
             )
 
-            picture_url = ""
-            if user.picture:
-                picture_url = user.picture.url
-            else:
-                picture_url = static("img/profile-placeholder.png")
+            user_display = display.get(user.pk)
 
             response = HttpResponse(
                 f"""
@@ -345,10 +360,10 @@ class AssignUser(View):
                         <div class="flex flex-row items-center justify-start gap-2">
                             <img
                               class="object-contain w-8 h-8 rounded-full overflow-hidden"
-                              src="{picture_url}"
+                              src="{user_display.avatars["small"]}"
                               alt="{_('Profile picture')}"
                             />
-                            <p>{user.get_name()}</p>
+                            <p>{user_display}</p>
                         </div>
                     </div>
                     <p hx-swap-oob="delete:#no-users-assigned-p"></p>
@@ -375,6 +390,7 @@ class AssignUser(View):
 class AssignTeam(View):
     @method_decorator(login_required)
     @method_decorator(project_required)
+    @method_decorator(rate_limit("autocomplete", when=autocomplete.is_search))
     def get(self, request: HttpRequest, number: int):
         issue = get_object_or_404(
             Issue, project=request.selected_project.project, number=number
@@ -398,19 +414,29 @@ class AssignTeam(View):
                 type=Assignment.Type.TEAM,
             ).values_list("team_id", flat=True)
 
-            filter = request.GET.get("filter") or ""
-            teams = Team.objects.exclude(pk__in=assigned_ids).filter(
-                name__istartswith=filter
-            )
-
-            options = [
-                {
-                    "value": team.pk,
-                    "label": team.name,
-                }
-                for team in teams
-            ]
+            def find(filter: str, limit: int) -> list[autocomplete.Option]:
+                teams = (
+                    Team.objects.exclude(pk__in=assigned_ids)
+                    .filter(
+                        name__istartswith=filter,
+                        deleting=False,
+                    )
+                    .order_by("name")
+                )
 
+                return [
+                    autocomplete.option(team.pk, team.name, team.name)
+                    for team in teams[:limit]
+                ]
+
+            options = autocomplete.options(
+                request,
+                [
+                    f"issue:{issue.pk}:teams",
+                    f"project:{issue.project_id}:teams",  # type: ignore
+                ],
+                find,
+            )
             return JsonResponse(options, safe=False)
 
         response = render(
@@ -445,7 +471,7 @@ class AssignTeam(View):
         team_id = request.POST.get("team")
 
         team_error = ""
-        team = Team.objects.filter(pk=team_id).first()
+        team = Team.objects.filter(pk=team_id, deleting=False).first()
         if team is None:
             team_error = _("Team not found")
 
@@ -467,13 +493,16 @@ class AssignTeam(View):
                 type=Assignment.Type.TEAM,
                 team=team,
             )
-
-            for t_member in team_members:
-                Notification.objects.create(
-                    user=t_member.member.user,
-                    notification_type=NotificationType.ISSUE_ASSIGNMENT,
-                    issue_assignment=assignment,
-                )
+            autocomplete.invalidate(f"issue:{issue.pk}:teams")
+
+            notifications.send(
+                [
+                    notifications.issue_assignment(
+                        t_member.member.user, assignment
+                    )
+                    for t_member in team_members
+                ]
+            )
 
             response = HttpResponse(
                 f"""
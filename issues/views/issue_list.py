@@ -3,8 +3,10 @@ from django.db.models import Model
 from django.utils.decorators import method_decorator
 from django.views.generic.list import ListView
 from core.htmx import render_htmx
+from core.paginator import CachedPaginator
 from core.typing import HttpRequest
 from issues.models import Issue
+from projects.models import ProjectMember, Team
 from users.decorators import login_required, project_required
 
 
@@ -12,10 +14,38 @@ class IssueList(ListView):
     request: HttpRequest
     model: type[Model] = Issue
     paginate_by = 15
+    paginator_class = CachedPaginator
     allow_empty = True
     template_name: str = "issues/list.html"
     ordering = ["-created_at"]
 
+    def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+
+        project = self.request.selected_project.project
+        context.update(
+            {
+                "IssueStatus": Issue.Status,
+                "bulk_members": ProjectMember.objects.filter(
+                    project=project,
+                    accepted=True,
+                    rejected=False,
+                )
+                .select_related("user")
+                .order_by(
+                    "user__first_name",
+                    "user__last_name",
+                    "user__username",
+                ),
+                "bulk_teams": Team.objects.filter(
+                    project=project,
+                    deleting=False,
+                ).order_by("name"),
+            }
+        )
+
+        return context
+
     def render_to_response(self, context: dict[str, Any], **_: Any):
         return render_htmx(self.request, self.template_name, context)
 
@@ -34,4 +64,6 @@ class IssueList(ListView):
                 ordering = (ordering,)
             qs = qs.order_by(*ordering)
 
-        return qs.distinct()
+        return qs.distinct().cached(
+            scope=self.request.selected_project.project.pk
+        )
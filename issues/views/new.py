@@ -51,11 +51,11 @@ class NewIssue(View):
                 _("The issue description is required."),
             )
 
-        counter = Counter.get_next(request.selected_project.project)
+        number = Counter.get_next(request.selected_project.project)
         try:
             issue = Issue.objects.create(
                 project=request.selected_project.project,
-                number=counter.number,
+                number=number,
                 created_by=request.user,
                 title=title,
             )
@@ -77,8 +77,6 @@ class NewIssue(View):
                 _("Server error"),
             )
 
-        counter.save()
-
         return HttpResponseClientRedirect(
             reverse("issues:issue", args=[issue.number])
         )
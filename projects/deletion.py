@@ -0,0 +1,205 @@
+from datetime import timedelta
+from typing import Callable
+
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from analytics.models import IssueMetrics
+from issues.models import (
+    Assignment,
+    Counter,
+    History,
+    ImportJob,
+    Issue,
+    Message,
+)
+from projects.models import (
+    DeletionJob,
+    Project,
+    ProjectMember,
+    Team,
+    TeamMember,
+)
+from users.models import Notification, User
+
+BATCH_SIZE = 1000
+
+# A failed job runs again after RETRY_AFTER, doubled on every attempt. After
+# MAX_ATTEMPTS the deletion is given up and the target is shown again, so it
+# can be deleted anew.
+MAX_ATTEMPTS = 5
+RETRY_AFTER = timedelta(minutes=1)
+
+
+class DeletionCancelled(Exception):
+    pass
+
+
+def project_steps(project: Project) -> list[QuerySet]:
+    return [
+        Notification.objects.filter(project_invitation__project=project),
+        Notification.objects.filter(team_assignment__team__project=project),
+        Notification.objects.filter(issue_assignment__issue__project=project),
+        Notification.objects.filter(
+            group_key__in=[
+                f"team_assignment:{project.pk}",
+                f"issue_assignment:{project.pk}",
+            ]
+        ),
+        IssueMetrics.objects.filter(project=project),
+        History.objects.filter(issue__project=project),
+        Assignment.objects.filter(issue__project=project),
+        Message.objects.filter(issue__project=project),
+        Issue.objects.filter(project=project),
+        TeamMember.objects.filter(team__project=project),
+        Team.objects.filter(project=project),
+        ProjectMember.objects.filter(project=project),
+        ImportJob.objects.filter(project=project),
+        Counter.objects.filter(project=project),
+    ]
+
+
+def team_steps(team: Team) -> list[QuerySet]:
+    return [
+        Notification.objects.filter(team_assignment__team=team),
+        Notification.objects.filter(issue_assignment__team=team),
+        History.objects.filter(assignment__team=team),
+        Assignment.objects.filter(team=team),
+        TeamMember.objects.filter(team=team),
+    ]
+
+
+def delete_in_batches(
+    queryset: QuerySet,
+    batch_size: int,
+    cancelled: Callable[[], bool] | None = None,
+):
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return
+
+        if cancelled is not None and cancelled():
+            raise DeletionCancelled()
+
+        with transaction.atomic():
+            queryset.model.objects.filter(pk__in=ids).delete()
+
+        yield len(ids)
+
+
+def release(job: DeletionJob):
+    # Rows deleted by the batches that already ran stay deleted
+    if job.project_id is not None:  # type: ignore
+        Project.objects.filter(pk=job.project_id).update(  # type: ignore
+            deleting=False
+        )
+    if job.team_id is not None:  # type: ignore
+        Team.objects.filter(pk=job.team_id).update(  # type: ignore
+            deleting=False
+        )
+
+
+def cancel(job: DeletionJob) -> bool:
+    """Stops an unfinished job before its next batch."""
+    cancelled = DeletionJob.objects.filter(
+        pk=job.pk,
+        status__in=[
+            DeletionJob.Status.PENDING,
+            DeletionJob.Status.RUNNING,
+            DeletionJob.Status.FAILED,
+        ],
+    ).update(status=DeletionJob.Status.CANCELLED, retry_at=None)
+    if cancelled:
+        job.status = DeletionJob.Status.CANCELLED
+        job.retry_at = None
+        release(job)
+
+    return bool(cancelled)
+
+
+def is_cancelled(job: DeletionJob) -> bool:
+    return DeletionJob.objects.filter(
+        pk=job.pk, status=DeletionJob.Status.CANCELLED
+    ).exists()
+
+
+def next_job() -> DeletionJob | None:
+    return (
+        DeletionJob.objects.filter(
+            Q(
+                status__in=[
+                    DeletionJob.Status.PENDING,
+                    DeletionJob.Status.RUNNING,
+                ]
+            )
+            | Q(
+                status=DeletionJob.Status.FAILED,
+                retry_at__lte=timezone.now(),
+            )
+        )
+        .order_by("created_at")
+        .first()
+    )
+
+
+def run_deletion(
+    job: DeletionJob,
+    batch_size: int = BATCH_SIZE,
+    progress: Callable[[DeletionJob], None] | None = None,
+):
+    job.status = DeletionJob.Status.RUNNING
+    job.error = ""
+    job.retry_at = None
+    job.attempts += 1
+    job.save()
+
+    try:
+        if job.project is not None:
+            target = job.project
+            steps = project_steps(job.project)
+        elif job.team is not None:
+            target = job.team
+            steps = team_steps(job.team)
+        else:
+            target = None
+            steps = []
+
+        for queryset in steps:
+            job.step = str(queryset.model._meta.verbose_name_plural)
+            for deleted in delete_in_batches(
+                queryset, batch_size, lambda: is_cancelled(job)
+            ):
+                job.deleted += deleted
+                job.save(update_fields=["step", "deleted", "updated_at"])
+
+                if progress is not None:
+                    progress(job)
+
+        if isinstance(target, Project):
+            User.objects.filter(last_project=target).update(last_project=None)
+        if target is not None:
+            target.delete()
+
+        job.project = None
+        job.team = None
+    except DeletionCancelled:
+        job.status = DeletionJob.Status.CANCELLED
+        job.save(update_fields=["status", "updated_at"])
+        return
+    except Exception as e:
+        job.status = DeletionJob.Status.FAILED
+        job.error = repr(e)
+        if job.attempts < MAX_ATTEMPTS:
+            job.retry_at = timezone.now() + RETRY_AFTER * 2 ** (
+                job.attempts - 1
+            )
+        else:
+            release(job)
+        job.save()
+        raise
+
+    job.status = DeletionJob.Status.DONE
+    job.step = ""
+    job.save()
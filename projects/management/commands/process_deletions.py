@@ -0,0 +1,83 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from projects.deletion import BATCH_SIZE, cancel, next_job, run_deletion
+from projects.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = "Deletes the projects and teams scheduled for deletion in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--worker",
+            action="store_true",
+            help="Keep waiting for new deletions instead of exiting",
+        )
+        parser.add_argument("--poll", type=float, default=5)
+        parser.add_argument(
+            "--status",
+            action="store_true",
+            help="Only list the unfinished deletions and their progress",
+        )
+        parser.add_argument(
+            "--cancel",
+            type=int,
+            metavar="JOB_ID",
+            help="Stop a deletion and show its project or team again",
+        )
+
+    def progress(self, job: DeletionJob):
+        self.stdout.write(
+            f"Deletion {job.pk} ({job.label}): {job.deleted} rows, {job.step}"
+        )
+
+    def handle(self, *args, **options):
+        if options["cancel"] is not None:
+            job = DeletionJob.objects.get(pk=options["cancel"])
+            if cancel(job):
+                self.stdout.write(f"Deletion {job.pk} ({job.label}) cancelled")
+            else:
+                self.stderr.write(f"Deletion {job.pk} already finished")
+            return
+
+        if options["status"]:
+            pending = DeletionJob.objects.exclude(
+                status__in=[
+                    DeletionJob.Status.DONE,
+                    DeletionJob.Status.CANCELLED,
+                ]
+            ).order_by("created_at")
+            for job in pending:
+                self.stdout.write(
+                    f"{job.pk}\t{job.get_status_display()}\t{job.label}\t"
+                    f"{job.deleted} rows\t{job.step}\t"
+                    f"attempt {job.attempts}\t{job.retry_at or ''}\t"
+                    f"{job.error}"
+                )
+            return
+
+        while True:
+            job = next_job()
+
+            if job is None:
+                if not options["worker"]:
+                    return
+
+                time.sleep(options["poll"])
+                continue
+
+            try:
+                run_deletion(job, options["batch_size"], self.progress)
+            except Exception as e:
+                self.stderr.write(f"Deletion {job.pk} failed: {e!r}")
+                if not options["worker"]:
+                    raise
+                continue
+
+            if job.status == DeletionJob.Status.CANCELLED:
+                self.stdout.write(f"Deletion {job.pk} ({job.label}) cancelled")
+            else:
+                self.stdout.write(f"Deletion {job.pk} ({job.label}) finished")
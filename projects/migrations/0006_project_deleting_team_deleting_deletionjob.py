@@ -0,0 +1,74 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0005_alter_project_name_alter_team_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="deleting",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="team",
+            name="deleting",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name="DeletionJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("label", models.TextField()),
+                (
+                    "status",
+                    models.IntegerField(
+                        choices=[
+                            (1, "Pending"),
+                            (2, "Running"),
+                            (3, "Done"),
+                            (4, "Failed"),
+                        ],
+                        default=1,
+                    ),
+                ),
+                ("step", models.TextField(blank=True, default="")),
+                ("deleted", models.IntegerField(default=0)),
+                ("error", models.TextField(blank=True, default="")),
+                (
+                    "project",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="projects.project",
+                    ),
+                ),
+                (
+                    "team",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="projects.team",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0006_project_deleting_team_deleting_deletionjob"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="projectmember",
+            index=models.Index(
+                condition=models.Q(("accepted", True), ("rejected", False)),
+                fields=["user"],
+                name="member_accepted_user_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="projectmember",
+            index=models.Index(
+                condition=models.Q(("accepted", True), ("rejected", False)),
+                fields=["project"],
+                name="member_accepted_project_idx",
+            ),
+        ),
+    ]
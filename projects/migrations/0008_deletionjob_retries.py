@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0007_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="deletionjob",
+            name="attempts",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="deletionjob",
+            name="retry_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="deletionjob",
+            name="status",
+            field=models.IntegerField(
+                choices=[
+                    (1, "Pending"),
+                    (2, "Running"),
+                    (3, "Done"),
+                    (4, "Failed"),
+                    (5, "Cancelled"),
+                ],
+                default=1,
+            ),
+        ),
+    ]
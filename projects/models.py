@@ -2,6 +2,8 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django_stubs_ext.db.models import TypedModelMeta
 
+from core.querycache import CachedQuerySet
+
 
 class Role(models.IntegerChoices):
     OWNER = 1, _("Owner")
@@ -13,14 +15,17 @@ class Role(models.IntegerChoices):
 class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     name = models.TextField(verbose_name=_("Name"))
+    deleting = models.BooleanField(default=False)
+
+    objects = CachedQuerySet.as_manager()
 
     def try_delete(self) -> tuple[bool, str]:
-        try:
-            self.delete()
-        except Exception as e:
-            return False, repr(
-                e
-            )  # TODO: Treat possible reasons and return meaningful messages
+        if self.deleting:
+            return False, _("This project is already being deleted.")
+
+        self.deleting = True
+        self.save(update_fields=["deleting"])
+        DeletionJob.objects.create(project=self, label=self.name)
 
         return True, ""
 
@@ -33,6 +38,8 @@ class ProjectMember(models.Model):
     accepted = models.BooleanField(default=False)
     rejected = models.BooleanField(default=False)
 
+    objects = CachedQuerySet.as_manager()
+
     class Meta(TypedModelMeta):
         constraints = [
             models.UniqueConstraint(
@@ -40,20 +47,35 @@ class ProjectMember(models.Model):
                 name="unique_project_member",
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=["user"],
+                condition=models.Q(accepted=True, rejected=False),
+                name="member_accepted_user_idx",
+            ),
+            models.Index(
+                fields=["project"],
+                condition=models.Q(accepted=True, rejected=False),
+                name="member_accepted_project_idx",
+            ),
+        ]
 
 
 class Team(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     name = models.TextField(verbose_name=_("Name"))
+    deleting = models.BooleanField(default=False)
+
+    objects = CachedQuerySet.as_manager()
 
     def try_delete(self) -> tuple[bool, str]:
-        try:
-            self.delete()
-        except Exception as e:
-            return False, repr(
-                e
-            )  # TODO: Treat possible reasons and return meaningful messages
+        if self.deleting:
+            return False, _("This team is already being deleted.")
+
+        self.deleting = True
+        self.save(update_fields=["deleting"])
+        DeletionJob.objects.create(team=self, label=self.name)
 
         return True, ""
 
@@ -63,6 +85,8 @@ class TeamMember(models.Model):
     team = models.ForeignKey(Team, on_delete=models.CASCADE)
     member = models.ForeignKey(ProjectMember, on_delete=models.CASCADE)
 
+    objects = CachedQuerySet.as_manager()
+
     class Meta(TypedModelMeta):
         constraints = [
             models.UniqueConstraint(
@@ -70,3 +94,29 @@ class TeamMember(models.Model):
                 name="unique_team_member",
             ),
         ]
+
+
+class DeletionJob(models.Model):
+    class Status(models.IntegerChoices):
+        PENDING = 1, _("Pending")
+        RUNNING = 2, _("Running")
+        DONE = 3, _("Done")
+        FAILED = 4, _("Failed")
+        CANCELLED = 5, _("Cancelled")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    project = models.ForeignKey(
+        Project, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    team = models.ForeignKey(
+        Team, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    label = models.TextField()
+    status = models.IntegerField(choices=Status.choices, default=Status.PENDING)
+    step = models.TextField(blank=True, default="")
+    deleted = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    attempts = models.IntegerField(default=0)
+    # When a failed job runs again, none once it ran out of attempts
+    retry_at = models.DateTimeField(null=True, blank=True)
@@ -1,3 +1,151 @@
+from datetime import timedelta
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+
+from issues.models import Issue, Message
+from projects import deletion
+from projects.models import DeletionJob, Project, ProjectMember, Team
+from users.models import User
+
+
+class DeletionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="owner")
+
+    def setUp(self):
+        self.project = Project.objects.create(name="Project")
+        ProjectMember.objects.create(
+            project=self.project, user=self.user, accepted=True
+        )
+        self.team = Team.objects.create(project=self.project, name="Team")
+        issues = Issue.objects.bulk_create(
+            [
+                Issue(
+                    project=self.project,
+                    number=number,
+                    created_by=self.user,
+                    title=f"Issue {number}",
+                )
+                for number in range(1, 6)
+            ]
+        )
+        Message.objects.bulk_create(
+            [
+                Message(issue=issue, created_by=self.user, body={})
+                for issue in issues
+            ]
+        )
+
+    def start(self) -> DeletionJob:
+        deleted, _ = self.project.try_delete()
+        self.assertTrue(deleted)
+        return DeletionJob.objects.get(project=self.project)
+
+    def test_batches_report_progress(self):
+        job = self.start()
+        seen = []
+        deletion.run_deletion(
+            job, 2, lambda job: seen.append((job.step, job.deleted))
+        )
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, DeletionJob.Status.DONE)
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        self.assertFalse(Issue.objects.filter(project=self.project).exists())
+        # 5 messages and 5 issues in batches of 2, the team and the member
+        self.assertEqual(job.deleted, 12)
+        self.assertEqual(len(seen), 8)
+        self.assertEqual(
+            [deleted for _, deleted in seen],
+            sorted(deleted for _, deleted in seen),
+        )
+
+    def test_cancel_stops_before_the_next_batch(self):
+        job = self.start()
+        deletion.run_deletion(job, 2, lambda job: deletion.cancel(job))
+
+        job.refresh_from_db()
+        self.project.refresh_from_db()
+        self.assertEqual(job.status, DeletionJob.Status.CANCELLED)
+        self.assertEqual(job.deleted, 2)
+        self.assertFalse(self.project.deleting)
+        self.assertIsNone(deletion.next_job())
+
+        # The project can be deleted again
+        deleted, _ = self.project.try_delete()
+        self.assertTrue(deleted)
+
+    def test_cancel_of_a_finished_job(self):
+        job = self.start()
+        deletion.run_deletion(job)
+        self.assertFalse(deletion.cancel(job))
+
+    def test_failed_job_is_retried_later(self):
+        job = self.start()
+        with mock.patch.object(
+            deletion, "delete_in_batches", side_effect=RuntimeError("down")
+        ):
+            with self.assertRaises(RuntimeError):
+                deletion.run_deletion(job)
+
+        job.refresh_from_db()
+        self.project.refresh_from_db()
+        self.assertEqual(job.status, DeletionJob.Status.FAILED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("down", job.error)
+        self.assertGreater(job.retry_at, timezone.now())
+        self.assertTrue(self.project.deleting)
+        self.assertIsNone(deletion.next_job())
+
+        job.retry_at = timezone.now() - timedelta(seconds=1)
+        job.save()
+        self.assertEqual(deletion.next_job(), job)
+
+        deletion.run_deletion(deletion.next_job())  # type: ignore
+        job.refresh_from_db()
+        self.assertEqual(job.status, DeletionJob.Status.DONE)
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+
+    def test_backoff_doubles(self):
+        job = self.start()
+        job.attempts = 2
+        job.save()
+        with mock.patch.object(
+            deletion, "delete_in_batches", side_effect=RuntimeError("down")
+        ):
+            with self.assertRaises(RuntimeError):
+                deletion.run_deletion(job)
+
+        job.refresh_from_db()
+        self.assertGreater(
+            job.retry_at,
+            timezone.now() + deletion.RETRY_AFTER * 4 - timedelta(seconds=5),
+        )
+
+    def test_last_attempt_gives_up(self):
+        job = self.start()
+        job.attempts = deletion.MAX_ATTEMPTS - 1
+        job.save()
+        with mock.patch.object(
+            deletion, "delete_in_batches", side_effect=RuntimeError("down")
+        ):
+            with self.assertRaises(RuntimeError):
+                deletion.run_deletion(job)
+
+        job.refresh_from_db()
+        self.project.refresh_from_db()
+        self.assertEqual(job.status, DeletionJob.Status.FAILED)
+        self.assertIsNone(job.retry_at)
+        self.assertFalse(self.project.deleting)
+        self.assertIsNone(deletion.next_job())
+
+    def test_team_deletion_keeps_the_project(self):
+        deleted, _ = self.team.try_delete()
+        self.assertTrue(deleted)
+        deletion.run_deletion(DeletionJob.objects.get(team=self.team))
 
-# Create your tests here.
+        self.assertFalse(Team.objects.filter(pk=self.team.pk).exists())
+        self.assertTrue(Project.objects.filter(pk=self.project.pk).exists())
@@ -24,11 +24,15 @@ def select_project(
             return
 
     if member.accepted and not member.rejected:
-        request.session["selected_project"] = SelectedProjectSession(
+        selected_project = SelectedProjectSession(
             project_id=project.pk, member_id=member.pk, role=member.role
         )
-        user.last_project = project
-        user.save()
+        if request.session.get("selected_project") != selected_project:
+            request.session["selected_project"] = selected_project
+
+        if user.last_project_id != project.pk:  # type: ignore
+            user.last_project = project
+            user.save(update_fields=["last_project"])
 
 
 def get_selected_project(request: HttpRequest):
@@ -39,7 +43,10 @@ def get_selected_project(request: HttpRequest):
         request.selected_project = None  # type: ignore
         return
 
-    project = Project.objects.filter(pk=selected_project["project_id"]).first()
+    project = Project.objects.filter(
+        pk=selected_project["project_id"],
+        deleting=False,
+    ).first()
     if project is None:
         request.selected_project = None  # type: ignore
         return
@@ -51,7 +58,8 @@ def get_selected_project(request: HttpRequest):
 
 
 def deselect_project(request: HttpRequest):
-    request.session["selected_project"] = None
+    if request.session.get("selected_project") is not None:
+        request.session["selected_project"] = None
 
 
 def select_last_project(request: HttpRequest):
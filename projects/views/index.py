@@ -33,6 +33,7 @@ class Index(View):
         )
         teams = Team.objects.filter(
             project=request.selected_project.project,
+            deleting=False,
         ).order_by("name")
         issues = Issue.objects.filter(
             project=request.selected_project.project,
@@ -11,18 +11,23 @@ from django.utils.translation import gettext as _
 from django.views import View
 from django.views.generic.list import ListView
 
+from core import autocomplete
 from core.htmx import render_htmx, show_message
+from core.paginator import CachedPaginator
+from core.ratelimit import rate_limit
 from core.typing import HttpRequest
 from projects.models import ProjectMember, Role
+from users import display, notifications
 from users.decorators import login_required, project_required
 from users.models import Notification, NotificationType, User
 
 
 class Members(ListView):
     request: HttpRequest
-    template_name: str = "projects/members/list.html"
+    template_name: str = "projects/members/page.html"
     model: type[Model] = ProjectMember
     paginate_by = 15
+    paginator_class = CachedPaginator
     allow_empty = True
     ordering = ["role", "user__first_name", "user__last_name", "user__username"]
 
@@ -31,6 +36,12 @@ class Members(ListView):
     def get(self, request: HttpRequest, *args: Any, **kwargs: Any):
         return super().get(request, *args, **kwargs)
 
+    def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        display.get_many(member.user_id for member in context["object_list"])
+
+        return context
+
     def render_to_response(self, context: dict[str, Any], **_: Any):
         return render_htmx(self.request, self.template_name, context)
 
@@ -49,12 +60,13 @@ class Members(ListView):
                 ordering = (ordering,)
             qs = qs.order_by(*ordering)
 
-        return qs.distinct()
+        return qs.distinct().cached()
 
 
 class InviteMember(View):
     @method_decorator(login_required)
     @method_decorator(project_required)
+    @method_decorator(rate_limit("autocomplete", when=autocomplete.is_search))
     def get(self, request: HttpRequest):
         if not request.selected_project.can_invite:
             return show_message(
@@ -74,26 +86,34 @@ class InviteMember(View):
                 "user_id", flat=True
             )
 
-            filter = request.GET.get("filter") or ""
-            users = (
-                User.objects.annotate(
-                    fullname=Concat("first_name", Value(" "), "last_name")
+            def find(filter: str, limit: int) -> list[autocomplete.Option]:
+                users = (
+                    User.objects.annotate(
+                        fullname=Concat("first_name", Value(" "), "last_name")
+                    )
+                    .exclude(pk__in=member_ids)
+                    .filter(
+                        Q(fullname__istartswith=filter)
+                        | Q(username__istartswith=filter)
+                    )
+                    .order_by("username")
                 )
-                .exclude(pk__in=member_ids)
-                .filter(
-                    Q(fullname__istartswith=filter)
-                    | Q(username__istartswith=filter)
-                )
-            )
-
-            options = [
-                {
-                    "value": user.pk,
-                    "label": user.fullname.strip() or user.username,  # type: ignore
-                }
-                for user in users
-            ]
 
+                return [
+                    autocomplete.option(
+                        user.pk,
+                        user.fullname.strip() or user.username,  # type: ignore
+                        user.fullname,  # type: ignore
+                        user.username,
+                    )
+                    for user in users[:limit]
+                ]
+
+            options = autocomplete.options(
+                request,
+                [f"project:{request.selected_project.project.pk}:members"],
+                find,
+            )
             return JsonResponse(options, safe=False)
 
         response = render(
@@ -161,11 +181,10 @@ class InviteMember(View):
                 user=user,
                 role=role,
             )
-            Notification.objects.create(
-                user=user,
-                notification_type=NotificationType.PROJECT_INVITATION,
-                project_invitation=member,
+            autocomplete.invalidate(
+                f"project:{request.selected_project.project.pk}:members"
             )
+            notifications.send([notifications.project_invitation(member)])
 
         response = render(
             request,
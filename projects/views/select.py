@@ -8,6 +8,7 @@ from django.utils.decorators import method_decorator
 from django.views.generic.list import ListView
 
 from core.htmx import redirect_htmx, render_htmx
+from core.paginator import CachedPaginator
 from core.typing import HttpRequest
 from projects.models import Project, ProjectMember, Role
 from projects.user import get_selected_project, select_project
@@ -18,6 +19,7 @@ from users.models import User
 class ProjectList(ListView):
     model: type[Model] = Project
     paginate_by = 15
+    paginator_class = CachedPaginator
     allow_empty = True
     template_name: str = "projects/select/list.html"
     request: HttpRequest
@@ -36,7 +38,7 @@ class ProjectList(ListView):
     def put(self, request: HttpRequest, *args: Any, **kwargs: Any):
         project_id = request.GET.get("project_id")
 
-        project = get_object_or_404(Project, pk=project_id)
+        project = get_object_or_404(Project, pk=project_id, deleting=False)
         select_project(request, project)
 
         return redirect_htmx(request, reverse("projects:index"))
@@ -56,6 +58,7 @@ class ProjectList(ListView):
                 ),
             )
         ).filter(
+            deleting=False,
             projectmember__user=user,
             projectmember__accepted=True,
             projectmember__rejected=False,
@@ -67,4 +70,4 @@ class ProjectList(ListView):
                 ordering = (ordering,)
             qs = qs.order_by(*ordering)
 
-        return qs.distinct()
+        return qs.distinct().cached()
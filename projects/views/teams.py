@@ -12,12 +12,15 @@ from django.utils.translation import gettext as _
 from django.views import View
 from django.views.generic.list import ListView
 
+from core import autocomplete
 from core.htmx import render_htmx, show_message
+from core.paginator import CachedPaginator
+from core.ratelimit import rate_limit
 from core.typing import HttpRequest, HttpResponse
 from projects.forms.team import TeamForm
 from projects.models import ProjectMember, Team, TeamMember
 from users.decorators import login_required, project_required
-from users.models import Notification, NotificationType
+from users import display, notifications
 
 
 class Teams(ListView):
@@ -25,6 +28,7 @@ class Teams(ListView):
     template_name: str = "projects/teams/list.html"
     model: type[Model] = Team
     paginate_by = 15
+    paginator_class = CachedPaginator
     allow_empty = True
     ordering = ["name"]
 
@@ -50,6 +54,7 @@ class Teams(ListView):
 
         qs = qs.filter(
             project=self.request.selected_project.project,
+            deleting=False,
         )
 
         ordering = self.get_ordering()
@@ -58,7 +63,7 @@ class Teams(ListView):
                 ordering = (ordering,)
             qs = qs.order_by(*ordering)
 
-        qs = qs.distinct()
+        qs = qs.distinct().cached()
 
         compact = self.request.GET.get("compact")
         if compact in ["true", "True", True]:
@@ -107,6 +112,9 @@ class NewTeam(View):
         if form.is_valid():
             print(form.cleaned_data)
             form.save()
+            autocomplete.invalidate(
+                f"project:{request.selected_project.project.pk}:teams"
+            )
 
             response = HttpResponse(b"")
             response.headers["HX-Trigger"] = json.dumps(
@@ -130,9 +138,10 @@ class NewTeam(View):
 class Members(ListView):
     request: HttpRequest
     team: Team
-    template_name = "projects/teams/members/list.html"
+    template_name = "projects/teams/members/page.html"
     model: type[Model] = TeamMember
     paginate_by = 15
+    paginator_class = CachedPaginator
     allow_empty = True
     ordering = [
         "member__user__first_name",
@@ -145,7 +154,7 @@ class Members(ListView):
     def get(
         self, request: HttpRequest, team_id: int, *args: Any, **kwargs: Any
     ):
-        self.team = get_object_or_404(Team, pk=team_id)
+        self.team = get_object_or_404(Team, pk=team_id, deleting=False)
         return super().get(request, *args, **kwargs)
 
     def render_to_response(self, context: dict[str, Any], **_: Any):
@@ -154,7 +163,7 @@ class Members(ListView):
     def get_queryset(self):
         qs = self.model.objects
 
-        qs = qs.filter(
+        qs = qs.select_related("member").filter(
             team=self.team,
         )
 
@@ -164,12 +173,15 @@ class Members(ListView):
                 ordering = (ordering,)
             qs = qs.order_by(*ordering)
 
-        return qs.distinct()
+        return qs.distinct().cached()
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
 
         context.update({"team": self.team})
+        display.get_many(
+            member.member.user_id for member in context["object_list"]
+        )
 
         return context
 
@@ -183,9 +195,12 @@ class Members(ListView):
                 _("You are not allowed to delete teams."),
             )
 
-        team = get_object_or_404(Team, pk=team_id)
+        team = get_object_or_404(Team, pk=team_id, deleting=False)
         deleted, message = team.try_delete()
         if deleted:
+            autocomplete.invalidate(
+                f"project:{team.project_id}:teams"  # type: ignore
+            )
             response = show_message(
                 None,
                 "success",
@@ -201,7 +216,7 @@ class Rename(View):
     @method_decorator(login_required)
     @method_decorator(project_required)
     def get(self, request: HttpRequest, team_id: int):
-        team = get_object_or_404(Team, pk=team_id)
+        team = get_object_or_404(Team, pk=team_id, deleting=False)
 
         return render_htmx(
             request,
@@ -215,7 +230,7 @@ class Rename(View):
     @method_decorator(login_required)
     @method_decorator(project_required)
     def put(self, request: HttpRequest, team_id: int):
-        team = get_object_or_404(Team, pk=team_id)
+        team = get_object_or_404(Team, pk=team_id, deleting=False)
 
         if not request.selected_project.can_create_team:
             return show_message(
@@ -235,6 +250,9 @@ class Rename(View):
 
         team.name = new_name
         team.save()
+        autocomplete.invalidate(
+            f"project:{team.project_id}:teams"  # type: ignore
+        )
 
         return render_htmx(
             request,
@@ -248,8 +266,9 @@ class Rename(View):
 class AssignMember(View):
     @method_decorator(login_required)
     @method_decorator(project_required)
+    @method_decorator(rate_limit("autocomplete", when=autocomplete.is_search))
     def get(self, request: HttpRequest, team_id: int):
-        team = get_object_or_404(Team, pk=team_id)
+        team = get_object_or_404(Team, pk=team_id, deleting=False)
 
         if not request.selected_project.can_create_team:
             return show_message(
@@ -266,34 +285,45 @@ class AssignMember(View):
                 team=team
             ).values_list("member_id", flat=True)
 
-            filter = request.GET.get("filter") or ""
-            members = (
-                ProjectMember.objects.annotate(
-                    fullname=Concat(
-                        "user__first_name", Value(" "), "user__last_name"
+            def find(filter: str, limit: int) -> list[autocomplete.Option]:
+                members = (
+                    ProjectMember.objects.annotate(
+                        fullname=Concat(
+                            "user__first_name", Value(" "), "user__last_name"
+                        )
                     )
+                    .select_related("user")
+                    .exclude(pk__in=member_ids)
+                    .filter(
+                        project=request.selected_project.project,
+                        accepted=True,
+                        rejected=False,
+                    )
+                    .filter(
+                        Q(fullname__istartswith=filter)
+                        | Q(user__username__istartswith=filter)
+                    )
+                    .order_by("user__username")
                 )
-                .select_related("user")
-                .exclude(pk__in=member_ids)
-                .filter(
-                    project=request.selected_project.project,
-                    accepted=True,
-                    rejected=False,
-                )
-                .filter(
-                    Q(fullname__istartswith=filter)
-                    | Q(user__username__istartswith=filter)
-                )
-            )
-
-            options = [
-                {
-                    "value": member.pk,
-                    "label": member.fullname.strip() or member.user.username,  # type: ignore
-                }
-                for member in members
-            ]
 
+                return [
+                    autocomplete.option(
+                        member.pk,
+                        member.fullname.strip() or member.user.username,  # type: ignore
+                        member.fullname,  # type: ignore
+                        member.user.username,
+                    )
+                    for member in members[:limit]
+                ]
+
+            options = autocomplete.options(
+                request,
+                [
+                    f"team:{team.pk}:members",
+                    f"project:{request.selected_project.project.pk}:members",
+                ],
+                find,
+            )
             return JsonResponse(options, safe=False)
 
         response = render(
@@ -312,7 +342,7 @@ class AssignMember(View):
     @method_decorator(login_required)
     @method_decorator(project_required)
     def post(self, request: HttpRequest, team_id: int):
-        team = get_object_or_404(Team, pk=team_id)
+        team = get_object_or_404(Team, pk=team_id, deleting=False)
 
         if not request.selected_project.can_create_team:
             return show_message(
@@ -351,11 +381,8 @@ class AssignMember(View):
                 team=team,
                 member=member,
             )
-            Notification.objects.create(
-                user=member.user,
-                notification_type=NotificationType.TEAM_ASSIGNMENT,
-                team_assignment=team_member,
-            )
+            autocomplete.invalidate(f"team:{team.pk}:members")
+            notifications.send([notifications.team_assignment(team_member)])
 
         response = render(
             request,
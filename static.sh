@@ -1,4 +1,4 @@
 #! /usr/bin/bash
 
-./tailwindcss -o ./core/static/vendor/tailwind/bundle.css
+./tailwindcss --minify -o ./core/static/vendor/tailwind/bundle.css
 python manage.py collectstatic --no-input
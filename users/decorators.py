@@ -6,12 +6,12 @@ from django.contrib.auth import REDIRECT_FIELD_NAME
 from django.http.request import QueryDict
 from django.shortcuts import resolve_url
 
+from core import metrics
 from core.typing import HttpRequest
 from core.htmx import redirect_htmx
 from projects.user import get_selected_project
 
 
-
 def login_required(view_func):
     @wraps(view_func)
     def _wrapper_view(request: HttpRequest, *args, **kwargs):
@@ -33,16 +33,16 @@ def login_required(view_func):
         login_url_parts = list(urlparse(resolved_url))
         if REDIRECT_FIELD_NAME:
             querystring = QueryDict(login_url_parts[4], mutable=True)
-            querystring[REDIRECT_FIELD_NAME] = path  
+            querystring[REDIRECT_FIELD_NAME] = path
             login_url_parts[4] = querystring.urlencode(safe="/")
 
         redirect_url = urlunparse(login_url_parts)
+        metrics.DECORATOR_REDIRECTS.labels("login").inc()
         return redirect_htmx(request, redirect_url)
 
     return _wrapper_view
 
 
-
 def project_required(view_func):
     @wraps(view_func)
     def _wrapper_view(request: HttpRequest, *args, **kwargs):
@@ -51,7 +51,7 @@ def project_required(view_func):
         if request.selected_project is not None:
             return view_func(request, *args, **kwargs)
 
-        return redirect_htmx(request, resolve_url('projects:select_project'))
+        metrics.DECORATOR_REDIRECTS.labels("project").inc()
+        return redirect_htmx(request, resolve_url("projects:select_project"))
 
     return _wrapper_view
-
@@ -0,0 +1,108 @@
+import os
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.signals import request_started
+from django.templatetags.static import static
+
+from users.models import User
+
+# Square thumbnails created when a picture is uploaded, by display size
+AVATAR_SIZES = {"small": 64, "large": 256}
+
+# Bump when the cached UserDisplay changes shape
+KEY_VERSION = 1
+TIMEOUT = 60 * 60 * 24
+
+# Displays already resolved during the current request
+_loaded: ContextVar[dict[int, "UserDisplay"] | None] = ContextVar(
+    "user_displays", default=None
+)
+
+
+@dataclass(frozen=True)
+class UserDisplay:
+    id: int
+    name: str
+    avatars: dict[str, str] = field(default_factory=dict)
+
+    def __str__(self):
+        return self.name
+
+
+def thumbnail_name(name: str, size: int) -> str:
+    root, ext = os.path.splitext(name)
+    return f"{root}_{size}{ext}"
+
+
+def build(user: User) -> UserDisplay:
+    if not user.picture:
+        placeholder = static("img/profile-placeholder.png")
+        avatars = {size: placeholder for size in AVATAR_SIZES}
+    else:
+        avatars = {}
+        for size, pixels in AVATAR_SIZES.items():
+            name = thumbnail_name(user.picture.name, pixels)
+            if default_storage.exists(name):
+                avatars[size] = default_storage.url(name)
+            else:
+                avatars[size] = user.picture.url
+
+    return UserDisplay(id=user.pk, name=user.get_name(), avatars=avatars)
+
+
+def _key(user_id: int) -> str:
+    return f"user-display:v{KEY_VERSION}:{user_id}"
+
+
+def get_many(user_ids: Iterable[int | None]) -> dict[int, UserDisplay]:
+    loaded = _loaded.get()
+    if loaded is None:
+        loaded = {}
+        _loaded.set(loaded)
+
+    ids = {pk for pk in user_ids if pk is not None}
+    missing = ids - loaded.keys()
+
+    if missing:
+        cached = cache.get_many([_key(pk) for pk in missing])
+        for display in cached.values():
+            loaded[display.id] = display
+            missing.discard(display.id)
+
+    if missing:
+        users = User.objects.filter(pk__in=missing).only(
+            "username", "first_name", "last_name", "picture"
+        )
+        built = {user.pk: build(user) for user in users}
+        cache.set_many(
+            {_key(pk): display for pk, display in built.items()}, TIMEOUT
+        )
+        loaded.update(built)
+
+    return {pk: loaded[pk] for pk in ids if pk in loaded}
+
+
+def get(user_id: int | None) -> UserDisplay | None:
+    if user_id is None:
+        return None
+
+    return get_many([user_id]).get(user_id)
+
+
+def invalidate(user_id: int):
+    cache.delete(_key(user_id))
+
+    loaded = _loaded.get()
+    if loaded is not None:
+        loaded.pop(user_id, None)
+
+
+def _reset(**_):
+    _loaded.set(None)
+
+
+request_started.connect(_reset)
@@ -0,0 +1,83 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from core.partitions import (
+    PARTITION_COLUMN,
+    add_months,
+    detach_partition,
+    list_partitions,
+)
+from users.models import Notification
+
+
+class Command(BaseCommand):
+    help = (
+        "Drops (or archives) the monthly notification partitions older than "
+        "the retention period, keeping their unread notifications"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-months",
+            type=int,
+            default=settings.NOTIFICATION_RETENTION_MONTHS,
+        )
+        parser.add_argument(
+            "--archive",
+            action="store_true",
+            help="Move the partitions to the archive schema instead of dropping them",
+        )
+        parser.add_argument(
+            "--worker",
+            action="store_true",
+            help="Keep pruning every --interval seconds instead of exiting",
+        )
+        parser.add_argument("--interval", type=float, default=60 * 60 * 24)
+
+    def prune_default(self, table: str, cutoff: str):
+        # Unread notifications of dropped months wait here until they are read
+        default = connection.ops.quote_name(f"{table}_default")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {default} "
+                f"WHERE read AND {PARTITION_COLUMN} < %s",
+                [cutoff],
+            )
+            if cursor.rowcount:
+                self.stdout.write(
+                    f"Deleted {cursor.rowcount} read notification(s) "
+                    "from the default partition"
+                )
+
+    def prune(self, keep_months: int, archive: bool):
+        table = Notification._meta.db_table
+        current = timezone.now().date().replace(day=1)
+        cutoff = add_months(current, -keep_months)
+
+        for partition, month in sorted(list_partitions(table).items()):
+            if month is None or month >= cutoff:
+                continue
+
+            detach_partition(table, partition, archive=archive, keep="NOT read")
+            action = "Archived" if archive else "Dropped"
+            self.stdout.write(f"{action} {partition}")
+
+        self.prune_default(table, f"{cutoff:%Y-%m-%d} 00:00:00+00")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                self.prune(options["keep_months"], options["archive"])
+            except Exception as e:
+                if not options["worker"]:
+                    raise
+                self.stderr.write(f"Pruning failed: {e!r}")
+
+            if not options["worker"]:
+                return
+
+            time.sleep(options["interval"])
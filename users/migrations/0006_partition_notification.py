@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from core.partitions import (
+    convert_to_partitioned_sql,
+    revert_partitioned_sql,
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0005_notification_issue_assignment_and_more"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            convert_to_partitioned_sql("users_notification"),
+            reverse_sql=revert_partitioned_sql("users_notification"),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:59
+
+from django.db import migrations, models
+
+BACKFILL_SQL = """
+UPDATE users_notification AS notification
+SET payload = jsonb_build_object(
+    'project', project.name,
+    'state', CASE
+        WHEN member.accepted THEN 'accepted'
+        WHEN member.rejected THEN 'rejected'
+        ELSE 'pending'
+    END
+)
+FROM projects_projectmember AS member
+JOIN projects_project AS project ON project.id = member.project_id
+WHERE notification.project_invitation_id = member.id;
+
+UPDATE users_notification AS notification
+SET payload = jsonb_build_object('project', project.name, 'team', team.name)
+FROM projects_teammember AS team_member
+JOIN projects_team AS team ON team.id = team_member.team_id
+JOIN projects_project AS project ON project.id = team.project_id
+WHERE notification.team_assignment_id = team_member.id;
+
+UPDATE users_notification AS notification
+SET payload = jsonb_strip_nulls(
+    jsonb_build_object(
+        'project', project.name,
+        'issue', issue.number,
+        'assignment_type', assignment.type,
+        'team', team.name
+    )
+)
+FROM issues_assignment AS assignment
+JOIN issues_issue AS issue ON issue.id = assignment.issue_id
+JOIN projects_project AS project ON project.id = issue.project_id
+LEFT JOIN projects_team AS team ON team.id = assignment.team_id
+WHERE notification.issue_assignment_id = assignment.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0011_partition_history"),
+        ("projects", "0006_project_deleting_team_deleting_deletionjob"),
+        ("users", "0006_partition_notification"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="payload",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
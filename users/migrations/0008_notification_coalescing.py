@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0007_notification_payload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="count",
+            field=models.IntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="group_key",
+            field=models.TextField(blank=True, default=""),
+        ),
+    ]
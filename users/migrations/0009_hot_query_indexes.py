@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0008_notification_coalescing"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("read", False)),
+                fields=["user", "group_key"],
+                name="notification_unread_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "-created_at"],
+                name="notification_user_created_idx",
+            ),
+        ),
+    ]
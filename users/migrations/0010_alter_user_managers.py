@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:04
+
+from django.db import migrations
+import users.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0009_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name="user",
+            managers=[
+                ("objects", users.models.CachedUserManager()),
+            ],
+        ),
+    ]
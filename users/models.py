@@ -1,8 +1,15 @@
 import os
 import uuid
 
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django_stubs_ext.db.models import TypedModelMeta
+
+from core.querycache import CachedQuerySet
+
+
+class CachedUserManager(UserManager.from_queryset(CachedQuerySet)):
+    pass
 
 
 class User(AbstractUser):
@@ -23,6 +30,8 @@ class User(AbstractUser):
         "projects.Project", on_delete=models.SET_NULL, null=True, blank=True
     )
 
+    objects = CachedUserManager()
+
     def get_name(self):
         full_name = self.get_full_name()
 
@@ -58,3 +67,19 @@ class Notification(models.Model):
         null=True,
         blank=True,
     )
+    payload = models.JSONField(default=dict, blank=True)
+    group_key = models.TextField(blank=True, default="")
+    count = models.IntegerField(default=1)
+
+    class Meta(TypedModelMeta):
+        indexes = [
+            models.Index(
+                fields=["user", "group_key"],
+                condition=models.Q(read=False),
+                name="notification_unread_idx",
+            ),
+            models.Index(
+                fields=["user", "-created_at"],
+                name="notification_user_created_idx",
+            ),
+        ]
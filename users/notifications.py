@@ -0,0 +1,166 @@
+from datetime import datetime, timedelta
+from typing import Any
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from issues.models import Assignment
+from projects.models import ProjectMember, TeamMember
+from users.models import Notification, NotificationType, User
+
+# How many of the merged issues or teams a coalesced notification lists
+MAX_ITEMS = 5
+
+
+class InvitationState:
+    PENDING = "pending"
+    ACCEPTED = "accepted"
+    REJECTED = "rejected"
+
+
+def invitation_state(member: ProjectMember) -> str:
+    if member.accepted:
+        return InvitationState.ACCEPTED
+    if member.rejected:
+        return InvitationState.REJECTED
+
+    return InvitationState.PENDING
+
+
+def project_invitation(member: ProjectMember) -> Notification:
+    return Notification(
+        user=member.user,
+        notification_type=NotificationType.PROJECT_INVITATION,
+        project_invitation=member,
+        payload={
+            "project": member.project.name,
+            "state": invitation_state(member),
+        },
+    )
+
+
+def team_assignment(team_member: TeamMember) -> Notification:
+    team = team_member.team
+
+    return Notification(
+        user=team_member.member.user,
+        notification_type=NotificationType.TEAM_ASSIGNMENT,
+        team_assignment=team_member,
+        group_key=f"team_assignment:{team.project_id}",
+        payload={
+            "project": team.project.name,
+            "team": team.name,
+            "teams": [team.name],
+        },
+    )
+
+
+def issue_assignment(user: User, assignment: Assignment) -> Notification:
+    issue = assignment.issue
+    payload: dict[str, Any] = {
+        "project": issue.project.name,
+        "issue": issue.number,
+        "issues": [issue.number],
+        "assignment_type": assignment.type,
+    }
+    if assignment.type == Assignment.Type.TEAM and assignment.team:
+        payload["team"] = assignment.team.name
+
+    return Notification(
+        user=user,
+        notification_type=NotificationType.ISSUE_ASSIGNMENT,
+        issue_assignment=assignment,
+        group_key=f"issue_assignment:{issue.project_id}",
+        payload=payload,
+    )
+
+
+def coalesce_since() -> datetime | None:
+    now = timezone.now()
+
+    period = settings.NOTIFICATION_DIGEST_PERIOD
+    if period:
+        return datetime.fromtimestamp(
+            now.timestamp() // period * period, tz=now.tzinfo
+        )
+
+    window = settings.NOTIFICATION_COALESCE_WINDOW
+    if window:
+        return now - timedelta(seconds=window)
+
+    return None
+
+
+def merge(target: Notification, notification: Notification):
+    payload = {**target.payload, **notification.payload}
+    for key in ["issues", "teams"]:
+        if key not in payload:
+            continue
+
+        items = notification.payload.get(key, []) + target.payload.get(key, [])
+        payload[key] = list(dict.fromkeys(items))[:MAX_ITEMS]
+
+    target.payload = payload
+    target.count += notification.count
+    # The group outlives any one of the assignments it lists, its payload has
+    # everything it shows. Project deletion finds it by its group key.
+    target.issue_assignment = None
+    target.team_assignment = None
+
+
+def send(notifications: list[Notification]) -> list[Notification]:
+    since = coalesce_since()
+
+    created: list[Notification] = []
+    groups: dict[tuple[int, str], list[Notification]] = {}
+    for notification in notifications:
+        if since is None or not notification.group_key:
+            created.append(notification)
+        else:
+            key = (notification.user_id, notification.group_key)  # type: ignore
+            groups.setdefault(key, []).append(notification)
+
+    with transaction.atomic():
+        existing: dict[tuple[int, str], Notification] = {}
+        if groups:
+            for notification in (
+                Notification.objects.select_for_update()
+                .filter(
+                    user_id__in={user_id for user_id, _ in groups},
+                    group_key__in={group_key for _, group_key in groups},
+                    read=False,
+                    created_at__gte=since,
+                )
+                .order_by("created_at")
+            ):
+                key = (notification.user_id, notification.group_key)  # type: ignore
+                existing[key] = notification
+
+        updated: list[int] = []
+        for key, group in groups.items():
+            target = existing.get(key)
+            if target is None:
+                target, group = group[0], group[1:]
+            else:
+                # Inserted again with a new id and creation time, so it moves
+                # to the top of the list and the list refresh and the counter
+                # see it as new. The list drops the ids it replaces.
+                updated.append(target.pk)
+                replaces = [target.pk, *target.payload.get("replaces", [])]
+                target.payload = {
+                    **target.payload,
+                    "replaces": replaces[:MAX_ITEMS],
+                }
+                target.pk = None
+                target.created_at = None  # type: ignore
+                target._state.adding = True
+
+            created.append(target)
+            for notification in group:
+                merge(target, notification)
+
+        if updated:
+            Notification.objects.filter(pk__in=updated).delete()
+
+        return Notification.objects.bulk_create(created)
@@ -0,0 +1,10 @@
+from django import template
+
+from users import display
+
+register = template.Library()
+
+
+@register.filter()
+def user_display(user_id: int | None):
+    return display.get(user_id)
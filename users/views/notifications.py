@@ -1,20 +1,34 @@
+from django.db.models import Count, Max
 from django.shortcuts import get_object_or_404, render
 from django.views.decorators.http import require_http_methods
 
+from core import autocomplete, metrics
+from core.ratelimit import rate_limit
 from core.typing import HttpRequest
 from users.decorators import login_required
 from users.models import Notification, NotificationType
+from users.notifications import invitation_state
 
 
 @login_required
 @require_http_methods(["GET"])
+@rate_limit("polling")
 def counter(request: HttpRequest):
     user = request.user
 
     previous_count_str = request.GET.get("previous-count")
     previous_count = int(previous_count_str or "0")
-    count = Notification.objects.filter(user=user, read=False).count()
-    update_list = count > previous_count
+    previous_latest = int(request.GET.get("previous-latest") or "0")
+
+    # Merged notifications are inserted again with a new id, so a change of the
+    # newest one is news even when the count stays the same
+    unread = Notification.objects.filter(user=user, read=False).aggregate(
+        count=Count("pk"), latest=Max("pk")
+    )
+    count = unread["count"]
+    latest = unread["latest"] or 0
+    update_list = count > previous_count or latest > previous_latest
+    metrics.NOTIFICATION_POLLS.labels(update_list).inc()
 
     if count == 0:
         count_str = ""
@@ -28,6 +42,7 @@ def counter(request: HttpRequest):
         "users/notification/counter.html",
         {
             "count": count,
+            "latest": latest,
             "count_str": count_str,
             "update_list": update_list,
             "delay": True,
@@ -47,17 +62,8 @@ def notification_list(request: HttpRequest):
     last_id_str = request.GET.get("last-id")
     first_id_str = request.GET.get("first-id")
 
-    notifications = (
-        Notification.objects.select_related(
-            "project_invitation__project",
-            "project_invitation",
-            "team_assignment",
-            "team_assignment__team",
-            "issue_assignment__issue",
-            "issue_assignment__team",
-        )
-        .filter(user=user)
-        .order_by("-created_at")
+    notifications = Notification.objects.filter(user=user).order_by(
+        "-created_at"
     )
 
     lazy_load = True
@@ -128,9 +134,15 @@ def invitation(request: HttpRequest, notification_id: int, accept: bool):
     else:
         notification.project_invitation.accepted = False
         notification.project_invitation.rejected = True
+    notification.payload["state"] = invitation_state(
+        notification.project_invitation
+    )
 
     notification.save()
     notification.project_invitation.save()
+    # Who can be invited, assigned to issues and added to teams changed
+    project_id = notification.project_invitation.project_id  # type: ignore
+    autocomplete.invalidate(f"project:{project_id}:members")
 
     response = render(
         request,
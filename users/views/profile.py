@@ -2,16 +2,18 @@ import json
 
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.forms import PasswordChangeForm
+from django.core.files.storage import default_storage
 from django.http.response import HttpResponseBadRequest
 from django.shortcuts import render
 from django.utils.decorators import method_decorator
 from django.utils.translation import gettext as _
 from django.views import View
 from django.views.decorators.http import require_POST, require_safe
-from PIL import Image
 
+from core import metrics
 from core.htmx import render_htmx, show_message
 from core.typing import HttpRequest, HttpResponse
+from users import display
 from users.decorators import login_required
 from users.forms.edit import AlterProfileForm
 from users.forms.picture import PictureForm
@@ -42,28 +44,43 @@ def upload_picture(request: HttpRequest):
             _("The uploaded file is not a valid image."),
         )
 
+    # Pillow is slow to import and only needed here, so workers load it on the
+    # first upload instead of at boot
+    from PIL import Image
+
     picture = form.cleaned_data["picture"]
 
     request.user.picture = picture
     request.user.save()
 
-    image = Image.open(request.user.picture.path)
+    with metrics.IMAGE_PROCESSING_DURATION.time():
+        image = Image.open(request.user.picture.path)
 
-    width, height = image.size
-    size = min(image.size)
-    xoffset = int((width - size) / 2)
-    yoffset = int((height - size) / 2)
+        width, height = image.size
+        size = min(image.size)
+        xoffset = int((width - size) / 2)
+        yoffset = int((height - size) / 2)
 
-    image = image.crop(
-        (
-            xoffset,
-            yoffset,
-            xoffset + size,
-            yoffset + size,
+        image = image.crop(
+            (
+                xoffset,
+                yoffset,
+                xoffset + size,
+                yoffset + size,
+            )
         )
-    )
 
-    image.save(request.user.picture.path)
+        image.save(request.user.picture.path)
+
+        for pixels in display.AVATAR_SIZES.values():
+            thumbnail = image.resize((pixels, pixels), Image.LANCZOS)
+            thumbnail.save(
+                default_storage.path(
+                    display.thumbnail_name(request.user.picture.name, pixels)
+                )
+            )
+
+    display.invalidate(request.user.pk)
 
     return render_htmx(request, "users/profile/picture-img.html", {"oob": True})
 
@@ -76,6 +93,7 @@ def update_user_data(request: HttpRequest):
 
     if is_valid:
         form.save()
+        display.invalidate(request.user.pk)
 
     response = render_htmx(
         request,